@@ -0,0 +1,112 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from backend.utils.cache import SQLiteCache, cache_dir
+from backend.utils import metrics
+from backend.utils.helpers import env_flag
+
+# Upper bounds of the budget buckets; budgets in the same bucket share answers.
+BUDGET_BUCKETS = (500, 1000, 2000, 3500, 6000, 10000)
+
+ANALYSIS_KEYS = ("google_analysis", "bing_analysis", "reddit_analysis")
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def normalize_phrase(text: str) -> str:
+    """Lower-cased, punctuation-free, single-spaced form of a destination or interest."""
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s-]", " ", (text or "").lower())).strip()
+
+
+def budget_bucket(budget: float | None) -> str:
+    if budget is None:
+        return "any"
+    for bound in BUDGET_BUCKETS:
+        if budget <= bound:
+            return f"<={bound}"
+    return f">{BUDGET_BUCKETS[-1]}"
+
+
+def normalize_trip_request(trip_request) -> dict:
+    """Canonical form of a Triprequest: near-identical questions map to the same dict."""
+    return {
+        "destination": normalize_phrase(trip_request.destination),
+        "days": trip_request.days,
+        "budget": budget_bucket(trip_request.budget),
+        "interests": sorted({normalize_phrase(i) for i in trip_request.interests if normalize_phrase(i)}),
+        "activities": sorted({normalize_phrase(a) for a in trip_request.activities if normalize_phrase(a)}),
+    }
+
+
+def trip_key(trip_request) -> str:
+    payload = json.dumps(normalize_trip_request(trip_request), sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def answer_ttl() -> float:
+    return float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "21600"))
+
+
+def analyses_ttl() -> float:
+    return float(os.getenv("ANALYSES_CACHE_TTL_SECONDS", "86400"))
+
+
+def enabled() -> bool:
+    return env_flag("ANSWER_CACHE_ENABLED")
+
+
+def get_answer_cache() -> SQLiteCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SQLiteCache(
+                    os.path.join(cache_dir(), "answer_cache.sqlite3"),
+                    table="answers",
+                    ttl=max(answer_ttl(), analyses_ttl()),
+                    max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2000")),
+                )
+    return _cache
+
+
+def _freshness(ttl: float, max_age: float | None) -> float:
+    return ttl if max_age is None else min(ttl, max_age)
+
+
+def lookup(trip_request, max_age: float | None = None) -> tuple[str | None, dict | None]:
+    """Find a cached plan for this trip.
+
+    Returns ("answer", entry) when the final answer is fresh enough to serve
+    as is, ("analyses", entry) when only the per-source analyses are (they
+    are re-synthesized), and (None, None) otherwise. `max_age` tightens both
+    freshness windows for a single request; 0 bypasses the cache.
+    """
+    if not enabled() or trip_request is None or max_age == 0:
+        return None, None
+
+    status, entry = _lookup(trip_request, max_age)
+    metrics.CACHE_REQUESTS.inc(cache="answer", result=status or "miss")
+    return status, entry
+
+
+def _lookup(trip_request, max_age: float | None):
+    entry = get_answer_cache().get(trip_key(trip_request))
+    if entry is None:
+        return None, None
+
+    age = get_answer_cache().age(trip_key(trip_request)) or 0.0
+    if entry.get("final_answer") and age <= _freshness(answer_ttl(), max_age):
+        return "answer", entry
+    if age <= _freshness(analyses_ttl(), max_age):
+        return "analyses", entry
+    return None, None
+
+
+def store(trip_request, final_answer: str, analyses: dict):
+    if not enabled() or trip_request is None:
+        return
+    entry = {"final_answer": final_answer, **{key: analyses.get(key) for key in ANALYSIS_KEYS}}
+    get_answer_cache().set(trip_key(trip_request), entry)
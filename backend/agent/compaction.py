@@ -0,0 +1,146 @@
+import os
+import re
+import threading
+from backend.utils.helpers import canonical_url
+
+# None until loaded, False when unavailable.
+_encoder = None
+_encoder_lock = threading.Lock()
+_load_started = False
+_load_lock = threading.Lock()
+
+
+def load_tokenizer():
+    """Load the tiktoken encoder for the chat model; returns it, or False when unavailable.
+
+    The first load downloads the BPE file unless it is already in
+    TIKTOKEN_CACHE_DIR, so this runs during the startup warm-up, never on a
+    request. TOKENIZER_ENCODING=none skips it.
+    """
+    global _encoder
+    with _encoder_lock:
+        if _encoder is None:
+            encoding = os.getenv("TOKENIZER_ENCODING", "o200k_base")
+            try:
+                if encoding.lower() in ("", "none"):
+                    raise RuntimeError("TOKENIZER_ENCODING is none")
+                import tiktoken
+
+                _encoder = tiktoken.get_encoding(encoding)
+            except Exception as e:
+                print(f"⚠️ Tokenizer unavailable, estimating tokens from length: {e}")
+                _encoder = False
+    return _encoder
+
+
+def _get_encoder():
+    """The loaded encoder, or a falsy value while it is loading or unavailable; never blocks.
+
+    If nothing loaded it yet, the first call starts loading it in the background.
+    """
+    global _load_started
+    if _encoder is None and not _load_started:
+        with _load_lock:
+            if not _load_started:
+                _load_started = True
+                threading.Thread(target=load_tokenizer, name="tokenizer-load", daemon=True).start()
+    return _encoder
+
+
+def count_tokens(text: str) -> int:
+    encoder = _get_encoder()
+    if encoder:
+        return len(encoder.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def _budget(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def truncate(text, max_chars: int) -> str:
+    text = re.sub(r"\s+", " ", str(text or "")).strip()
+    if len(text) <= max_chars:
+        return text
+    return text[: max_chars - 1].rsplit(" ", 1)[0] + "…"
+
+
+def _fit(lines, budget: int) -> str:
+    """Keep lines in order until the token budget is spent."""
+    kept, used = [], 0
+    for line in lines:
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+def compact_serp_results(results, budget: int | None = None) -> str:
+    """Compact a SERP result dict into de-duplicated, truncated lines within a token budget."""
+    if not results:
+        return ""
+    if budget is None:
+        budget = _budget("SERP_TOKEN_BUDGET", 1500)
+    snippet_chars = _budget("SNIPPET_MAX_CHARS", 300)
+
+    lines = []
+    knowledge = results.get("knowledge") or {}
+    if isinstance(knowledge, dict):
+        for key in ("title", "subtitle", "description"):
+            if knowledge.get(key):
+                lines.append(f"[knowledge] {key}: {truncate(knowledge[key], snippet_chars)}")
+
+    seen_urls, seen_titles = set(), set()
+    for entry in results.get("organic") or []:
+        link = entry.get("link") or entry.get("url") or ""
+        title = truncate(entry.get("title"), 120)
+        url_key, title_key = canonical_url(link), title.lower()
+        if (url_key and url_key in seen_urls) or (title_key and title_key in seen_titles):
+            continue
+        seen_urls.add(url_key)
+        seen_titles.add(title_key)
+        snippet = truncate(entry.get("description") or entry.get("snippet"), snippet_chars)
+        # Merged results say which engines returned them.
+        engines = f" [{', '.join(entry['engines'])}]" if entry.get("engines") else ""
+        lines.append(f"- {title}: {snippet} ({link}){engines}")
+
+    return _fit(lines, budget)
+
+
+def compact_reddit_results(reddit_results, budget: int | None = None) -> str:
+    """Reddit search hits as unique `title (url)` lines within a token budget."""
+    if not reddit_results:
+        return ""
+    if budget is None:
+        budget = _budget("REDDIT_RESULTS_TOKEN_BUDGET", 800)
+
+    lines, seen = [], set()
+    for post in reddit_results.get("parsed_posts") or []:
+        key = canonical_url(post.get("url") or "")
+        if key in seen:
+            continue
+        seen.add(key)
+        lines.append(f"- {truncate(post.get('title'), 150)} ({post.get('url')})")
+    return _fit(lines, budget)
+
+
+def compact_reddit_post_data(reddit_post_data, budget: int | None = None) -> str:
+    """Reddit comments as unique, truncated lines within a token budget."""
+    if not reddit_post_data:
+        return ""
+    if budget is None:
+        budget = _budget("REDDIT_COMMENTS_TOKEN_BUDGET", 3000)
+    comment_chars = _budget("COMMENT_MAX_CHARS", 500)
+
+    comments = reddit_post_data.get("comments") if isinstance(reddit_post_data, dict) else reddit_post_data
+    lines, seen = [], set()
+    for comment in comments or []:
+        content = truncate(comment.get("content"), comment_chars)
+        if not content or content.lower() in seen:
+            continue
+        seen.add(content.lower())
+        date = str(comment.get("date") or "")[:10]
+        lines.append(f"- {content} [{date}]" if date else f"- {content}")
+    return _fit(lines, budget)
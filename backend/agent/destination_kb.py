@@ -0,0 +1,96 @@
+import os
+import threading
+from backend.utils.cache import SQLiteCache, cache_dir
+from backend.utils import metrics
+from backend.utils.helpers import env_flag
+from backend.agent.answer_cache import ANALYSIS_KEYS, normalize_phrase
+from backend.agent.compaction import compact_serp_results, compact_reddit_post_data
+from backend.models.trip_request import Triprequest
+
+# Research kept next to the analyses, for inspection and re-analysis, compacted
+# to the same token budgets the analysis prompts use.
+RESEARCH_COMPACTORS = {
+    "web_results": compact_serp_results,
+    "reddit_post_data": compact_reddit_post_data,
+}
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return env_flag("DESTINATION_KB_ENABLED")
+
+
+def destinations() -> list[str]:
+    """Destinations the refresher keeps warm (DESTINATION_KB_DESTINATIONS, comma separated)."""
+    return [d.strip() for d in os.getenv("DESTINATION_KB_DESTINATIONS", "").split(",") if d.strip()]
+
+
+def max_age() -> float:
+    """How old an entry can be and still stand in for fresh research."""
+    return float(os.getenv("DESTINATION_KB_MAX_AGE_SECONDS", "86400"))
+
+
+def refresh_interval() -> float:
+    return float(os.getenv("DESTINATION_KB_REFRESH_SECONDS", "21600"))
+
+
+def research_request(destination: str) -> Triprequest:
+    """The generic trip researched for a destination: no budget, broad interests."""
+    interests = os.getenv("DESTINATION_KB_INTERESTS", "food,things to do,where to stay")
+    return Triprequest(
+        destination=destination,
+        days=int(os.getenv("DESTINATION_KB_DAYS", "5")),
+        interests=[i.strip() for i in interests.split(",") if i.strip()],
+    )
+
+
+def get_destination_store() -> SQLiteCache:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SQLiteCache(
+                    os.path.join(cache_dir(), "destination_kb.sqlite3"),
+                    table="destinations",
+                    ttl=max_age(),
+                )
+    return _store
+
+
+def age(destination: str) -> float | None:
+    return get_destination_store().age(normalize_phrase(destination))
+
+
+def lookup(trip_request, request_max_age: float | None = None) -> dict | None:
+    """Precomputed analyses for the trip's destination, or None when it is not warm.
+
+    `request_max_age` tightens the freshness window for a single request;
+    0 bypasses the knowledge base like the answer cache.
+    """
+    if not enabled() or trip_request is None or request_max_age == 0:
+        return None
+    limit = max_age() if request_max_age is None else min(max_age(), request_max_age)
+    entry = get_destination_store().get(normalize_phrase(trip_request.destination), max_age=limit)
+    metrics.CACHE_REQUESTS.inc(cache="destination", result="miss" if entry is None else "hit")
+    return entry
+
+
+def store(destination: str, state: dict) -> bool:
+    """Save a finished research run; runs missing an analysis keep the previous entry."""
+    analyses = {key: state.get(key) for key in ANALYSIS_KEYS}
+    if not all(analyses.values()):
+        return False
+    research = {key: compact(state.get(key)) for key, compact in RESEARCH_COMPACTORS.items()}
+    entry = {"destination": destination, **analyses, **research}
+    get_destination_store().set(normalize_phrase(destination), entry)
+    return True
+
+
+def stats() -> dict:
+    if not enabled():
+        return {"enabled": False}
+    warm = [d for d in destinations() if (a := age(d)) is not None and a <= max_age()]
+    return {"enabled": True, "destinations": len(destinations()), "warm": len(warm),
+            **get_destination_store().stats()}
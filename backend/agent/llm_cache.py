@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from langchain_core.messages import AIMessage
+from backend.utils.cache import MemoryCache, SQLiteCache, cache_dir
+from backend.utils.deadline import call_with_deadline, acall_with_deadline
+from backend.utils import metrics
+from backend.agent.compaction import count_tokens
+from backend.data_sources import rate_limit
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Shared response cache; LLM_CACHE_BACKEND selects memory (default), sqlite or none."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend = os.getenv("LLM_CACHE_BACKEND", "memory").lower()
+                ttl = float(os.getenv("LLM_CACHE_TTL_SECONDS", "21600"))
+                max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+                if backend == "sqlite":
+                    _cache = SQLiteCache(
+                        os.path.join(cache_dir(), "llm_cache.sqlite3"),
+                        table="llm_responses",
+                        ttl=ttl,
+                        max_entries=max_entries,
+                    )
+                elif backend == "memory":
+                    _cache = MemoryCache(ttl=ttl, max_entries=max_entries)
+                else:
+                    _cache = False
+    return _cache or None
+
+
+def _model_name(llm) -> str:
+    for attr in ("model_name", "model", "model_id"):
+        name = getattr(llm, attr, None)
+        if isinstance(name, str):
+            return name
+    return type(llm).__name__
+
+
+def _to_jsonable(obj):
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    return str(obj)
+
+
+@contextmanager
+def _provider_throttling():
+    """Turn the provider's own 429 (after its SDK retries) into Overloaded."""
+    try:
+        yield
+    except Exception as e:
+        if getattr(e, "status_code", None) == 429:
+            raise rate_limit.Overloaded(f"Chat model provider is rate limiting: {e}", retry_after=10.0) from e
+        raise
+
+
+class CachedChatModel:
+    """Content-addressed cache around a chat model.
+
+    The key hashes the model name, the message list and the structured-output
+    schema (if any), so identical analysis/synthesis calls are answered from
+    the cache instead of reaching the provider. Anything not overridden here
+    is delegated to the wrapped model. Provider calls wait for their share
+    of the tokens-per-minute limit, are bounded by the current request
+    deadline, and their latency, tokens and cost are exported as metrics.
+    """
+
+    def __init__(self, llm, cache=None, schema=None, model_name: str | None = None):
+        self._llm = llm
+        self._cache = cache
+        self._schema = schema
+        self.model_name = model_name or _model_name(llm)
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+    def cache_key(self, messages) -> str:
+        schema = self._schema.model_json_schema() if hasattr(self._schema, "model_json_schema") else self._schema
+        payload = json.dumps(
+            {"model": self.model_name, "messages": messages, "schema": schema},
+            sort_keys=True,
+            default=_to_jsonable,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _encode(self, reply):
+        if self._schema is not None:
+            return _to_jsonable(reply)
+        return {"content": reply.content}
+
+    def _decode(self, value):
+        if self._schema is not None:
+            return self._schema.model_validate(value) if hasattr(self._schema, "model_validate") else value
+        return AIMessage(content=value["content"])
+
+    def _cached(self, key, attrs):
+        if self._cache is None:
+            return None
+        cached = self._cache.get(key)
+        metrics.CACHE_REQUESTS.inc(cache="llm", result="miss" if cached is None else "hit")
+        if cached is not None:
+            attrs["cache"] = "hit"
+            return self._decode(cached)
+        return None
+
+    def _estimate(self, messages) -> int:
+        """Tokens a call is charged against the rate limit before its real usage is known."""
+        return count_tokens(json.dumps(messages, default=_to_jsonable)) + int(os.getenv("LLM_COMPLETION_TOKENS_ESTIMATE", "800"))
+
+    def _record(self, messages, reply, duration: float, attrs: dict) -> int:
+        """Export latency, tokens and cost of a provider call (tokens estimated when not reported); returns the tokens used."""
+        usage = getattr(reply, "usage_metadata", None)
+        if usage:
+            prompt_tokens, completion_tokens = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+        else:
+            prompt_tokens = count_tokens(json.dumps(messages, default=_to_jsonable))
+            completion_tokens = count_tokens(json.dumps(self._encode(reply), default=_to_jsonable))
+            attrs["estimated_tokens"] = True
+        attrs.update(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        metrics.LLM_SECONDS.observe(duration, model=self.model_name)
+        metrics.LLM_TOKENS.inc(prompt_tokens, model=self.model_name, kind="prompt")
+        metrics.LLM_TOKENS.inc(completion_tokens, model=self.model_name, kind="completion")
+        metrics.LLM_COST.inc(metrics.llm_cost(prompt_tokens, completion_tokens), model=self.model_name)
+        return prompt_tokens + completion_tokens
+
+    def _span(self):
+        return metrics.span("llm", model=self.model_name, structured=self._schema is not None)
+
+    def invoke(self, messages, config=None, **kwargs):
+        with self._span() as attrs:
+            key = self.cache_key(messages) if self._cache is not None else None
+            cached = self._cached(key, attrs)
+            if cached is not None:
+                return cached
+            limiter, estimated = rate_limit.get_limiter("llm"), self._estimate(messages)
+            with limiter.limit(estimated), _provider_throttling():
+                started = time.perf_counter()
+                reply = call_with_deadline(self._llm.invoke, messages, config, **kwargs)
+            limiter.settle(estimated, self._record(messages, reply, time.perf_counter() - started, attrs))
+            if self._cache is not None:
+                self._cache.set(key, self._encode(reply))
+            return reply
+
+    async def ainvoke(self, messages, config=None, **kwargs):
+        with self._span() as attrs:
+            key = self.cache_key(messages) if self._cache is not None else None
+            cached = self._cached(key, attrs)
+            if cached is not None:
+                return cached
+            limiter, estimated = rate_limit.get_limiter("llm"), self._estimate(messages)
+            async with limiter.alimit(estimated):
+                with _provider_throttling():
+                    started = time.perf_counter()
+                    reply = await acall_with_deadline(self._llm.ainvoke(messages, config, **kwargs))
+            limiter.settle(estimated, self._record(messages, reply, time.perf_counter() - started, attrs))
+            if self._cache is not None:
+                self._cache.set(key, self._encode(reply))
+            return reply
+
+    def with_structured_output(self, schema, **kwargs):
+        return CachedChatModel(
+            self._llm.with_structured_output(schema, **kwargs),
+            cache=self._cache,
+            schema=schema,
+            model_name=self.model_name,
+        )
+
+
+def cached_chat_model(llm):
+    return CachedChatModel(llm, cache=get_llm_cache())
@@ -1,7 +1,12 @@
-from dotenv import load_dotenv
-from langchain.chat_models import init_chat_model
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from backend.agent.models import get_chat_model
+from backend.agent.trip_parser import parse_trip_request, enabled as trip_parser_enabled, min_confidence
+from backend.agent.query_planner import plan_queries
 from backend.models.trip_request import Triprequest,RedditURLAnalysis
-from backend.data_sources.web_operations import serp_search,reddit_search_api,reddit_post_retrieval
+from backend.data_sources.web_operations import serp_search,aserp_search,reddit_search_api,reddit_post_retrieval
+from backend.utils.helpers import env_flag
 from backend.agent.prompts import (get_trip_request_messages,
                      get_reddit_analysis_messages,
                      get_google_analysis_messages,
@@ -9,26 +14,105 @@ from backend.agent.prompts import (get_trip_request_messages,
                      get_reddit_url_analysis_messages,
                      get_synthesis_messages
 )
-load_dotenv()
 
-llm=init_chat_model("gpt-4.1-2025-04-14")
 
+_speculative_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="speculative")
+_speculative_tasks = set()
 
 
-def handle_extract_trip_parameters(user_question:str):
-    
+def _speculative_enabled() -> bool:
+    return env_flag("SPECULATIVE_SEARCH_ENABLED")
+
+
+def _parse_locally(user_question:str):
+    """Local parse of the question and whether it is confident enough to skip the LLM."""
+    if not trip_parser_enabled():
+        return None, False
+    trip_request, confidence = parse_trip_request(user_question)
+    confident = trip_request is not None and confidence >= min_confidence()
+    if confident:
+        print(f"Parsed trip request locally (confidence {confidence:.2f})")
+    return trip_request, confident
+
+
+def _speculate(guess):
+    """Warm the search cache for the local guess while the LLM runs.
+
+    The search nodes join these fetches (or read their cached results) when
+    the LLM agrees on the query; otherwise they are simply not used.
+    """
+    queries = plan_queries({"trip_request": guess})
+    print(f"Speculatively searching for :{' | '.join(queries)}")
+    for query in queries:
+        for engine in ("google", "bing"):
+            _speculative_executor.submit(contextvars.copy_context().run, _quiet_search, query, engine)
+
+
+def _aspeculate(guess):
+    queries = plan_queries({"trip_request": guess})
+    print(f"Speculatively searching for :{' | '.join(queries)}")
+    for query in queries:
+        for engine in ("google", "bing"):
+            task = asyncio.create_task(_aquiet_search(query, engine))
+            _speculative_tasks.add(task)
+            task.add_done_callback(_speculative_tasks.discard)
+
+
+def _quiet_search(query, engine):
+    try:
+        serp_search(query, engine=engine)
+    except Exception as e:
+        print(f"Speculative {engine} search failed:{e}")
+
+
+async def _aquiet_search(query, engine):
+    try:
+        await aserp_search(query, engine=engine)
+    except Exception as e:
+        print(f"Speculative {engine} search failed:{e}")
+
+
+def _local_trip_request(user_question:str, speculate):
+    """(request, final): the local parse, and whether it stands without asking the LLM.
+
+    An empty question has no request. A guess too unsure to stand is handed
+    to `speculate` so its searches run while the LLM parses the question.
+    """
     if not user_question:
-        return{"trip_request":None}
-    
-    messages=get_trip_request_messages(user_question)
-    structured_llm=llm.with_structured_output(Triprequest)
+        return None, True
+
+    guess, confident = _parse_locally(user_question)
+    if not confident and guess is not None and _speculative_enabled():
+        speculate(guess)
+    return guess, confident
+
+
+def _trip_request_llm():
+    return get_chat_model().with_structured_output(Triprequest)
+
+
+def handle_extract_trip_parameters(user_question:str):
+    guess, final = _local_trip_request(user_question, _speculate)
+    if final:
+        return guess
 
     try:
-        trip_request=structured_llm.invoke(messages)
-        return trip_request
+        return _trip_request_llm().invoke(get_trip_request_messages(user_question))
     except Exception as e:
         print(f"Failed to parse trip request:{e}")
-        return None
+        return guess
+
+
+async def ahandle_extract_trip_parameters(user_question:str):
+    guess, final = _local_trip_request(user_question, _aspeculate)
+    if final:
+        return guess
+
+    try:
+        return await _trip_request_llm().ainvoke(get_trip_request_messages(user_question))
+    except Exception as e:
+        print(f"Failed to parse trip request:{e}")
+        return guess
 
 
 def google_search_api(query:str):
@@ -47,3 +131,14 @@ def bing_search_api(query:str):
 
     return results
 
+async def agoogle_search_api(query:str):
+    """Perform Google search using Bright Data API without blocking the event loop."""
+    if not query:
+        return None
+    return await aserp_search(query,engine="google")
+
+async def abing_search_api(query:str):
+    """Perform bing search using Bright Data API without blocking the event loop."""
+    if not query:
+        return None
+    return await aserp_search(query,engine="bing")
@@ -0,0 +1,45 @@
+import os
+import threading
+
+DEFAULT_CHAT_MODEL = "gpt-4.1-2025-04-14"
+
+_models: dict = {}
+_models_lock = threading.Lock()
+
+
+def default_model_name() -> str:
+    return os.getenv("CHAT_MODEL", DEFAULT_CHAT_MODEL)
+
+
+def get_chat_model(name: str | None = None):
+    """Process-wide cached chat model for `name` (default CHAT_MODEL), created on first use.
+
+    Every node shares one client per model name, and the provider SDK is
+    only imported when a model is first needed rather than at import time.
+    """
+    name = name or default_model_name()
+    llm = _models.get(name)
+    if llm is None:
+        with _models_lock:
+            llm = _models.get(name)
+            if llm is None:
+                from langchain.chat_models import init_chat_model
+                from backend.agent.llm_cache import cached_chat_model
+
+                print(f"🤖 Loading chat model {name}")
+                llm = cached_chat_model(init_chat_model(name))
+                _models[name] = llm
+    return llm
+
+
+def set_chat_model(llm, name: str | None = None):
+    """Register an already-built model under `name`, e.g. a stand-in for tests and benchmarks."""
+    from backend.agent.llm_cache import cached_chat_model
+
+    with _models_lock:
+        _models[name or default_model_name()] = cached_chat_model(llm)
+
+
+def loaded_models() -> list[str]:
+    with _models_lock:
+        return list(_models)
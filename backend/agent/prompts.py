@@ -81,6 +81,35 @@ Bing Search Results: {bing_results}
 
 Please analyze these Bing results and extract insights that complement other search sources."""
 
+    @staticmethod
+    def web_analysis_system() -> str:
+        """System prompt for analyzing merged Google and Bing results."""
+        return """You are an expert research analyst. Analyze the provided web search results, merged from Google and Bing, to extract key insights that answer the user's question.
+
+Focus on:
+- Main factual information and authoritative sources
+- Official websites and reliable travel sources
+- Results returned by both engines, which are usually the most established
+- Any conflicting information from different sources
+
+Provide a concise analysis highlighting the most relevant findings."""
+
+    @staticmethod
+    def web_analysis_user(user_question: str, web_results: str,trip_request:"Triprequest | None"=None) -> str:
+        """User prompt for analyzing merged web search results."""
+        trip_info=f"\n Trip Request Details:{trip_request}"if trip_request else ""
+        return f"""Question: {user_question}{trip_info}
+
+Web Search Results (each tagged with the engines that returned it): {web_results}
+
+Based on this information, provide actionable insights for planning a trip. Include:
+- Recommended places to visit
+- Popular activities related to the user's interests
+- Any relevant travel tips or considerations
+- Summarize conflicting information or choices
+
+Use a clear, structured format for easy reading."""
+
     @staticmethod
     def reddit_analysis_system() -> str:
         """System prompt for analyzing Reddit discussions."""
@@ -133,10 +162,15 @@ Create a comprehensive answer that addresses the user's question from multiple a
         google_analysis: str,
         bing_analysis: str,
         reddit_analysis: str,
-        trip_request:"Triprequest | None"=None
+        trip_request:"Triprequest | None"=None,
+        skipped_steps:list[str]|None=None
     ) -> str:
         """User prompt for synthesizing all analyses."""
         trip_info=f"\n Trip Request Details:{trip_request}"if trip_request else ""
+        gaps=(
+            f"\n\n    Research was cut short by the time limit (skipped: {', '.join(skipped_steps)}). "
+            "Say which sources are missing or incomplete and do not present the plan as fully researched."
+        )if skipped_steps else ""
 
         return f"""Question: {user_question}{trip_info}
 
@@ -150,7 +184,7 @@ Create a comprehensive answer that addresses the user's question from multiple a
     - Highlight recommended destinations, activities, and interests
     - Include pros/cons or conflicting opinions
     - Present the answer in a structured, readable format
-    - Use clear sections for each source if needed
+    - Use clear sections for each source if needed{gaps}
 
     """
 
@@ -234,6 +268,16 @@ def get_bing_analysis_messages(
     )
 
 
+def get_web_analysis_messages(
+    user_question: str, web_results: str,trip_request:"Triprequest |None"=None
+) -> list[Dict[str, Any]]:
+    """Get messages for the merged Google + Bing results analysis."""
+    return create_message_pair(
+        PromptTemplates.web_analysis_system(),
+        PromptTemplates.web_analysis_user(user_question, web_results,trip_request),
+    )
+
+
 def get_reddit_analysis_messages(
     user_question: str, reddit_results: str, reddit_post_data: list,trip_request:"Triprequest |None"=None
 ) -> list[Dict[str, Any]]:
@@ -247,12 +291,13 @@ def get_reddit_analysis_messages(
 
 
 def get_synthesis_messages(
-    user_question: str, google_analysis: str, bing_analysis: str, reddit_analysis: str,trip_request:"Triprequest |None"=None
+    user_question: str, google_analysis: str, bing_analysis: str, reddit_analysis: str,trip_request:"Triprequest |None"=None,
+    skipped_steps:list[str]|None=None
 ) -> list[Dict[str, Any]]:
     """Get messages for final synthesis."""
     return create_message_pair(
         PromptTemplates.synthesis_system(),
         PromptTemplates.synthesis_user(
-            user_question, google_analysis, bing_analysis, reddit_analysis,trip_request
+            user_question, google_analysis, bing_analysis, reddit_analysis,trip_request,skipped_steps
         ),
     )
\ No newline at end of file
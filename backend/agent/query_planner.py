@@ -0,0 +1,95 @@
+import os
+import asyncio
+import contextvars
+from itertools import zip_longest
+from concurrent.futures import ThreadPoolExecutor
+from backend.utils.helpers import canonical_url
+from backend.agent.ranking import reciprocal_rank_fusion
+from backend.data_sources.search_cache import normalize_query
+from backend.utils.helpers import build_search_query
+
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="search")
+
+
+def max_queries(source: str = "web") -> int:
+    """Focused queries per trip: SEARCH_MAX_QUERIES for Google/Bing, REDDIT_SEARCH_MAX_QUERIES for Reddit."""
+    if source == "reddit":
+        return int(os.getenv("REDDIT_SEARCH_MAX_QUERIES", "1"))
+    return int(os.getenv("SEARCH_MAX_QUERIES", "4"))
+
+
+def rrf_k() -> float:
+    return float(os.getenv("SEARCH_RRF_K", "60"))
+
+
+def plan_queries(state, limit: int | None = None) -> list[str]:
+    """Short search queries for a graph state: a general one, then one per activity and interest.
+
+    With a limit of 1, or without a parsed trip, this is the single combined
+    query the searches always used.
+    """
+    limit = max_queries() if limit is None else limit
+    trip_request = state.get("trip_request")
+    if limit <= 1 or not trip_request:
+        query = build_search_query(state)
+        return [query] if query else []
+
+    destination = trip_request.destination
+    general = f"{destination} {trip_request.days} day itinerary" if trip_request.days else f"{destination} travel guide"
+    # Alternate activities and interests so both are covered when the limit is tight.
+    topics = [t for pair in zip_longest(trip_request.activities, trip_request.interests) for t in pair if t]
+
+    queries, seen = [], set()
+    for query in [general, *(f"{destination} {topic}" for topic in topics)]:
+        key = normalize_query(query)
+        if key not in seen:
+            seen.add(key)
+            queries.append(query)
+    return queries[:limit]
+
+
+def search_all(search, queries: list[str]) -> list:
+    """Run search(query) for every query concurrently; the SERP rate limiter bounds upstream load."""
+    if len(queries) <= 1:
+        return [search(query) for query in queries]
+    futures = [_executor.submit(contextvars.copy_context().run, search, query) for query in queries]
+    return [future.result() for future in futures]
+
+
+async def asearch_all(asearch, queries: list[str]) -> list:
+    return list(await asyncio.gather(*(asearch(query) for query in queries)))
+
+
+def fuse_serp_results(results: list) -> dict | None:
+    """One SERP result from several queries' results, organic links ordered by reciprocal-rank fusion."""
+    results = [r for r in results if r]
+    if not results:
+        return None
+    if len(results) == 1:
+        return results[0]
+
+    fused = reciprocal_rank_fusion(
+        [r.get("organic") or [] for r in results],
+        key=lambda entry: canonical_url(entry.get("link") or entry.get("url") or "") or id(entry),
+        k=rrf_k(),
+    )
+    return {
+        "knowledge": next((r["knowledge"] for r in results if r.get("knowledge")), {}),
+        "organic": [{**entry, "rank": rank} for rank, entry in enumerate(fused, start=1)],
+    }
+
+
+def fuse_reddit_results(results: list) -> dict | None:
+    """Reddit posts found by several keyword searches, fused by reciprocal rank and de-duplicated by URL."""
+    results = [r for r in results if r]
+    if not results:
+        return None
+    if len(results) == 1:
+        return results[0]
+
+    posts = reciprocal_rank_fusion(
+        [r.get("parsed_posts") or [] for r in results],
+        key=lambda post: canonical_url(post.get("url") or "") or id(post),
+        k=rrf_k(),
+    )
+    return {"parsed_posts": posts, "total_found": len(posts)}
@@ -0,0 +1,197 @@
+import os
+import re
+import math
+import heapq
+import hashlib
+import itertools
+from collections import Counter
+from backend.agent.compaction import count_tokens
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "has", "have", "i",
+    "in", "is", "it", "its", "me", "my", "of", "on", "or", "so", "that", "the", "this", "to",
+    "trip", "was", "we", "were", "with", "you", "your",
+}
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cased word tokens with stopwords dropped and a light plural stem."""
+    tokens = []
+    for word in re.findall(r"[a-z0-9]+", (text or "").lower()):
+        if word in _STOPWORDS or len(word) < 2:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+# simhash() keeps one big integer per digest byte holding a _LANE-bit counter for each of
+# its bits; adding _SPREAD[byte] bumps the counters of the bits set in `byte`.
+_LANE = 32
+_SPREAD = [sum((byte >> bit & 1) << (bit * _LANE) for bit in range(8)) for byte in range(256)]
+
+
+def simhash(tokens: list[str], shingle: int = 3) -> int:
+    """64-bit SimHash over word shingles; near-duplicate texts differ in few bits."""
+    grams = [" ".join(tokens[i:i + shingle]) for i in range(max(len(tokens) - shingle + 1, 1))]
+    counts = [0] * 8
+    for gram in grams:
+        for i, byte in enumerate(hashlib.blake2b(gram.encode(), digest_size=8).digest()):
+            counts[i] += _SPREAD[byte]
+    # A bit is set when more than half of the shingles set it; digest byte 0 is the high byte.
+    mask = (1 << _LANE) - 1
+    value = 0
+    for i, count in enumerate(counts):
+        for bit in range(8):
+            if 2 * (count >> (bit * _LANE) & mask) > len(grams):
+                value |= 1 << ((7 - i) * 8 + bit)
+    return value
+
+
+def reciprocal_rank_fusion(rankings: list[list], key, k: float = 60.0) -> list:
+    """Fuse several ranked lists into one: each item scores sum(1 / (k + rank)) over the lists it is in.
+
+    Items are matched across lists by `key(item)` and the first occurrence
+    is the one kept. Ties keep first-seen order.
+    """
+    scores, items, order = {}, {}, {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking or [], start=1):
+            item_key = key(item)
+            scores[item_key] = scores.get(item_key, 0.0) + 1.0 / (k + rank)
+            if item_key not in items:
+                items[item_key] = item
+                order[item_key] = len(order)
+    return [items[item_key] for item_key in sorted(scores, key=lambda i: (-scores[i], order[i]))]
+
+
+def query_terms_for(trip_request=None, user_question: str = "") -> set[str]:
+    if trip_request is None:
+        return set(tokenize(user_question))
+    text = " ".join([trip_request.destination, *trip_request.interests, *trip_request.activities])
+    return set(tokenize(text))
+
+
+class CommentRanker:
+    """Streaming BM25 ranking of Reddit comments against the trip's terms.
+
+    Comments are fed one at a time with add(); only a bounded pool of the
+    best candidates is kept, so memory stays flat however long the thread
+    is. Document frequencies and the average length are accumulated on the
+    fly and the pool is re-scored with the final statistics in results(),
+    which returns the top comments that fit the token budget with
+    near-duplicates removed. Pooled SimHashes are bucketed by band, so a
+    new comment is only compared with the few that could be near it.
+    """
+
+    def __init__(self, query_terms: set[str], top_n: int = 40, token_budget: int = 3000,
+                 pool_factor: int = 3, k1: float = 1.2, b: float = 0.75, max_distance: int = 3):
+        self.query_terms = query_terms
+        self.top_n = top_n
+        self.token_budget = token_budget
+        self.pool_size = top_n * pool_factor
+        self.k1 = k1
+        self.b = b
+        self.max_distance = max_distance
+        self.seen = 0
+        self._total_length = 0
+        self._df = Counter()
+        self._pool = []
+        self._order = itertools.count()
+        # Fingerprints within max_distance bits of each other agree on at least
+        # one of max_distance + 1 bands, so bucketing by band misses no near-duplicate.
+        bands = max_distance + 1
+        self._bands = [(64 * i // bands, 64 * (i + 1) // bands) for i in range(bands)]
+        self._buckets = {}
+
+    def _bm25(self, tf: Counter, length: int) -> float:
+        if not self.seen:
+            return 0.0
+        avg_length = self._total_length / self.seen
+        score = 0.0
+        for term, freq in tf.items():
+            df = self._df[term]
+            idf = math.log(1 + (self.seen - df + 0.5) / (df + 0.5))
+            score += idf * freq * (self.k1 + 1) / (freq + self.k1 * (1 - self.b + self.b * length / avg_length))
+        # Small length prior so substantive comments outrank one-liners on ties.
+        return score + 0.1 * min(length, 80) / 80
+
+    def _near_duplicate(self, a: int, b: int) -> bool:
+        return bin(a ^ b).count("1") <= self.max_distance
+
+    def _band_keys(self, fingerprint: int) -> list[tuple[int, int]]:
+        return [(lo, fingerprint >> lo & ((1 << (hi - lo)) - 1)) for lo, hi in self._bands]
+
+    def _pooled_near_duplicate(self, fingerprint: int) -> bool:
+        return any(
+            self._near_duplicate(fingerprint, other)
+            for key in self._band_keys(fingerprint) for other in self._buckets.get(key, ())
+        )
+
+    def _bucket(self, fingerprint: int):
+        for key in self._band_keys(fingerprint):
+            self._buckets.setdefault(key, []).append(fingerprint)
+
+    def _unbucket(self, fingerprint: int):
+        for key in self._band_keys(fingerprint):
+            bucket = self._buckets[key]
+            bucket.remove(fingerprint)
+            if not bucket:
+                del self._buckets[key]
+
+    def add(self, comment: dict):
+        tokens = tokenize(comment.get("content"))
+        if not tokens:
+            return
+        self.seen += 1
+        self._total_length += len(tokens)
+        tf = Counter(token for token in tokens if token in self.query_terms)
+        self._df.update(tf.keys())
+
+        fingerprint = simhash(tokens)
+        if self._pooled_near_duplicate(fingerprint):
+            return
+
+        entry = (self._bm25(tf, len(tokens)), next(self._order), comment, tf, len(tokens), fingerprint)
+        if len(self._pool) < self.pool_size:
+            heapq.heappush(self._pool, entry)
+        elif entry[0] > self._pool[0][0]:
+            self._unbucket(heapq.heapreplace(self._pool, entry)[5])
+        else:
+            return
+        self._bucket(fingerprint)
+
+    def extend(self, comments):
+        for comment in comments:
+            self.add(comment)
+        return self
+
+    def results(self) -> list[dict]:
+        rescored = sorted(
+            ((self._bm25(tf, length), -order, comment, fingerprint)
+             for _, order, comment, tf, length, fingerprint in self._pool),
+            key=lambda item: (item[0], item[1]),
+            reverse=True,
+        )
+        kept, fingerprints, used = [], [], 0
+        for _, _, comment, fingerprint in rescored:
+            if any(self._near_duplicate(fingerprint, other) for other in fingerprints):
+                continue
+            cost = count_tokens(comment.get("content") or "")
+            if used + cost > self.token_budget:
+                continue
+            kept.append(comment)
+            fingerprints.append(fingerprint)
+            used += cost
+            if len(kept) >= self.top_n:
+                break
+        return kept
+
+
+def ranker_for(trip_request=None, user_question: str = "") -> CommentRanker:
+    return CommentRanker(
+        query_terms_for(trip_request, user_question),
+        top_n=int(os.getenv("REDDIT_TOP_COMMENTS", "40")),
+        token_budget=int(os.getenv("REDDIT_COMMENTS_TOKEN_BUDGET", "3000")),
+    )
@@ -0,0 +1,106 @@
+import os
+from backend.utils.helpers import canonical_url
+from backend.agent.ranking import tokenize, simhash
+
+# Engine order decides which analysis covers a result that several engines returned.
+ENGINES = ("google", "bing")
+
+ANALYSIS_MODES = ("unique", "merged", "separate")
+
+
+def analysis_mode() -> str:
+    """unique: each engine's analysis covers only results no earlier engine returned;
+    merged: one analysis of the combined results; separate: each engine's full list."""
+    mode = os.getenv("WEB_ANALYSIS_MODE", "unique").lower()
+    return mode if mode in ANALYSIS_MODES else "unique"
+
+
+def _fingerprint(entry: dict) -> int | None:
+    tokens = tokenize(f"{entry.get('title') or ''} {entry.get('description') or entry.get('snippet') or ''}")
+    # Too little text for the fingerprint to mean anything.
+    return simhash(tokens) if len(tokens) >= 6 else None
+
+
+def merge_serp_results(results_by_engine: dict, max_distance: int | None = None) -> dict | None:
+    """Cluster the organic results of several engines into one list.
+
+    Results with the same canonical URL, or whose title and snippet are
+    near-duplicates (SimHash within `max_distance` bits), form a cluster.
+    Each cluster keeps the first engine's title, link and snippet, lists the
+    `engines` that returned it and its best `rank`; clusters are ordered by
+    that rank, then by how many engines agree.
+    """
+    if max_distance is None:
+        max_distance = int(os.getenv("SERP_NEAR_DUPLICATE_BITS", "3"))
+    present = [engine for engine in ENGINES if results_by_engine.get(engine)]
+    if not present:
+        return None
+
+    clusters, by_url = [], {}
+    for engine in present:
+        for position, entry in enumerate(results_by_engine[engine].get("organic") or []):
+            link = entry.get("link") or entry.get("url") or ""
+            url_key = canonical_url(link)
+            fingerprint = _fingerprint(entry)
+            rank = entry.get("rank") or position + 1
+
+            cluster = by_url.get(url_key) if url_key else None
+            if cluster is None and fingerprint is not None:
+                cluster = next(
+                    (c for c in clusters
+                     if c["fingerprint"] is not None and bin(c["fingerprint"] ^ fingerprint).count("1") <= max_distance),
+                    None,
+                )
+            if cluster is None:
+                cluster = {
+                    "title": entry.get("title"),
+                    "link": link,
+                    "description": entry.get("description") or entry.get("snippet"),
+                    "engines": [],
+                    "rank": rank,
+                    "urls": [],
+                    "fingerprint": fingerprint,
+                }
+                clusters.append(cluster)
+            if engine not in cluster["engines"]:
+                cluster["engines"].append(engine)
+            if link and link not in cluster["urls"]:
+                cluster["urls"].append(link)
+            cluster["rank"] = min(cluster["rank"], rank)
+            if url_key:
+                by_url.setdefault(url_key, cluster)
+
+    clusters.sort(key=lambda c: (c["rank"], -len(c["engines"])))
+    for cluster in clusters:
+        del cluster["fingerprint"]
+
+    knowledge_engine = next((e for e in present if results_by_engine[e].get("knowledge")), None)
+    return {
+        "knowledge": results_by_engine[knowledge_engine]["knowledge"] if knowledge_engine else {},
+        "knowledge_engine": knowledge_engine,
+        "organic": clusters,
+        "counts": {engine: len(results_by_engine[engine].get("organic") or []) for engine in present},
+    }
+
+
+def owned_by(merged: dict | None, engine: str) -> dict | None:
+    """The part of `merged` an engine's analysis covers in `unique` mode.
+
+    A result belongs to the first engine (in ENGINES order) that returned
+    it, so content both engines found is analyzed once.
+    """
+    if not merged:
+        return None
+    return {
+        "knowledge": merged.get("knowledge") if merged.get("knowledge_engine") == engine else {},
+        "organic": [c for c in merged.get("organic") or [] if c["engines"] and c["engines"][0] == engine],
+    }
+
+
+def describe(merged: dict | None) -> str:
+    if not merged:
+        return "no web results"
+    clusters = merged.get("organic") or []
+    shared = sum(1 for c in clusters if len(c["engines"]) > 1)
+    found = " + ".join(f"{count} {engine.title()}" for engine, count in merged.get("counts", {}).items())
+    return f"{found} results -> {len(clusters)} unique ({shared} found by several engines)"
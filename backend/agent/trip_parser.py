@@ -0,0 +1,211 @@
+import os
+import re
+from backend.models.trip_request import Triprequest
+from backend.utils.helpers import env_flag
+
+# Popular destinations recognised without the LLM. TRIP_GAZETTEER_PATH can
+# point at a file with one extra name per line.
+DESTINATIONS = (
+    "Amsterdam", "Athens", "Bali", "Bangkok", "Barcelona", "Beijing", "Berlin", "Boston", "Budapest",
+    "Buenos Aires", "Cairo", "Cancun", "Cape Town", "Chicago", "Copenhagen", "Delhi", "Dubai", "Dublin",
+    "Edinburgh", "Florence", "Goa", "Hanoi", "Havana", "Ho Chi Minh City", "Hong Kong", "Honolulu",
+    "Istanbul", "Jaipur", "Kerala", "Kyoto", "Las Vegas", "Lisbon", "London", "Los Angeles", "Madrid",
+    "Maldives", "Marrakech", "Melbourne", "Mexico City", "Miami", "Milan", "Montreal", "Mumbai", "Munich",
+    "Nashville", "New Orleans", "New York", "Orlando", "Osaka", "Paris", "Phuket", "Prague", "Reykjavik",
+    "Rio de Janeiro", "Rome", "San Francisco", "Santorini", "Seattle", "Seoul", "Singapore", "Sydney",
+    "Taipei", "Tokyo", "Toronto", "Vancouver", "Venice", "Vienna", "Zurich",
+    "Argentina", "Australia", "Austria", "Brazil", "Canada", "China", "Costa Rica", "Croatia", "Egypt",
+    "France", "Germany", "Greece", "Iceland", "India", "Indonesia", "Ireland", "Italy", "Japan", "Kenya",
+    "Malaysia", "Mexico", "Morocco", "Nepal", "Netherlands", "New Zealand", "Norway", "Peru", "Philippines",
+    "Portugal", "Scotland", "South Africa", "South Korea", "Spain", "Sri Lanka", "Switzerland", "Thailand",
+    "Turkey", "Vietnam",
+)
+
+# Canonical interest / activity -> phrasings that imply it.
+INTERESTS = {
+    "food": ("food", "foodie", "cuisine", "eat", "eating", "restaurant", "street food", "culinary", "cafe", "coffee"),
+    "culture": ("culture", "cultural", "tradition", "traditional", "local life"),
+    "history": ("history", "historic", "historical", "ruins", "castle"),
+    "art": ("art", "museum", "gallery", "galleries"),
+    "nature": ("nature", "outdoors", "wildlife", "national park", "mountains", "scenery"),
+    "nightlife": ("nightlife", "bars", "clubs", "clubbing", "party", "partying"),
+    "shopping": ("shopping", "markets", "boutiques"),
+    "beaches": ("beach", "beaches", "islands"),
+    "architecture": ("architecture", "temples", "cathedrals"),
+    "relaxation": ("relax", "relaxing", "relaxation", "spa", "wellness"),
+    "adventure": ("adventure", "adventurous", "adrenaline"),
+    "photography": ("photography", "photos"),
+    "music": ("music", "concerts", "live music"),
+    "wine": ("wine", "wineries", "vineyards"),
+}
+
+ACTIVITIES = {
+    "hiking": ("hike", "hiking", "trek", "trekking"),
+    "snorkeling": ("snorkel", "snorkeling", "snorkelling"),
+    "scuba diving": ("diving", "scuba"),
+    "skiing": ("ski", "skiing", "snowboarding"),
+    "surfing": ("surf", "surfing"),
+    "cycling": ("cycling", "biking", "bike tour"),
+    "kayaking": ("kayak", "kayaking", "canoeing", "rafting"),
+    "sightseeing": ("sightseeing", "sights", "landmarks"),
+    "cooking class": ("cooking class", "cooking classes"),
+    "wine tasting": ("wine tasting",),
+    "camping": ("camping", "camp"),
+    "safari": ("safari",),
+    "road trip": ("road trip", "drive around"),
+}
+
+_NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14,
+    "fifteen": 15, "twenty": 20, "thirty": 30, "couple of": 2, "few": 3,
+}
+# Number words must be whole words ("a" in "Kerala day trips" is not one); digits may touch the unit ("10days").
+_NUMBER = r"\b(\d+|(?:" + "|".join(sorted(_NUMBER_WORDS, key=len, reverse=True)) + r")\b)"
+_DURATION = re.compile(_NUMBER + r"[\s-]*(day|night|week|month)s?\b", re.I)
+_CURRENCY = r"(?:\$|€|£|₹|usd|eur|gbp|inr)"
+_AMOUNT = r"(\d[\d,]*(?:\.\d+)?)\s*(k\b)?"
+_BUDGET = (
+    re.compile(_CURRENCY + r"\s*" + _AMOUNT, re.I),
+    re.compile(_AMOUNT + r"\s*(?:usd|dollars|bucks|eur|euros|gbp|pounds|inr|rupees)\b", re.I),
+    re.compile(r"budget\s+(?:of|is|around|about|under|:)?\s*" + _AMOUNT, re.I),
+)
+# A negation rules out the interests after it, up to the end of its clause ("no clubs, but great food").
+_NEGATION = re.compile(r"\b(?:not|no|without|avoid|avoiding|skip|skipping|never|don['’]?t|do not)\b", re.I)
+_CLAUSE_END = re.compile(r"[,.;:!?]|\b(?:but|though|except)\b", re.I)
+# Capitalised place after a travel verb, for destinations missing from the gazetteer.
+_PLACE = re.compile(r"\b(?:to|in|visit|visiting|around|explore|exploring)\s+((?:[A-Z][\w'-]+)(?:\s+[A-Z][\w'-]+)*)")
+
+_gazetteer = None
+
+
+def _phrase_pattern(phrases) -> re.Pattern:
+    alternatives = "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternatives})s?\b", re.I)
+
+
+def _get_gazetteer() -> dict:
+    """lower-cased name -> display name, including any names from TRIP_GAZETTEER_PATH."""
+    global _gazetteer
+    if _gazetteer is None:
+        names = list(DESTINATIONS)
+        path = os.getenv("TRIP_GAZETTEER_PATH")
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                names += [line.strip() for line in f if line.strip()]
+        _gazetteer = {name.lower(): name for name in names}
+    return _gazetteer
+
+
+def _negated_spans(text: str) -> list[tuple[int, int]]:
+    """(start, end) of each stretch of text following a negation, up to the end of its clause."""
+    spans = []
+    for match in _NEGATION.finditer(text):
+        end = _CLAUSE_END.search(text, match.end())
+        spans.append((match.end(), end.start() if end else len(text)))
+    return spans
+
+
+def _match_vocabulary(text: str, vocabulary: dict, negated=()) -> tuple[list[str], list[str]]:
+    """Entries the text asks for, and those it only mentions inside a `negated` span."""
+    wanted, excluded = [], []
+    for name, phrases in vocabulary.items():
+        starts = [match.start() for match in _phrase_pattern(phrases).finditer(text)]
+        if not starts:
+            continue
+        if all(any(start <= at < end for start, end in negated) for at in starts):
+            excluded.append(name)
+        else:
+            wanted.append(name)
+    return wanted, excluded
+
+
+def _durations(text: str) -> list[int]:
+    """Every trip length mentioned, in days, in order of appearance."""
+    days = []
+    for match in _DURATION.finditer(text):
+        raw, unit = match.group(1).lower(), match.group(2).lower()
+        count = int(raw) if raw.isdigit() else _NUMBER_WORDS[raw]
+        days.append(count * {"day": 1, "night": 1, "week": 7, "month": 30}[unit])
+    return days
+
+
+def parse_days(text: str) -> int | None:
+    durations = _durations(text)
+    if not durations:
+        return 2 if re.search(r"\bweekend\b", text, re.I) else None
+    return durations[0]
+
+
+def parse_budget(text: str) -> float | None:
+    for pattern in _BUDGET:
+        match = pattern.search(text)
+        if match:
+            amount = float(match.group(1).replace(",", ""))
+            return amount * 1000 if match.group(2) else amount
+    return None
+
+
+def parse_destination(text: str) -> tuple[str | None, float]:
+    """Best destination guess and how sure we are of it."""
+    gazetteer = _get_gazetteer()
+    lowered = text.lower()
+    found = [name for key, name in gazetteer.items() if re.search(rf"\b{re.escape(key)}\b", lowered)]
+    # Drop names contained in longer matches ("York" in "New York").
+    found = [name for name in found if not any(name != other and name in other for other in found)]
+    if len(found) == 1:
+        return found[0], 1.0
+    if len(found) > 1:
+        # Multi-stop trips are left to the LLM.
+        return ", ".join(found), 0.4
+
+    match = _PLACE.search(text)
+    if match:
+        return match.group(1), 0.6
+    return None, 0.0
+
+
+def parse_trip_request(user_question: str) -> tuple[Triprequest | None, float]:
+    """Extract a Triprequest with regexes and lookups only.
+
+    Returns the request (None when no destination or duration was found) and
+    a confidence in [0, 1]: how much the destination and duration can be
+    trusted, lowered when the question names interests we do not recognise,
+    rules some out, or gives several different trip lengths. Ruled-out
+    interests are left out of the request.
+    """
+    text = user_question or ""
+    destination, confidence = parse_destination(text)
+    days = parse_days(text)
+    if destination is None or days is None:
+        return None, 0.0
+
+    if len(set(_durations(text))) > 1:
+        # "2 weeks, 3 days of it in Kyoto": which one is the trip is for the LLM to decide.
+        confidence = min(confidence, 0.5)
+
+    negated = _negated_spans(text)
+    interests, excluded_interests = _match_vocabulary(text, INTERESTS, negated)
+    activities, excluded_activities = _match_vocabulary(text, ACTIVITIES, negated)
+    if excluded_interests or excluded_activities:
+        # "not interested in nightlife": the request has no field for exclusions, so the LLM takes it.
+        confidence = min(confidence, 0.5)
+    if re.search(r"\b(?:interested in|into|love|like|enjoy)\b", text, re.I) and not (interests or activities):
+        confidence = min(confidence, 0.6)
+
+    trip_request = Triprequest(
+        destination=destination,
+        days=days,
+        budget=parse_budget(text),
+        interests=interests,
+        activities=activities,
+    )
+    return trip_request, confidence
+
+
+def enabled() -> bool:
+    return env_flag("TRIP_PARSER_ENABLED")
+
+
+def min_confidence() -> float:
+    return float(os.getenv("TRIP_PARSER_MIN_CONFIDENCE", "0.8"))
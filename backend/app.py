@@ -1,21 +1,152 @@
-from fastapi import FastAPI
+import os
+import json
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from backend.nodes.graph import build_graph
+from backend.utils.helpers import initial_state, env_flag
+from backend.utils.deadline import run_deadlines
+from backend.data_sources import search_cache, rate_limit, snapshot_index
+from backend.agent.llm_cache import get_llm_cache
+from backend.agent import answer_cache, destination_kb, trip_parser
+from backend.utils.singleflight import SingleFlight
+from backend.utils import metrics
+from backend.jobs.store import get_job_store
+from backend.jobs.runner import JobQueueFull, runner_from_env, submit_job
+from backend.jobs.batch import run_batch
+from backend.jobs.refresher import refresher_from_env
+from backend.nodes import checkpoints
 from fastapi.middleware.cors import CORSMiddleware
 
-app=FastAPI(title="AI Travel Planner")
-graph = build_graph() 
+# The graph (and with it langgraph and the model SDKs) is imported on first
+# use, so the app boots fast and readiness does not wait on it.
+_graph = None
+job_runner = runner_from_env()
+destination_refresher = refresher_from_env()
+ask_flight = SingleFlight()
+
+
+def _load_graph():
+    from backend.nodes.graph import get_graph
+
+    return get_graph()
+
+
+async def get_graph():
+    """The compiled graph, imported and built off the event loop the first time."""
+    global _graph
+    if _graph is None:
+        _graph = await asyncio.to_thread(_load_graph)
+    return _graph
+
+
+def _warm_up():
+    from backend.agent.models import get_chat_model
+    from backend.agent.compaction import load_tokenizer
+
+    try:
+        _load_graph()
+        get_chat_model()
+        load_tokenizer()
+        print("🔥 Graph and chat model ready")
+    except Exception as e:
+        print(f"⚠️ Warm-up failed, loading on first request instead: {e}")
+
+
+def _warm_up_enabled() -> bool:
+    return env_flag("WARM_UP_ON_STARTUP")
+
+
+def _refresh_enabled() -> bool:
+    """Run the destination refresher inside the API (off when it runs as its own process)."""
+    return env_flag("DESTINATION_KB_REFRESH_IN_API")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up = asyncio.create_task(asyncio.to_thread(_warm_up)) if _warm_up_enabled() else None
+    if job_runner.workers:
+        await job_runner.start()
+    if destination_refresher.destinations and _refresh_enabled():
+        await destination_refresher.start()
+    yield
+    await destination_refresher.stop()
+    await job_runner.stop()
+    if warm_up is not None:
+        await asyncio.gather(warm_up, return_exceptions=True)
+
+
+app=FastAPI(title="AI Travel Planner", lifespan=lifespan)
+
 class Userquery(BaseModel):
     user_question:str
+    synthesis_timeout:float|None=None
+    time_budget:float|None=None
+    max_cache_age:float|None=None
+    run_id:str|None=None
 
 class AnswerResponse(BaseModel):
     final_answer:str
+    run_id:str|None=None
+    # Research steps the deadline dropped; non-empty means the plan is partial.
+    skipped_steps:list[str]=[]
+
+class BatchQuery(BaseModel):
+    queries:list[Userquery]
+
+class BatchAnswer(BaseModel):
+    user_question:str
+    run_id:str|None=None
+    final_answer:str|None=None
+    skipped_steps:list[str]=[]
+    error:str|None=None
+
+class BatchResponse(BaseModel):
+    answers:list[BatchAnswer]
+
+class JobResponse(BaseModel):
+    job_id:str
+    status:str
+    state:dict|None=None
+    error:str|None=None
 
 
 @app.get("/")
 def read_root():
     return {"message": "AI Travel Planner API is running. Use POST /ask to query."}
 
+@app.get("/cache/stats")
+def cache_stats():
+    llm_cache = get_llm_cache()
+    return {
+        "search": search_cache.stats(),
+        "llm": llm_cache.stats() if llm_cache else {"enabled": False},
+        "answers": answer_cache.get_answer_cache().stats() if answer_cache.enabled() else {"enabled": False},
+        "snapshots": snapshot_index.stats(),
+        "destinations": destination_kb.stats(),
+        "ask": {"in_flight": ask_flight.in_flight()},
+    }
+
+@app.get("/limits")
+def upstream_limits():
+    return rate_limit.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/traces")
+def list_traces(limit:int=20):
+    return {"traces": metrics.recent_traces(limit)}
+
+@app.get("/traces/{trace_id}")
+def get_trace(trace_id:str):
+    found = metrics.get_trace(trace_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired trace id")
+    return found
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # For dev, allow all origins. Later restrict to your domain
@@ -25,23 +156,180 @@ app.add_middleware(
 )
 
 
+def _coalescing_enabled() -> bool:
+    return env_flag("ASK_COALESCING_ENABLED")
+
+
+def _plan_key(query: Userquery) -> str:
+    """Identical plans share a key: by Triprequest when the question parses locally, else by question text."""
+    trip_request, confidence = trip_parser.parse_trip_request(query.user_question) if trip_parser.enabled() else (None, 0.0)
+    if trip_request is not None and confidence >= trip_parser.min_confidence():
+        subject = "trip:" + answer_cache.trip_key(trip_request)
+    else:
+        subject = "question:" + search_cache.normalize_query(query.user_question)
+    return "|".join([subject, str(query.synthesis_timeout), str(query.time_budget), str(query.max_cache_age), str(query.run_id)])
+
+
+def _check_backpressure():
+    """Refuse new interactive work with 429 while an upstream's queue is full."""
+    retry_after = rate_limit.backpressure()
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="Upstream services are saturated, retry later",
+            headers={"Retry-After": str(int(retry_after + 0.999))},
+        )
+
+
 @app.post("/ask",response_model=AnswerResponse)
-def ask_question(query:Userquery):
-    state = {
-        "messages": [{"role": "user", "content": query.user_question}],
-        "user_question": query.user_question,
-        "trip_request": None,
-        "google_results": None,
-        "bing_results": None,
-        "reddit_results": None,
-        "selected_reddit_urls": None,
-        "reddit_post_data": None,
-        "google_analysis": None,
-        "bing_analysis": None,
-        "reddit_analysis": None,
-        "final_answer": None
-    }
+async def ask_question(query:Userquery, response:Response):
+    _check_backpressure()
+    # Retrying with the run_id of a failed request resumes it from its last completed node.
+    run_id = query.run_id or checkpoints.new_run_id()
+
+    async def run_plan():
+        state = initial_state(query.user_question, query.synthesis_timeout, query.time_budget, query.max_cache_age)
+        graph = await get_graph()
+        final_state = await checkpoints.ainvoke_plan(graph, state, run_id)
+        return {"final_answer": final_state.get("final_answer"), "run_id": run_id,
+                "skipped_steps": final_state.get("skipped_steps") or []}
+
+    with metrics.trace("ask") as trace:
+        response.headers["X-Trace-Id"] = trace.trace_id
+        try:
+            # Concurrent identical questions await a single graph run and share its answer.
+            if _coalescing_enabled():
+                result = await ask_flight.ado(_plan_key(query), run_plan)
+            else:
+                result = await run_plan()
+        except rate_limit.Overloaded as e:
+            # A coalesced caller reports the shared run, the one that was checkpointed.
+            run_id = checkpoints.failed_run(e, run_id)
+            print(f"🚦 Plan {run_id} refused: {e}")
+            raise HTTPException(
+                status_code=429,
+                detail={"error": str(e), "run_id": run_id},
+                headers={"X-Trace-Id": trace.trace_id, "X-Run-Id": run_id,
+                         "Retry-After": str(int(e.retry_after + 0.999))},
+            )
+        except Exception as e:
+            run_id = checkpoints.failed_run(e, run_id)
+            print(f"❌ Plan {run_id} failed: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail={"error": str(e), "run_id": run_id},
+                headers={"X-Trace-Id": trace.trace_id, "X-Run-Id": run_id},
+            )
+
+    response.headers["X-Run-Id"] = result["run_id"]
+    return result
+
+
+@app.post("/ask/batch",response_model=BatchResponse)
+async def ask_batch(batch:BatchQuery):
+    max_queries = int(os.getenv("ASK_BATCH_MAX_QUERIES", "200"))
+    if len(batch.queries) > max_queries:
+        raise HTTPException(status_code=413, detail=f"At most {max_queries} queries per batch")
+
+    answers = await run_batch(await get_graph(), [query.model_dump() for query in batch.queries])
+    return {"answers": answers}
+
+
+@app.get("/runs/{run_id}")
+async def get_run(run_id:str):
+    graph = await get_graph()
+    snapshot = await graph.aget_state(checkpoints.run_config(run_id)) if graph.checkpointer is not None else None
+    if snapshot is None or snapshot.created_at is None:
+        raise HTTPException(status_code=404, detail="Unknown, finished or expired run id")
+    return {"run_id": run_id, "next": list(snapshot.next), "updated_at": snapshot.created_at}
+
+
+@app.post("/plans",response_model=JobResponse,status_code=202)
+async def submit_plan(query:Userquery):
+    options = query.model_dump(exclude={"user_question"}, exclude_none=True)
+    try:
+        job_id = await asyncio.to_thread(submit_job, get_job_store(), query.user_question, None, options)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    job_runner.notify()
+    return {"job_id": job_id, "status": "queued"}
+
+
+@app.get("/plans/{job_id}",response_model=JobResponse)
+def get_plan(job_id:str):
+    job = get_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown plan id")
+    return {"job_id": job["id"], "status": job["status"], "state": job["state"], "error": job["error"]}
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_plan(user_question: str, synthesis_timeout: float | None = None,
+                       time_budget: float | None = None, max_cache_age: float | None = None,
+                       heartbeat: float = 15.0, run_id: str | None = None):
+    """Yield SSE frames: one `node` per finished node, `token` chunks of the synthesis, then `final`."""
+    graph = await get_graph()
+    from backend.nodes.graph import BRANCHES
+
+    run_id = run_id or checkpoints.new_run_id()
+    state = initial_state(user_question, synthesis_timeout, time_budget, max_cache_age)
+    with metrics.trace("ask_stream") as trace, run_deadlines(state):
+        stream = graph.astream(
+            await checkpoints.arun_input(graph, run_id, state), checkpoints.run_config(run_id),
+            stream_mode=["updates", "messages"], subgraphs=True
+        ).__aiter__()
+        final_answer = None
+        skipped_steps = {}
+        pending = asyncio.ensure_future(stream.__anext__())
+        try:
+            while True:
+                done, _ = await asyncio.wait({pending}, timeout=heartbeat)
+                if not done:
+                    # Comment frame keeps proxies and load balancers from closing the idle connection.
+                    yield ": keep-alive\n\n"
+                    continue
+                try:
+                    _, mode, chunk = pending.result()
+                except StopAsyncIteration:
+                    break
+                pending = asyncio.ensure_future(stream.__anext__())
+
+                if mode == "updates":
+                    for node, update in chunk.items():
+                        skipped_steps.update(dict.fromkeys((update or {}).get("skipped_steps") or []))
+                        if node in BRANCHES:
+                            continue
+                        if update and update.get("final_answer"):
+                            final_answer = update["final_answer"]
+                        yield _sse("node", {"node": node})
+                elif mode == "messages":
+                    message, metadata = chunk
+                    if metadata.get("langgraph_node") == "synthesize_analyses" and message.content:
+                        yield _sse("token", {"content": message.content})
+        except Exception as e:
+            error = {"detail": str(e), "trace_id": trace.trace_id, "run_id": run_id}
+            if isinstance(e, rate_limit.Overloaded):
+                error["retry_after"] = e.retry_after
+            yield _sse("error", error)
+            return
+        finally:
+            if not pending.done():
+                pending.cancel()
+
+        await checkpoints.afinish_run(graph, run_id)
+        yield _sse("final", {"final_answer": final_answer, "skipped_steps": list(skipped_steps),
+                             "trace_id": trace.trace_id, "run_id": run_id})
 
-    final_state=graph.invoke(state)
 
-    return {"final_answer":final_state.get("final_answer")}
+@app.post("/ask/stream")
+async def ask_question_stream(query:Userquery):
+    _check_backpressure()
+    return StreamingResponse(
+        _stream_plan(query.user_question, query.synthesis_timeout, query.time_budget, query.max_cache_age,
+                     run_id=query.run_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,307 @@
+import os
+import random
+import asyncio
+import threading
+import weakref
+from contextlib import asynccontextmanager
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urlsplit
+from backend.utils import metrics
+from backend.data_sources import rate_limit
+from backend.utils.deadline import clamp_timeout, current_deadline, seconds_left
+
+# Transient upstream responses that are worth retrying with backoff.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+# httpx pools are bound to the event loop that created them.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def default_timeout() -> tuple[float, float]:
+    """(connect, read) timeout applied to every Bright Data call."""
+    return (
+        _env_float("BRIGHTDATA_CONNECT_TIMEOUT", 5.0),
+        _env_float("BRIGHTDATA_READ_TIMEOUT", 60.0),
+    )
+
+
+def is_retryable(method: str, status: int) -> bool:
+    """Whether a response status is worth retrying for `method`.
+
+    POSTs are retried only on 429, which means the request was refused: a
+    5xx on a dataset trigger may already have created a billed snapshot.
+    """
+    if status not in RETRY_STATUSES:
+        return False
+    return method.upper() != "POST" or status == 429
+
+
+def max_retry_wait() -> float:
+    """Longest Retry-After honoured: BRIGHTDATA_BACKOFF_MAX, or less when the request deadline is nearer."""
+    limit = _env_float("BRIGHTDATA_BACKOFF_MAX", 10.0)
+    remaining = seconds_left(current_deadline())
+    return limit if remaining is None else min(limit, remaining)
+
+
+def retry_after_wait(retry_after: float) -> float:
+    """`retry_after`, or Overloaded when that is longer than max_retry_wait(): the caller backs off instead."""
+    if retry_after > max_retry_wait():
+        raise rate_limit.Overloaded(f"Bright Data asked to retry in {retry_after:.0f}s", retry_after=retry_after)
+    return retry_after
+
+
+class _Retry(Retry):
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if not is_retryable(method, status_code):
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def get_retry_after(self, response):
+        # urllib3 would otherwise sleep for whatever the server asks.
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else retry_after_wait(retry_after)
+
+
+def _build_retry() -> Retry:
+    # Connect errors are retried for every method; nothing reached the server.
+    return _Retry(
+        total=_env_int("BRIGHTDATA_MAX_RETRIES", 3),
+        connect=_env_int("BRIGHTDATA_MAX_RETRIES", 3),
+        read=0,
+        status=_env_int("BRIGHTDATA_MAX_RETRIES", 3),
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "POST"}),
+        backoff_factor=_env_float("BRIGHTDATA_BACKOFF_FACTOR", 0.5),
+        backoff_jitter=_env_float("BRIGHTDATA_BACKOFF_JITTER", 0.5),
+        backoff_max=_env_float("BRIGHTDATA_BACKOFF_MAX", 10.0),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=_env_int("BRIGHTDATA_POOL_HOSTS", 4),
+        pool_maxsize=_env_int("BRIGHTDATA_POOL_SIZE", 32),
+        max_retries=_build_retry(),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled, keep-alive session."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def api_url(path: str) -> str:
+    """Absolute Bright Data API URL; BRIGHTDATA_API_BASE points it elsewhere (e.g. a local replay server)."""
+    base = os.getenv("BRIGHTDATA_API_BASE", "https://api.brightdata.com")
+    return f"{base.rstrip('/')}/{path.lstrip('/')}"
+
+
+def brightdata_headers(json_body: bool = False) -> dict:
+    api_key = os.getenv("BRIGHTDATA_API_KEY")
+    headers = {"Authorization": f"Bearer {api_key}"}
+    if json_body:
+        headers["Content-Type"] = "application/json"
+    return headers
+
+
+def operation_for(url: str) -> str:
+    """Metric label for a Bright Data endpoint: serp, trigger, progress or snapshot."""
+    path = urlsplit(url).path
+    for operation in ("trigger", "progress", "snapshot"):
+        if f"/datasets/v3/{operation}" in path:
+            return operation
+    return "serp" if path.rstrip("/").endswith("/request") else "other"
+
+
+def _record_response(operation: str, response, attrs: dict, streamed: bool = False):
+    attrs["status"] = response.status_code
+    if response.status_code >= 400:
+        metrics.BRIGHTDATA_ERRORS.inc(operation=operation, reason=str(response.status_code))
+    if not streamed:
+        size = len(response.content)
+        attrs["bytes"] = size
+        metrics.BRIGHTDATA_BYTES.inc(size, operation=operation)
+
+
+def request(method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+    """Send a request through the shared session with a connect/read timeout.
+
+    The call first waits its turn in the operation's rate limiter. Both
+    timeouts are shrunk to the time left before the request deadline.
+    """
+    operation = operation_for(url)
+    with rate_limit.limited(operation):
+        connect, read = timeout if timeout is not None else default_timeout()
+        timeout = (clamp_timeout(connect), clamp_timeout(read))
+        return _send(method, url, operation, timeout, **kwargs)
+
+
+def _send(method: str, url: str, operation: str, timeout, **kwargs) -> requests.Response:
+    with metrics.span(f"brightdata:{operation}", metric=metrics.BRIGHTDATA_SECONDS,
+                      labels={"operation": operation}) as attrs:
+        try:
+            response = get_session().request(method, url, timeout=timeout, **kwargs)
+        except Exception as e:
+            metrics.BRIGHTDATA_ERRORS.inc(operation=operation, reason=type(e).__name__)
+            raise
+        _record_response(operation, response, attrs, streamed=kwargs.get("stream", False))
+        return response
+
+
+def close_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _build_async_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=_env_int("BRIGHTDATA_POOL_HOSTS", 4) * _env_int("BRIGHTDATA_POOL_SIZE", 32),
+        max_keepalive_connections=_env_int("BRIGHTDATA_POOL_SIZE", 32),
+    )
+    transport = httpx.AsyncHTTPTransport(retries=_env_int("BRIGHTDATA_MAX_RETRIES", 3))
+    return httpx.AsyncClient(limits=limits, transport=transport)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the pooled async client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = _build_async_client()
+        _async_clients[loop] = client
+    return client
+
+
+def retry_after_seconds(retry_after: str | None, default: float = 1.0) -> float:
+    """Seconds from a Retry-After header (delta-seconds form), else `default`."""
+    try:
+        return max(float(retry_after), 0.0) if retry_after else default
+    except ValueError:
+        return default
+
+
+def _backoff_delay(attempt: int, retry_after: str | None = None) -> float | None:
+    """Seconds before the next attempt; None when the server asks for more than max_retry_wait()."""
+    if retry_after:
+        delay = retry_after_seconds(retry_after)
+        return delay if delay <= max_retry_wait() else None
+    delay = _env_float("BRIGHTDATA_BACKOFF_FACTOR", 0.5) * (2 ** attempt)
+    delay += random.uniform(0, _env_float("BRIGHTDATA_BACKOFF_JITTER", 0.5))
+    return min(delay, _env_float("BRIGHTDATA_BACKOFF_MAX", 10.0))
+
+
+def _retry_delay(method: str, response, attempt: int, retries: int) -> float | None:
+    """Seconds to wait before retrying `response`; None to return it as it is."""
+    if not is_retryable(method, response.status_code) or attempt == retries:
+        return None
+    return _backoff_delay(attempt, response.headers.get("Retry-After"))
+
+
+async def arequest(method: str, url: str, timeout=None, **kwargs) -> httpx.Response:
+    """Async counterpart of request() with the same rate limit, timeout and retry policy."""
+    operation = operation_for(url)
+    async with rate_limit.alimited(operation):
+        return await _asend(method, url, operation, timeout, **kwargs)
+
+
+async def _asend(method: str, url: str, operation: str, timeout=None, **kwargs) -> httpx.Response:
+    connect, read = timeout if timeout is not None else default_timeout()
+    connect, read = clamp_timeout(connect), clamp_timeout(read)
+    client = get_async_client()
+    retries = _env_int("BRIGHTDATA_MAX_RETRIES", 3)
+
+    with metrics.span(f"brightdata:{operation}", metric=metrics.BRIGHTDATA_SECONDS,
+                      labels={"operation": operation}) as attrs:
+        for attempt in range(retries + 1):
+            try:
+                response = await client.request(
+                    method, url, timeout=httpx.Timeout(read, connect=connect), **kwargs
+                )
+            except Exception as e:
+                metrics.BRIGHTDATA_ERRORS.inc(operation=operation, reason=type(e).__name__)
+                raise
+            delay = _retry_delay(method, response, attempt, retries)
+            if delay is None:
+                _record_response(operation, response, attrs)
+                attrs["attempts"] = attempt + 1
+                return response
+            metrics.SLEEP_SECONDS.inc(delay, reason="retry_backoff")
+            await asyncio.sleep(delay)
+    return response
+
+
+@asynccontextmanager
+async def astream(method: str, url: str, timeout=None, **kwargs):
+    """Like arequest(), but yields the response before its body is read.
+
+    Iterate `response.aiter_bytes()` inside the block; the connection goes
+    back to the pool when the block exits. The span covers the whole read.
+    """
+    connect, read = timeout if timeout is not None else default_timeout()
+    connect, read = clamp_timeout(connect), clamp_timeout(read)
+    client = get_async_client()
+    retries = _env_int("BRIGHTDATA_MAX_RETRIES", 3)
+    operation = operation_for(url)
+
+    with metrics.span(f"brightdata:{operation}", metric=metrics.BRIGHTDATA_SECONDS,
+                      labels={"operation": operation}) as attrs:
+        for attempt in range(retries + 1):
+            request = client.build_request(method, url, timeout=httpx.Timeout(read, connect=connect), **kwargs)
+            try:
+                response = await client.send(request, stream=True)
+            except Exception as e:
+                metrics.BRIGHTDATA_ERRORS.inc(operation=operation, reason=type(e).__name__)
+                raise
+            delay = _retry_delay(method, response, attempt, retries)
+            if delay is None:
+                break
+            await response.aclose()
+            metrics.SLEEP_SECONDS.inc(delay, reason="retry_backoff")
+            await asyncio.sleep(delay)
+
+        _record_response(operation, response, attrs, streamed=True)
+        attrs["attempts"] = attempt + 1
+        try:
+            yield response
+        finally:
+            await response.aclose()
+
+
+async def aclose_client():
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,333 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager, asynccontextmanager
+from backend.utils import metrics
+from backend.utils.deadline import DeadlineExceeded, current_deadline, seconds_left
+
+# Priority classes: interactive calls (/ask, /ask/stream) are always admitted
+# before queued batch calls (/ask/batch, batch jobs, background plans).
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = {INTERACTIVE: 0, BATCH: 1}
+
+# Upstreams with their own limiter. Bright Data operations map to these by
+# name (see http_client.operation_for); "llm" is metered in tokens.
+UPSTREAMS = ("serp", "trigger", "progress", "llm")
+
+_DEFAULTS = {
+    # (rate per second, burst, max in flight)
+    "serp": (10.0, 20.0, 16),
+    "trigger": (2.0, 10.0, 0),
+    "progress": (10.0, 20.0, 0),
+}
+
+_priority = contextvars.ContextVar("call_priority", default=INTERACTIVE)
+
+
+class Overloaded(Exception):
+    """An upstream refused work (HTTP 429 after retries); retry after `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@contextmanager
+def priority(name: str):
+    """Run the calls made inside the block with priority class `name`."""
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+def max_queue() -> int:
+    return int(os.getenv("RATE_LIMIT_MAX_QUEUE", "500"))
+
+
+def max_wait() -> float:
+    return float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "30"))
+
+
+class _Waiter:
+    __slots__ = ("rank", "priority", "cost", "event", "loop")
+
+    def __init__(self, rank: int, priority: str, cost: float, loop=None):
+        self.rank = rank
+        self.priority = priority
+        self.cost = cost
+        self.loop = loop
+        self.event = asyncio.Event() if loop is not None else threading.Event()
+
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
+            return
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            pass  # the waiting loop is gone
+
+
+class RateLimiter:
+    """Priority queue in front of one upstream: a token bucket plus a cap on calls in flight.
+
+    Calls are admitted at `rate` cost units per second with bursts of up to
+    `burst`, at most `max_concurrency` at once, strictly by priority class
+    and then in arrival order. Threads and event loops of the process share
+    the same queue. A call that cannot start before the request deadline
+    raises DeadlineExceeded. Calls of plans already running always queue, so
+    admitted work finishes; new interactive work is refused at the API
+    (backpressure()) while the queue is longer than `max_queue` or the wait
+    longer than `max_wait`.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float | None = None, max_concurrency: int | None = None,
+                 max_queue: int | None = None, max_wait: float | None = None):
+        self.name = name
+        self.rate = rate
+        self.burst = max(burst or rate, 1.0)
+        self.max_concurrency = max_concurrency or None
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._queue: list[tuple[int, int, _Waiter]] = []
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+
+    # Called with the lock held.
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _estimated_wait(self, rank: int, cost: float) -> float:
+        if not self.rate:
+            return 0.0
+        ahead = sum(w.cost for r, _, w in self._queue if r <= rank)
+        return max((ahead + cost - self._tokens) / self.rate, 0.0)
+
+    def _wake_head(self):
+        if self._queue:
+            self._queue[0][2].wake()
+
+    def _try_admit(self, waiter: _Waiter) -> tuple[bool, float | None]:
+        """(admitted, seconds to sleep before trying again; None until woken)."""
+        if self._queue[0][2] is not waiter:
+            return False, None
+        if self.max_concurrency and self.in_flight >= self.max_concurrency:
+            return False, None
+        self._refill()
+        # A call costing more than the bucket holds goes through once it is full.
+        cost = min(waiter.cost, self.burst)
+        if self.rate and self._tokens < cost:
+            return False, (cost - self._tokens) / self.rate
+        if self.rate:
+            self._tokens -= cost
+        self.in_flight += 1
+        heapq.heappop(self._queue)
+        self._wake_head()
+        return True, 0.0
+
+    # Queueing
+
+    def _enqueue(self, cost: float, loop=None) -> _Waiter:
+        name = current_priority()
+        waiter = _Waiter(PRIORITIES.get(name, 0), name, cost, loop)
+        with self._lock:
+            heapq.heappush(self._queue, (waiter.rank, next(self._order), waiter))
+        return waiter
+
+    def _abandon(self, waiter: _Waiter):
+        with self._lock:
+            for i, (_, _, queued) in enumerate(self._queue):
+                if queued is waiter:
+                    self._queue.pop(i)
+                    heapq.heapify(self._queue)
+                    self._wake_head()
+                    break
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._wake_head()
+
+    def _sleep_for(self, sleep: float | None) -> float | None:
+        """How long a waiter may block, failing when the request deadline comes first."""
+        remaining = seconds_left(current_deadline())
+        if remaining is None:
+            return sleep
+        if remaining <= 0 or (sleep is not None and sleep >= remaining):
+            raise DeadlineExceeded(f"{self.name} call could not start before the request deadline")
+        return remaining if sleep is None else sleep
+
+    def _admitted(self, waiter: _Waiter, started: float):
+        waited = time.monotonic() - started
+        metrics.RATE_LIMIT_WAIT_SECONDS.observe(waited, upstream=self.name, priority=waiter.priority)
+        if waited > 0.001:
+            metrics.SLEEP_SECONDS.inc(waited, reason="rate_limit")
+
+    def acquire(self, cost: float = 1.0):
+        started = time.monotonic()
+        waiter = self._enqueue(cost)
+        try:
+            while True:
+                waiter.event.clear()
+                with self._lock:
+                    admitted, sleep = self._try_admit(waiter)
+                if admitted:
+                    self._admitted(waiter, started)
+                    return
+                waiter.event.wait(self._sleep_for(sleep))
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    async def aacquire(self, cost: float = 1.0):
+        started = time.monotonic()
+        waiter = self._enqueue(cost, loop=asyncio.get_running_loop())
+        try:
+            while True:
+                waiter.event.clear()
+                with self._lock:
+                    admitted, sleep = self._try_admit(waiter)
+                if admitted:
+                    self._admitted(waiter, started)
+                    return
+                # Outside the try: DeadlineExceeded is a TimeoutError too.
+                timeout = self._sleep_for(sleep)
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    def settle(self, estimated: float, actual: float):
+        """Correct the bucket once a call's real cost is known (e.g. LLM tokens used)."""
+        if not self.rate:
+            return
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + estimated - actual)
+
+    @contextmanager
+    def limit(self, cost: float = 1.0):
+        """Hold one call slot for the block, after waiting for its turn and `cost` tokens."""
+        self.acquire(cost)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def alimit(self, cost: float = 1.0):
+        """Async limit()."""
+        await self.aacquire(cost)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def backpressure(self) -> float | None:
+        """Seconds new interactive work should back off, or None when there is room for it."""
+        with self._lock:
+            self._refill()
+            rank = PRIORITIES[INTERACTIVE]
+            estimated = self._estimated_wait(rank, 1.0)
+            queued = sum(1 for r, _, _ in self._queue if r <= rank)
+            if (self.max_queue and queued >= self.max_queue) or (self.max_wait and estimated > self.max_wait):
+                metrics.RATE_LIMIT_REJECTIONS.inc(upstream=self.name)
+                return max(estimated, 1.0)
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refill()
+            queued = {name: sum(1 for r, _, _ in self._queue if r == rank) for name, rank in PRIORITIES.items()}
+            return {
+                "rate_per_second": self.rate,
+                "burst": self.burst,
+                "tokens": round(self._tokens, 2),
+                "in_flight": self.in_flight,
+                "max_concurrency": self.max_concurrency,
+                "queued": queued,
+            }
+
+
+def _settings(name: str) -> dict:
+    if name == "llm":
+        # Provider limits are per minute; the bucket holds one minute's worth.
+        per_minute = float(os.getenv("LLM_TOKENS_PER_MINUTE", "400000"))
+        return {"rate": per_minute / 60, "burst": per_minute,
+                "max_concurrency": int(os.getenv("LLM_MAX_CONCURRENCY", "32"))}
+    rate, burst, concurrency = _DEFAULTS[name]
+    prefix = name.upper()
+    return {
+        "rate": float(os.getenv(f"{prefix}_RATE_PER_SECOND", rate)),
+        "burst": float(os.getenv(f"{prefix}_BURST", burst)),
+        "max_concurrency": int(os.getenv(f"{prefix}_MAX_CONCURRENCY", concurrency)),
+    }
+
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str) -> RateLimiter | None:
+    """Process-wide limiter for an upstream in UPSTREAMS, or None for anything else."""
+    if name not in UPSTREAMS:
+        return None
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                limiter = RateLimiter(name, **_settings(name), max_queue=max_queue(), max_wait=max_wait())
+                _limiters[name] = limiter
+    return limiter
+
+
+@contextmanager
+def limited(name: str, cost: float = 1.0):
+    """limit() on the upstream's limiter; a no-op for upstreams without one."""
+    limiter = get_limiter(name)
+    if limiter is None:
+        yield
+        return
+    with limiter.limit(cost):
+        yield
+
+
+@asynccontextmanager
+async def alimited(name: str, cost: float = 1.0):
+    limiter = get_limiter(name)
+    if limiter is None:
+        yield
+        return
+    async with limiter.alimit(cost):
+        yield
+
+
+def backpressure() -> float | None:
+    """Largest back-off any upstream asks of new interactive work, or None when all have room."""
+    waits = [w for w in (get_limiter(name).backpressure() for name in UPSTREAMS) if w is not None]
+    return max(waits) if waits else None
+
+
+def stats() -> dict:
+    return {name: get_limiter(name).stats() for name in UPSTREAMS}
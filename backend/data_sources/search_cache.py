@@ -0,0 +1,89 @@
+import os
+import re
+import threading
+import unicodedata
+from backend.utils.cache import SQLiteCache, cache_dir
+from backend.utils.singleflight import SingleFlight
+from backend.utils import metrics
+from backend.utils.helpers import env_flag
+
+_cache = None
+_cache_lock = threading.Lock()
+_flight = SingleFlight()
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a search query so trivially different strings share a cache entry."""
+    query = unicodedata.normalize("NFKC", query or "").lower()
+    query = re.sub(r"\s+", " ", query)
+    query = re.sub(r"\s*([,:;])\s*", r"\1", query)
+    query = re.sub(r",{2,}", ",", query)
+    return query.strip(" ,;:.?!")
+
+
+def cache_key(kind: str, query: str, *params) -> str:
+    return "|".join([kind, normalize_query(query), *(str(p) for p in params)])
+
+
+def enabled() -> bool:
+    return env_flag("SEARCH_CACHE_ENABLED")
+
+
+def get_search_cache() -> SQLiteCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SQLiteCache(
+                    os.path.join(cache_dir(), "search_cache.sqlite3"),
+                    table="search_results",
+                    ttl=float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "86400")),
+                    max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000")),
+                )
+    return _cache
+
+
+def cached_search(key: str, fetch):
+    """Serve `key` from the cache, otherwise run fetch() once for all concurrent callers."""
+    if not enabled():
+        return fetch()
+
+    cache = get_search_cache()
+    cached = cache.get(key)
+    metrics.CACHE_REQUESTS.inc(cache="search", result="miss" if cached is None else "hit")
+    if cached is not None:
+        return cached
+
+    def fetch_and_store():
+        result = fetch()
+        if result is not None:
+            cache.set(key, result)
+        return result
+
+    return _flight.do(key, fetch_and_store)
+
+
+async def acached_search(key: str, afetch):
+    """Async cached_search(); shares in-flight fetches with sync callers."""
+    if not enabled():
+        return await afetch()
+
+    cache = get_search_cache()
+    cached = cache.get(key)
+    metrics.CACHE_REQUESTS.inc(cache="search", result="miss" if cached is None else "hit")
+    if cached is not None:
+        return cached
+
+    async def fetch_and_store():
+        result = await afetch()
+        if result is not None:
+            cache.set(key, result)
+        return result
+
+    return await _flight.ado(key, fetch_and_store)
+
+
+def stats() -> dict:
+    if not enabled():
+        return {"enabled": False}
+    return {"enabled": True, "in_flight": _flight.in_flight(), **get_search_cache().stats()}
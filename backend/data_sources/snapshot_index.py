@@ -0,0 +1,264 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from backend.utils.cache import cache_dir
+from backend.utils import metrics
+from backend.utils.helpers import env_flag
+from backend.data_sources.trigger_batcher import normalize_input
+
+RUNNING, READY = "running", "ready"
+
+# Records written to or read from the spool per round trip.
+PAGE_SIZE = 500
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return env_flag("SNAPSHOT_REUSE_ENABLED")
+
+
+def attach_window() -> float:
+    """How long a triggered snapshot can still be joined; older running ones are presumed stuck."""
+    return float(os.getenv("SNAPSHOT_ATTACH_MAX_AGE_SECONDS", "900"))
+
+
+def input_key(dataset_id: str, item: dict, field: str) -> str:
+    """Index key of one dataset input: the dataset, its keyword or URL, and the other parameters."""
+    value = normalize_input(item.get(field))
+    params = {k: v for k, v in item.items() if k != field}
+    return "|".join([dataset_id, value, json.dumps(params, sort_keys=True, default=str)])
+
+
+class SpoolWriter:
+    """Records of one snapshot download, written to the index as they stream in.
+
+    Rows go out `PAGE_SIZE` at a time and stay invisible to readers until
+    commit(); discard() drops a download that failed or was cut short.
+    """
+
+    def __init__(self, index: "SnapshotIndex", snapshot_id: str):
+        self.index = index
+        self.snapshot_id = snapshot_id
+        self.spool = uuid.uuid4().hex
+        self.records = 0
+        self._rows = []
+
+    def add(self, value: str, record):
+        """Spool `record`, collected for the (normalized) input `value`."""
+        self._rows.append((self.spool, self.records, value, json.dumps(record, default=str), time.time()))
+        self.records += 1
+        if len(self._rows) >= PAGE_SIZE:
+            self._flush()
+
+    def _flush(self):
+        rows, self._rows = self._rows, []
+        if rows:
+            self.index._write_rows(rows)
+
+    def commit(self):
+        self._flush()
+        self.index._commit(self.snapshot_id, self.spool, self.records)
+
+    def discard(self):
+        self._rows = []
+        self.index._drop_spool(self.spool)
+
+
+class SnapshotIndex:
+    """Which snapshot collected each dataset input, and the records it produced.
+
+    `snapshot_inputs` maps an input key to the latest snapshot triggered for
+    it and whether that snapshot is still running. Downloaded snapshots are
+    spooled record by record into `snapshot_records`, tagged with the input
+    each record was collected for, and listed in `snapshot_downloads` once
+    complete; reused inputs are read back page by page, so neither side
+    holds a whole snapshot in memory. Everything lives in one SQLite file,
+    so API replicas and job workers on the same host share it.
+    """
+
+    def __init__(self, path: str, ttl: float | None = None, max_records: int | None = None):
+        self.ttl = ttl
+        self.max_records = max_records
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshot_inputs ("
+            "key TEXT PRIMARY KEY, snapshot_id TEXT NOT NULL, status TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshot_downloads ("
+            "snapshot_id TEXT PRIMARY KEY, spool TEXT NOT NULL, records INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshot_records ("
+            "spool TEXT NOT NULL, seq INTEGER NOT NULL, input TEXT NOT NULL, record TEXT NOT NULL, "
+            "created_at REAL NOT NULL, PRIMARY KEY (spool, seq))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS snapshot_records_created ON snapshot_records(created_at)")
+
+    def lookup(self, key: str, max_age: float) -> tuple[str, str] | None:
+        """(snapshot_id, status) of a snapshot that can be reused for `key`, if any.
+
+        Completed snapshots count within `max_age`, running ones within the
+        attach window.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT snapshot_id, status, updated_at FROM snapshot_inputs WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        snapshot_id, status, updated_at = row
+        window = attach_window() if status == RUNNING else max_age
+        return (snapshot_id, status) if time.time() - updated_at <= window else None
+
+    def mark(self, keys: list[str], snapshot_id: str, status: str):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO snapshot_inputs (key, snapshot_id, status, updated_at) VALUES (?, ?, ?, ?)",
+                [(key, snapshot_id, status, now) for key in keys],
+            )
+
+    def forget(self, snapshot_id: str):
+        """Drop a snapshot that failed, so its inputs are collected again."""
+        with self._lock:
+            self._conn.execute("DELETE FROM snapshot_inputs WHERE snapshot_id = ?", (snapshot_id,))
+
+    def spool(self, snapshot_id: str) -> SpoolWriter:
+        return SpoolWriter(self, snapshot_id)
+
+    def stored(self, snapshot_id: str, max_age: float | None = None) -> bool:
+        """Whether the snapshot's records are spooled, at most `max_age` (or the TTL) ago."""
+        limit = max_age if max_age is not None else self.ttl
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at FROM snapshot_downloads WHERE snapshot_id = ?", (snapshot_id,)
+            ).fetchone()
+        return row is not None and (limit is None or time.time() - row[0] <= limit)
+
+    def lookup_payload(self, key: str, max_age: float) -> str | None:
+        """The finished snapshot whose spooled records answer `key` within `max_age`, if any."""
+        found = self.lookup(key, max_age)
+        snapshot_id = found[0] if found is not None and found[1] == READY else None
+        if snapshot_id is not None and not self.stored(snapshot_id, max_age):
+            snapshot_id = None
+        if snapshot_id is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        metrics.CACHE_REQUESTS.inc(cache="snapshot", result="miss" if snapshot_id is None else "hit")
+        return snapshot_id
+
+    def iter_records(self, snapshot_id: str, value: str):
+        """Spooled records of a snapshot collected for the input `value` (or a path under it)."""
+        prefix = value + "/"
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT spool FROM snapshot_downloads WHERE snapshot_id = ?", (snapshot_id,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE snapshot_downloads SET accessed_at = ? WHERE snapshot_id = ?", (time.time(), snapshot_id)
+                )
+        if row is None:
+            return
+        seq = -1
+        while True:
+            with self._lock:
+                page = self._conn.execute(
+                    "SELECT seq, record FROM snapshot_records WHERE spool = ? AND seq > ? "
+                    "AND (input = ? OR substr(input, 1, ?) = ?) ORDER BY seq LIMIT ?",
+                    (row[0], seq, value, len(prefix), prefix, PAGE_SIZE),
+                ).fetchall()
+            for seq, record in page:
+                yield json.loads(record)
+            if len(page) < PAGE_SIZE:
+                return
+
+    def _write_rows(self, rows: list):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO snapshot_records (spool, seq, input, record, created_at) VALUES (?, ?, ?, ?, ?)", rows
+            )
+
+    def _drop_spool(self, spool: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM snapshot_records WHERE spool = ?", (spool,))
+
+    def _commit(self, snapshot_id: str, spool: str, records: int):
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT spool FROM snapshot_downloads WHERE snapshot_id = ?", (snapshot_id,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshot_downloads (snapshot_id, spool, records, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (snapshot_id, spool, records, now, now),
+            )
+            if old is not None:
+                self._conn.execute("DELETE FROM snapshot_records WHERE spool = ?", (old[0],))
+            self._prune(now)
+
+    def _prune(self, now: float):
+        # Expired downloads and rows left behind by workers that died mid-download.
+        if self.ttl is not None:
+            expired = now - self.ttl
+            self._conn.execute(
+                "DELETE FROM snapshot_records WHERE spool IN "
+                "(SELECT spool FROM snapshot_downloads WHERE created_at < ?)", (expired,)
+            )
+            self._conn.execute("DELETE FROM snapshot_downloads WHERE created_at < ?", (expired,))
+            self._conn.execute(
+                "DELETE FROM snapshot_records WHERE created_at < ? "
+                "AND spool NOT IN (SELECT spool FROM snapshot_downloads)", (expired,)
+            )
+        if not self.max_records:
+            return
+        total = self._conn.execute("SELECT COALESCE(SUM(records), 0) FROM snapshot_downloads").fetchone()[0]
+        for snapshot_id, spool, records in self._conn.execute(
+            "SELECT snapshot_id, spool, records FROM snapshot_downloads ORDER BY accessed_at"
+        ).fetchall():
+            if total <= self.max_records:
+                break
+            self._conn.execute("DELETE FROM snapshot_downloads WHERE snapshot_id = ?", (snapshot_id,))
+            self._conn.execute("DELETE FROM snapshot_records WHERE spool = ?", (spool,))
+            total -= records
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM snapshot_inputs GROUP BY status").fetchall())
+            downloads, records = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(records), 0) FROM snapshot_downloads"
+            ).fetchone()
+        return {"enabled": True, "inputs": counts, "downloads": downloads, "records": records,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+def get_snapshot_index() -> SnapshotIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SnapshotIndex(
+                    os.path.join(cache_dir(), "snapshot_index.sqlite3"),
+                    ttl=float(os.getenv("SNAPSHOT_PAYLOAD_TTL_SECONDS", "86400")),
+                    max_records=int(os.getenv("SNAPSHOT_PAYLOAD_MAX_RECORDS", "200000")),
+                )
+    return _index
+
+
+def stats() -> dict:
+    return get_snapshot_index().stats() if enabled() else {"enabled": False}
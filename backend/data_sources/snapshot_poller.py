@@ -0,0 +1,206 @@
+import os
+import time
+import heapq
+import threading
+from collections import deque
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from backend.data_sources import http_client
+
+
+class _PendingSnapshot:
+    """One snapshot being polled, and the callers waiting on it, each with its own deadline."""
+
+    def __init__(self, snapshot_id: str):
+        self.snapshot_id = snapshot_id
+        self.started = time.monotonic()
+        self.next_check = self.started
+        self.checks = 0
+        self.in_flight = False
+        self.waiters: list[tuple[Future, float]] = []
+
+    def _live(self):
+        return [(waiter, deadline) for waiter, deadline in self.waiters if not waiter.done()]
+
+    def next_expiry(self) -> float | None:
+        return min((deadline for _, deadline in self._live()), default=None)
+
+    @staticmethod
+    def _settle(waiter: Future, ready: bool) -> bool:
+        try:
+            waiter.set_result(ready)
+        except InvalidStateError:
+            # The caller cancelled it (its own timeout or deadline) since _live() looked.
+            return False
+        return True
+
+    def expire(self, now: float) -> int:
+        """Resolve the waiters whose deadline has passed with False; returns how many."""
+        return sum(self._settle(waiter, False) for waiter, deadline in self._live() if deadline <= now)
+
+    def resolve(self, ready: bool):
+        for waiter, _ in self._live():
+            self._settle(waiter, ready)
+
+    def abandoned(self) -> bool:
+        return not self._live()
+
+
+class SnapshotPoller:
+    """Process-wide poller shared by every request waiting on a Bright Data snapshot.
+
+    Each snapshot is polled by a single background loop no matter how many
+    callers wait on it. The first check happens quickly and the following
+    ones are scheduled from the completion times observed so far, falling
+    back to exponential backoff once a snapshot outlives the history.
+    Every caller keeps its own deadline; the snapshot is polled until the
+    last of them passes.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 1.0,
+        max_interval: float = 15.0,
+        backoff: float = 1.6,
+        history_size: int = 200,
+        workers: int = 8,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self._history = deque(maxlen=history_size)
+        self._pending: dict[str, _PendingSnapshot] = {}
+        self._schedule: list[tuple[float, str]] = []
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="snapshot-poll")
+        self._thread = threading.Thread(target=self._run, name="snapshot-poller", daemon=True)
+        self._thread.start()
+
+    def wait(self, snapshot_id: str, timeout: float = 600) -> Future:
+        """Return a future resolved with True when the snapshot is ready, False otherwise."""
+        waiter = Future()
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            pending = self._pending.get(snapshot_id)
+            if pending is None:
+                pending = _PendingSnapshot(snapshot_id)
+                pending.next_check = time.monotonic() + self.min_interval
+                self._pending[snapshot_id] = pending
+                self._push(min(pending.next_check, deadline), snapshot_id)
+            elif deadline < pending.next_check:
+                # Wake up in time to time this waiter out.
+                self._push(deadline, snapshot_id)
+            pending.waiters.append((waiter, deadline))
+        return waiter
+
+    def _push(self, due: float, snapshot_id: str):
+        heapq.heappush(self._schedule, (due, snapshot_id))
+        self._cond.notify()
+
+    def next_interval(self, elapsed: float, checks: int) -> float:
+        """Seconds until the next progress check for a snapshot running for `elapsed` seconds."""
+        history = sorted(self._history)
+        if len(history) >= 5:
+            # Aim the next check at the next decile of observed completion times.
+            for step in range(1, 10):
+                target = history[len(history) * step // 10]
+                if target > elapsed + self.min_interval / 2:
+                    return min(max(target - elapsed, self.min_interval), self.max_interval)
+            interval = elapsed * (self.backoff - 1)
+        else:
+            interval = self.min_interval * (self.backoff ** checks)
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"pending": len(self._pending), "observed": len(self._history)}
+
+    def _run(self):
+        # This one thread serves every waiter in the process: an error must not end it.
+        while True:
+            try:
+                pending = self._next_due()
+                if pending is not None:
+                    self._executor.submit(self._check, pending)
+            except Exception as e:
+                print(f"❌ Snapshot poller error: {e}")
+                time.sleep(self.min_interval)
+
+    def _next_due(self) -> _PendingSnapshot | None:
+        """Wait for the next scheduled wake-up; the snapshot to check then, if any."""
+        with self._cond:
+            while not self._schedule:
+                self._cond.wait()
+            due, snapshot_id = self._schedule[0]
+            now = time.monotonic()
+            if due > now:
+                self._cond.wait(due - now)
+                return None
+            heapq.heappop(self._schedule)
+            pending = self._pending.get(snapshot_id)
+            if pending is None or pending.in_flight:
+                return None
+            if pending.expire(now):
+                print(f"⏰ Timeout waiting for snapshot {snapshot_id}")
+            if pending.abandoned():
+                del self._pending[snapshot_id]
+                return None
+            if now < pending.next_check:
+                # Woken for a deadline only: keep the polling cadence.
+                heapq.heappush(self._schedule, (min(pending.next_check, pending.next_expiry()), snapshot_id))
+                return None
+            pending.in_flight = True
+            return pending
+
+    def _check(self, pending: _PendingSnapshot):
+        status = None
+        try:
+            response = http_client.request(
+                "GET",
+                http_client.api_url(f"datasets/v3/progress/{pending.snapshot_id}"),
+                headers=http_client.brightdata_headers(),
+            )
+            response.raise_for_status()
+            status = response.json().get("status")
+        except Exception as e:
+            print(f"⚠️ Error checking progress: {e}")
+
+        with self._cond:
+            pending.in_flight = False
+            pending.checks += 1
+            elapsed = time.monotonic() - pending.started
+
+            if status in ("ready", "failed"):
+                if status == "ready":
+                    self._history.append(elapsed)
+                    print(f"✅ Snapshot {pending.snapshot_id} completed after {elapsed:.1f}s ({pending.checks} checks)")
+                else:
+                    print(f"❌ Snapshot {pending.snapshot_id} failed")
+                pending.resolve(status == "ready")
+                # Only once every waiter has its answer.
+                del self._pending[pending.snapshot_id]
+                return
+
+            if status not in (None, "running"):
+                print(f"❓ Unknown status: {status}")
+            pending.next_check = time.monotonic() + self.next_interval(elapsed, pending.checks)
+            next_expiry = pending.next_expiry()
+            due = pending.next_check if next_expiry is None else min(pending.next_check, next_expiry)
+            self._push(due, pending.snapshot_id)
+
+
+_poller = None
+_poller_lock = threading.Lock()
+
+
+def get_poller() -> SnapshotPoller:
+    global _poller
+    if _poller is None:
+        with _poller_lock:
+            if _poller is None:
+                _poller = SnapshotPoller(
+                    min_interval=float(os.getenv("SNAPSHOT_POLL_MIN_INTERVAL", "1")),
+                    max_interval=float(os.getenv("SNAPSHOT_POLL_MAX_INTERVAL", "15")),
+                    backoff=float(os.getenv("SNAPSHOT_POLL_BACKOFF", "1.6")),
+                    workers=int(os.getenv("SNAPSHOT_POLL_WORKERS", "8")),
+                )
+    return _poller
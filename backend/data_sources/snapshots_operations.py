@@ -1,74 +1,200 @@
 import os
+import json
 import time
-import requests
-from dotenv import load_dotenv
-from typing import List, Dict, Any, Optional
-
-load_dotenv()
+import codecs
+import asyncio
+from contextlib import contextmanager
+from backend.data_sources import http_client
+from backend.data_sources.snapshot_poller import get_poller
+from backend.utils import metrics
+from backend.utils.deadline import clamp_timeout
+from typing import List, Dict, Any, Optional, Iterable
+
+# Bytes read from the snapshot body at a time while streaming.
+CHUNK_SIZE = 64 * 1024
+_SEPARATORS = " \t\r\n,[]"
+
+
+@contextmanager
+def _waiting(snapshot_id: str):
+    """Span + metrics for the time a caller blocks on the shared poller."""
+    started = time.perf_counter()
+    try:
+        with metrics.span("snapshot_wait", metric=metrics.SNAPSHOT_WAIT_SECONDS, snapshot_id=snapshot_id) as attrs:
+            yield attrs
+    finally:
+        metrics.SLEEP_SECONDS.inc(time.perf_counter() - started, reason="snapshot_wait")
 
 
 def poll_snapshot_status(
     snapshot_id: str, max_attempts: int = 60, delay: int = 10) -> bool:
+    """Block until the shared poller reports the snapshot ready (or failed / timed out)."""
 
-    api_key = os.getenv("BRIGHTDATA_API_KEY")
-    progress_url = f"https://api.brightdata.com/datasets/v3/progress/{snapshot_id}"
-    headers = {"Authorization": f"Bearer {api_key}"}
-
-    for attempt in range(max_attempts):
+    print(f"⏳ Waiting for snapshot {snapshot_id}...")
+    timeout = clamp_timeout(max_attempts * delay)
+    with _waiting(snapshot_id) as attrs:
+        waiter = get_poller().wait(snapshot_id, timeout=timeout)
         try:
-            print(
-                f"⏳ Checking snapshot progress... (attempt {attempt + 1}/{max_attempts})"
-            )
+            attrs["ready"] = waiter.result(timeout=timeout)
+        except TimeoutError:
+            waiter.cancel()
+            attrs["ready"] = False
+    return attrs["ready"]
+
+
+def snapshot_format() -> str:
+    """Download format: ndjson (default) or jsonl stream line by line; json is parsed incrementally too."""
+    return os.getenv("SNAPSHOT_FORMAT", "ndjson")
+
+
+def project(record, fields: Optional[Iterable[str]]):
+    """Keep only `fields` of a record (all of it when fields is None)."""
+    if fields is None or not isinstance(record, dict):
+        return record
+    return {field: record[field] for field in fields if field in record}
+
+
+class RecordParser:
+    """Incremental parser for snapshot bodies fed in byte chunks.
+
+    Handles NDJSON/JSONL (one record per line) as well as a JSON array, and
+    returns each record, projected to `fields`, as soon as it is complete.
+    Only the unfinished tail of the body is ever buffered.
+    """
+
+    def __init__(self, fields: Optional[Iterable[str]] = None):
+        self.fields = tuple(fields) if fields is not None else None
+        self.bytes = 0
+        self.records = 0
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+
+    def feed(self, chunk: bytes) -> list:
+        self.bytes += len(chunk)
+        self._buffer += self._text.decode(chunk)
+        return self._drain()
+
+    def close(self) -> list:
+        self._buffer += self._text.decode(b"", final=True)
+        records = self._drain()
+        if self._buffer.strip(_SEPARATORS):
+            raise ValueError(f"Snapshot body ended inside a record ({len(self._buffer)} chars left)")
+        return records
+
+    def _drain(self) -> list:
+        records, pos, end = [], 0, len(self._buffer)
+        while True:
+            while pos < end and self._buffer[pos] in _SEPARATORS:
+                pos += 1
+            if pos >= end:
+                break
+            try:
+                record, pos_after = self._json.raw_decode(self._buffer, pos)
+            except json.JSONDecodeError:
+                # The record is still arriving.
+                break
+            records.append(project(record, self.fields))
+            pos = pos_after
+        self._buffer = self._buffer[pos:]
+        self.records += len(records)
+        return records
+
+
+def _download_url(snapshot_id: str, format: Optional[str]) -> str:
+    return http_client.api_url(f"datasets/v3/snapshot/{snapshot_id}?format={format or snapshot_format()}")
+
+
+def _downloaded(parser: RecordParser):
+    metrics.BRIGHTDATA_BYTES.inc(parser.bytes, operation="snapshot")
+    print(f"🎉 Successfully downloaded {parser.records} items ({parser.bytes} bytes)")
+
+
+def iter_snapshot(snapshot_id: str, format: Optional[str] = None,
+                  fields: Optional[Iterable[str]] = None):
+    """Stream a snapshot, yielding records (projected to `fields`) as they are parsed."""
+    print("📥 Downloading snapshot data...")
+    parser = RecordParser(fields)
+    response = http_client.request(
+        "GET", _download_url(snapshot_id, format), headers=http_client.brightdata_headers(), stream=True
+    )
+    try:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            yield from parser.feed(chunk)
+        yield from parser.close()
+    finally:
+        response.close()
+    _downloaded(parser)
+
+
+async def aiter_snapshot_pages(snapshot_id: str, format: Optional[str] = None,
+                               fields: Optional[Iterable[str]] = None):
+    """Async iter_snapshot() yielding the records of each downloaded chunk as one list.
+
+    Chunks are parsed in a worker thread, so a large snapshot does not hold
+    the event loop while it decodes.
+    """
+    print("📥 Downloading snapshot data...")
+    parser = RecordParser(fields)
+    async with http_client.astream(
+        "GET", _download_url(snapshot_id, format), headers=http_client.brightdata_headers()
+    ) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+            records = await asyncio.to_thread(parser.feed, chunk)
+            if records:
+                yield records
+        records = parser.close()
+        if records:
+            yield records
+    _downloaded(parser)
 
-            response = requests.get(progress_url, headers=headers)
-            response.raise_for_status()
 
-            progress_data = response.json()
-            status = progress_data.get("status")
+async def aiter_snapshot(snapshot_id: str, format: Optional[str] = None,
+                         fields: Optional[Iterable[str]] = None):
+    """Async iter_snapshot(): records are parsed while the body is still arriving."""
+    async for records in aiter_snapshot_pages(snapshot_id, format, fields):
+        for record in records:
+            yield record
 
-            if status == "ready":
-                print("✅ Snapshot completed!")
-                return True
-            elif status == "failed":
-                print("❌ Snapshot failed")
-                return False
-            elif status == "running":
-                print("🔄 Still processing...")
-                time.sleep(delay)
-            else:
-                print(f"❓ Unknown status: {status}")
-                time.sleep(delay)
 
-        except Exception as e:
-            print(f"⚠️ Error checking progress: {e}")
-            time.sleep(delay)
+def download_snapshot(
+    snapshot_id: str, format: Optional[str] = None,
+    fields: Optional[Iterable[str]] = None) -> Optional[List[Dict[Any, Any]]]:
+    """All records of a snapshot, projected to `fields`, without holding the raw body in memory."""
 
-    print("⏰ Timeout waiting for snapshot completion")
-    return False
+    try:
+        return list(iter_snapshot(snapshot_id, format, fields))
 
+    except Exception as e:
+        print(f"❌ Error downloading snapshot: {e}")
+        return None
 
-def download_snapshot(
-    snapshot_id: str, format: str = "json") -> Optional[List[Dict[Any, Any]]]:
 
-    api_key = os.getenv("BRIGHTDATA_API_KEY")
-    download_url = (
-        f"https://api.brightdata.com/datasets/v3/snapshot/{snapshot_id}?format={format}"
-    )
-    headers = {"Authorization": f"Bearer {api_key}"}
+async def apoll_snapshot_status(
+    snapshot_id: str, max_attempts: int = 60, delay: int = 10) -> bool:
+    """Async poll_snapshot_status(): awaits the shared poller without holding a thread."""
 
-    try:
-        print("📥 Downloading snapshot data...")
+    print(f"⏳ Waiting for snapshot {snapshot_id}...")
+    timeout = clamp_timeout(max_attempts * delay)
+    with _waiting(snapshot_id) as attrs:
+        waiter = get_poller().wait(snapshot_id, timeout=timeout)
+        try:
+            attrs["ready"] = await asyncio.wait_for(asyncio.wrap_future(waiter), timeout)
+        except asyncio.TimeoutError:
+            waiter.cancel()
+            attrs["ready"] = False
+    return attrs["ready"]
 
-        response = requests.get(download_url, headers=headers)
-        response.raise_for_status()
 
-        data = response.json()
-        print(
-            f"🎉 Successfully downloaded {len(data) if isinstance(data, list) else 1} items"
-        )
+async def adownload_snapshot(
+    snapshot_id: str, format: Optional[str] = None,
+    fields: Optional[Iterable[str]] = None) -> Optional[List[Dict[Any, Any]]]:
 
-        return data
+    try:
+        return [record async for record in aiter_snapshot(snapshot_id, format, fields)]
 
     except Exception as e:
         print(f"❌ Error downloading snapshot: {e}")
-        return None
\ No newline at end of file
+        return None
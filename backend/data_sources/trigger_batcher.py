@@ -0,0 +1,187 @@
+import os
+import json
+import asyncio
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from backend.utils.deadline import DeadlineExceeded, current_deadline, seconds_left
+from backend.data_sources import rate_limit
+from backend.utils.helpers import canonical_url
+
+# Set inside batch runs; interactive requests never wait for a batch window.
+_batching = contextvars.ContextVar("brightdata_batching", default=False)
+
+
+@contextmanager
+def batching():
+    """Pack dataset triggers made inside the block with those of concurrent batch requests."""
+    token = _batching.set(True)
+    try:
+        yield
+    finally:
+        _batching.reset(token)
+
+
+def batching_enabled() -> bool:
+    return _batching.get()
+
+
+def normalize_input(value) -> str:
+    """Comparable form of a dataset input: URLs canonicalized (scheme, host, query), keywords lower-cased."""
+    text = str(value or "").strip()
+    if "://" in text:
+        return canonical_url(text)
+    return text.lower().rstrip("/")
+
+
+def _input_value(record: dict, field: str):
+    """The input a snapshot record was collected for, as echoed back by Bright Data."""
+    for source in (record.get("input"), record.get("discovery_input")):
+        if isinstance(source, dict) and source.get(field):
+            return source[field]
+    return record.get(field)
+
+
+def record_input(record, field: str) -> str:
+    """Normalized input of a record, or "" when it does not say."""
+    return normalize_input(_input_value(record, field)) if isinstance(record, dict) else ""
+
+
+def answers(value: str, inputs) -> bool:
+    """Whether a record collected for `value` answers one of the normalized `inputs`.
+
+    It does when it equals the input or extends it as a path (comment URLs
+    under a post URL).
+    """
+    return bool(value) and any(value == v or value.startswith(v + "/") for v in inputs)
+
+
+def split_records(records, requests: list[list[dict]], field: str) -> tuple[list[list[dict]], list]:
+    """Hand each request the records collected for its own inputs.
+
+    Returns the records per request and those no request's inputs account
+    for, which the caller decides what to do with.
+    """
+    wanted = [{normalize_input(item.get(field)) for item in items} for items in requests]
+    split, unattributed = [[] for _ in requests], []
+    for record in records or []:
+        value = record_input(record, field)
+        owners = [i for i, inputs in enumerate(wanted) if answers(value, inputs)]
+        if not owners:
+            unattributed.append(record)
+        for i in owners:
+            split[i].append(record)
+    return split, unattributed
+
+
+class _Batch:
+    def __init__(self, params: dict, field: str):
+        self.params = params
+        self.field = field
+        self.requests: list[list[dict]] = []
+        self.futures: list[Future] = []
+
+    def size(self) -> int:
+        return sum(len(items) for items in self.requests)
+
+
+class TriggerBatcher:
+    """Pack dataset inputs from concurrent requests into shared Bright Data triggers.
+
+    Inputs submitted for the same dataset parameters within `window` seconds
+    (or until `max_items` are waiting) go out as one trigger; the downloaded
+    snapshot is split back per request. `run(params, data)` triggers, waits
+    for and downloads the snapshot.
+    """
+
+    def __init__(self, run, window: float = 2.0, max_items: int = 50, workers: int = 4):
+        self.run = run
+        self.window = window
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._pending: dict[str, _Batch] = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="trigger-batch")
+
+    def submit(self, params: dict, items: list[dict], field: str) -> Future:
+        """Queue `items`; the future resolves with the records collected for them."""
+        key = json.dumps([params, field], sort_keys=True)
+        future = Future()
+        with self._lock:
+            batch = self._pending.get(key)
+            if batch is None:
+                batch = self._pending[key] = _Batch(params, field)
+                timer = threading.Timer(self.window, self._flush, args=(key, batch))
+                timer.daemon = True
+                timer.start()
+            batch.requests.append(items)
+            batch.futures.append(future)
+            full = batch.size() >= self.max_items
+        if full:
+            self._flush(key, batch)
+        return future
+
+    def _flush(self, key: str, batch: _Batch):
+        with self._lock:
+            if self._pending.get(key) is not batch:
+                return
+            del self._pending[key]
+        self._executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: _Batch):
+        data = [item for items in batch.requests for item in items]
+        print(f"📦 Triggering {len(data)} inputs for {len(batch.requests)} requests in one snapshot")
+        try:
+            with rate_limit.priority(rate_limit.BATCH):
+                records = self.run(batch.params, data)
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        if records is None:
+            split = [None] * len(batch.requests)
+        else:
+            split, unattributed = split_records(records, batch.requests, batch.field)
+            if unattributed:
+                # Better a few records another request asked for than losing some of this one's.
+                print(f"⚠️ {len(unattributed)} batched records name none of the inputs, handing them to every request")
+                for own in split:
+                    own.extend(unattributed)
+        for future, result in zip(batch.futures, split):
+            if not future.done():
+                future.set_result(result)
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher(run) -> TriggerBatcher:
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = TriggerBatcher(
+                    run,
+                    window=float(os.getenv("BRIGHTDATA_BATCH_WINDOW_SECONDS", "2")),
+                    max_items=int(os.getenv("BRIGHTDATA_BATCH_MAX_ITEMS", "50")),
+                )
+    return _batcher
+
+
+def wait(future: Future):
+    """Block for a batched result, bounded by the current request deadline."""
+    try:
+        return future.result(timeout=seconds_left(current_deadline()))
+    except FutureTimeoutError:
+        raise DeadlineExceeded("request deadline exceeded") from None
+
+
+async def await_result(future: Future):
+    """Async wait(); a cancelled caller leaves the shared batch running."""
+    remaining = seconds_left(current_deadline())
+    try:
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=remaining)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded("request deadline exceeded") from None
@@ -1,25 +1,71 @@
-from dotenv import load_dotenv
 import os
+import asyncio
+import itertools
 import requests
 from urllib.parse import quote_plus
-from backend.data_sources.snapshots_operations import download_snapshot, poll_snapshot_status
+from backend.data_sources import http_client, trigger_batcher, snapshot_index
+from backend.data_sources.rate_limit import Overloaded
+from backend.utils import metrics
+from backend.data_sources.search_cache import cache_key, cached_search, acached_search
+from backend.utils.singleflight import SingleFlight
+from backend.data_sources.snapshots_operations import (
+    iter_snapshot,
+    poll_snapshot_status,
+    aiter_snapshot_pages,
+    apoll_snapshot_status,
+)
 
-load_dotenv()
 
 dataset_id = "gd_lvz8ah06191smkebj4"
 
-def _make_api_request(url, **kwargs):
-    api_key = os.getenv("BRIGHTDATA_API_KEY")
+# Fields kept from each snapshot record as it streams in; `input` and
+# `discovery_input` are what batched snapshots are split on.
+SNAPSHOT_FIELDS = {
+    "gd_lvz8ah06191smkebj4": ("title", "url", "input", "discovery_input"),
+    "gd_lvzdpsdlw09j6t702": ("comment_id", "comment", "date_posted", "url", "input", "discovery_input"),
+}
+
+# Input field each dataset is keyed and split on.
+INPUT_FIELDS = {
+    "gd_lvz8ah06191smkebj4": "keyword",
+    "gd_lvzdpsdlw09j6t702": "url",
+}
+
+# How long collected records stay reusable for another request: (env var, default seconds).
+REUSE_WINDOWS = {
+    "gd_lvz8ah06191smkebj4": ("SNAPSHOT_REUSE_POSTS_SECONDS", 21600),
+    "gd_lvzdpsdlw09j6t702": ("SNAPSHOT_REUSE_COMMENTS_SECONDS", 3600),
+}
+
+# Comments ranked per worker-thread hand-off on the async path; ranking is CPU-bound.
+RANK_BATCH_SIZE = 200
+
+SERP_URL = http_client.api_url("request")
+TRIGGER_URL = http_client.api_url("datasets/v3/trigger")
+
+# One download per reused snapshot, however many requests attach to it.
+_attached = SingleFlight()
+
+
+def _raise_if_throttled(url, response):
+    """Still rate limited after the retries: report it instead of returning no results."""
+    if response.status_code == 429:
+        raise Overloaded(
+            f"Bright Data is rate limiting {http_client.operation_for(url)} calls",
+            retry_after=http_client.retry_after_seconds(response.headers.get("Retry-After")),
+        )
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
+
+def _make_api_request(url, **kwargs):
+    headers = http_client.brightdata_headers(json_body=True)
 
     try:
-        response = requests.post(url, headers=headers, **kwargs)
+        response = http_client.request("POST", url, headers=headers, **kwargs)
+        _raise_if_throttled(url, response)
         response.raise_for_status()
         return response.json()
+    except Overloaded:
+        raise
     except requests.exceptions.RequestException as e:
         print(f"API request failed: {e}")
         return None
@@ -28,7 +74,22 @@ def _make_api_request(url, **kwargs):
         return None
 
 
-def serp_search(query, engine="google"):
+async def _amake_api_request(url, **kwargs):
+    headers = http_client.brightdata_headers(json_body=True)
+
+    try:
+        response = await http_client.arequest("POST", url, headers=headers, **kwargs)
+        _raise_if_throttled(url, response)
+        response.raise_for_status()
+        return response.json()
+    except Overloaded:
+        raise
+    except Exception as e:
+        print(f"API request failed: {e}")
+        return None
+
+
+def _serp_payload(query, engine):
     if engine == "google":
         base_url = "https://www.google.com/search"
     elif engine == "bing":
@@ -36,26 +97,223 @@ def serp_search(query, engine="google"):
     else:
         raise ValueError(f"Unknown engine {engine}")
 
-    url = "https://api.brightdata.com/request"
-
-    payload = {
+    return {
         "zone": "aiagentsearch",
         "url": f"{base_url}?q={quote_plus(query)}&brd_json=1",
         "format": "raw"
     }
 
-    full_response = _make_api_request(url, json=payload)
+
+def _extract_serp(full_response):
     if not full_response:
         return None
 
-    extracted_data = {
+    return {
         "knowledge": full_response.get("knowledge", {}),
         "organic": full_response.get("organic", []),
     }
-    return extracted_data
 
 
-def _trigger_and_download_snapshot(trigger_url, params, data, operation_name="operation"):
+def serp_search(query, engine="google"):
+    payload = _serp_payload(query, engine)
+
+    with metrics.span("serp_search", engine=engine):
+        return cached_search(
+            cache_key(engine, query),
+            lambda: _extract_serp(_make_api_request(SERP_URL, json=payload)),
+        )
+
+
+async def aserp_search(query, engine="google"):
+    payload = _serp_payload(query, engine)
+
+    async def fetch():
+        return _extract_serp(await _amake_api_request(SERP_URL, json=payload))
+
+    with metrics.span("serp_search", engine=engine):
+        return await acached_search(cache_key(engine, query), fetch)
+
+
+def _input_keys(params, data):
+    dataset_id = params.get("dataset_id")
+    field = INPUT_FIELDS.get(dataset_id)
+    if not field or not snapshot_index.enabled():
+        return []
+    return [snapshot_index.input_key(dataset_id, item, field) for item in data]
+
+
+def _reuse_window(dataset_id) -> float:
+    name, default = REUSE_WINDOWS.get(dataset_id, ("", 0))
+    return float(os.getenv(name, default)) if name else 0.0
+
+
+def _mark_snapshot(params, data, snapshot_id, status):
+    keys = _input_keys(params, data)
+    if keys:
+        snapshot_index.get_snapshot_index().mark(keys, snapshot_id, status)
+
+
+def _forget_snapshot(params, snapshot_id):
+    if params.get("dataset_id") in INPUT_FIELDS and snapshot_index.enabled():
+        snapshot_index.get_snapshot_index().forget(snapshot_id)
+
+
+class SnapshotFailed(Exception):
+    """A snapshot download broke off; the records streamed so far are incomplete."""
+
+
+def _reusable(params) -> bool:
+    return params.get("dataset_id") in INPUT_FIELDS and snapshot_index.enabled()
+
+
+class _Download:
+    """Bookkeeping around one streamed snapshot download.
+
+    Records are spooled into the snapshot index on their way to the caller
+    (when reuse is on); the snapshot is marked ready for `data` once the
+    download completes and forgotten when it breaks off. A snapshot with
+    records that name none of its inputs is not reused either: the inputs'
+    share of it would be incomplete. Those records still go to the caller.
+    """
+
+    def __init__(self, params, data, snapshot_id):
+        self.params = params
+        self.data = data
+        self.snapshot_id = snapshot_id
+        self.fields = SNAPSHOT_FIELDS.get(params.get("dataset_id"))
+        self.field = INPUT_FIELDS.get(params.get("dataset_id"))
+        self.spool = snapshot_index.get_snapshot_index().spool(snapshot_id) if _reusable(params) else None
+        # Unknown for a snapshot someone else triggered: only records naming no input at all count then.
+        self.inputs = None if data is None or not self.field else {
+            trigger_batcher.normalize_input(item.get(self.field)) for item in data
+        }
+        self.unattributed = 0
+        self.done = False
+
+    def _attribute(self, record) -> str:
+        value = trigger_batcher.record_input(record, self.field)
+        if self.inputs is None:
+            if not value:
+                self.unattributed += 1
+        elif not trigger_batcher.answers(value, self.inputs):
+            if len(self.inputs) != 1:
+                self.unattributed += 1
+            else:
+                # Everything a single-input snapshot returns was collected for that input.
+                value = next(iter(self.inputs))
+        return value
+
+    def add(self, record):
+        if self.field:
+            value = self._attribute(record)
+            if self.spool is not None:
+                self.spool.add(value, record)
+        return record
+
+    def add_all(self, records):
+        for record in records:
+            self.add(record)
+
+    def failed(self, error) -> SnapshotFailed:
+        print(f"❌ Error downloading snapshot: {error}")
+        _forget_snapshot(self.params, self.snapshot_id)
+        return SnapshotFailed(self.snapshot_id)
+
+    def finish(self):
+        self.done = True
+        if self.unattributed:
+            print(f"⚠️ {self.unattributed} records of snapshot {self.snapshot_id} name none of its inputs; not reusing it")
+            _forget_snapshot(self.params, self.snapshot_id)
+            if self.spool is not None:
+                self.spool.discard()
+            return
+        if self.spool is not None:
+            self.spool.commit()
+        if self.data is not None:
+            _mark_snapshot(self.params, self.data, self.snapshot_id, snapshot_index.READY)
+
+    def close(self):
+        if not self.done and self.spool is not None:
+            self.spool.discard()
+
+
+def _stream_snapshot(params, data, snapshot_id):
+    """Records of a ready snapshot as they download; raises SnapshotFailed if it breaks off."""
+    download = _Download(params, data, snapshot_id)
+    try:
+        for record in iter_snapshot(snapshot_id, fields=download.fields):
+            yield download.add(record)
+    except Exception as e:
+        raise download.failed(e) from e
+    else:
+        download.finish()
+    finally:
+        download.close()
+
+
+async def _astream_snapshot(params, data, snapshot_id):
+    download = _Download(params, data, snapshot_id)
+    try:
+        async for records in aiter_snapshot_pages(snapshot_id, fields=download.fields):
+            # Spooling writes to SQLite: keep it off the event loop like the parsing.
+            await asyncio.to_thread(download.add_all, records)
+            for record in records:
+                yield record
+    except Exception as e:
+        raise download.failed(e) from e
+    else:
+        await asyncio.to_thread(download.finish)
+    finally:
+        download.close()
+
+
+async def _aiterate(records):
+    """Iterate a list or an async record stream alike."""
+    if hasattr(records, "__aiter__"):
+        async for record in records:
+            yield record
+    else:
+        for record in records:
+            yield record
+
+
+def _take(records, size: int) -> list:
+    return list(itertools.islice(records, size))
+
+
+async def _abatches(records, size: int):
+    """Lists of up to `size` records from a list or an async record stream."""
+    batch = []
+    async for record in _aiterate(records):
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _drain(records):
+    """A record stream as a list; None when nothing was collected or the download broke off."""
+    if records is None:
+        return None
+    try:
+        return list(records)
+    except SnapshotFailed:
+        return None
+
+
+async def _adrain(records):
+    if records is None:
+        return None
+    try:
+        return [record async for record in _aiterate(records)]
+    except SnapshotFailed:
+        return None
+
+
+def _trigger_snapshot(trigger_url, params, data):
+    """Trigger a snapshot for `data` and wait until it is ready; its id, or None."""
     trigger_result = _make_api_request(trigger_url, params=params, json=data)
     if not trigger_result:
         return None
@@ -63,17 +321,210 @@ def _trigger_and_download_snapshot(trigger_url, params, data, operation_name="op
     snapshot_id = trigger_result.get("snapshot_id")
     if not snapshot_id:
         return None
+    # Other requests for these inputs attach to this snapshot instead of triggering their own.
+    _mark_snapshot(params, data, snapshot_id, snapshot_index.RUNNING)
 
     if not poll_snapshot_status(snapshot_id):
+        _forget_snapshot(params, snapshot_id)
         return None
+    return snapshot_id
 
-    raw_data = download_snapshot(snapshot_id)
-    return raw_data
 
+async def _atrigger_snapshot(trigger_url, params, data):
+    trigger_result = await _amake_api_request(trigger_url, params=params, json=data)
+    if not trigger_result:
+        return None
 
-def reddit_search_api(keyword, date="All time", sort_by="Hot", num_of_posts=15):
-    trigger_url = "https://api.brightdata.com/datasets/v3/trigger"
+    snapshot_id = trigger_result.get("snapshot_id")
+    if not snapshot_id:
+        return None
+    _mark_snapshot(params, data, snapshot_id, snapshot_index.RUNNING)
+
+    if not await apoll_snapshot_status(snapshot_id):
+        _forget_snapshot(params, snapshot_id)
+        return None
+    return snapshot_id
+
+
+def _trigger_and_download_snapshot(trigger_url, params, data, operation_name="operation"):
+    """Records collected for `data` by a new snapshot, streamed as they download (None if it failed)."""
+    snapshot_id = _trigger_snapshot(trigger_url, params, data)
+    return None if snapshot_id is None else _stream_snapshot(params, data, snapshot_id)
+
+
+async def _atrigger_and_download_snapshot(trigger_url, params, data, operation_name="operation"):
+    snapshot_id = await _atrigger_snapshot(trigger_url, params, data)
+    return None if snapshot_id is None else _astream_snapshot(params, data, snapshot_id)
+
+
+def _download_existing(params, snapshot_id) -> bool:
+    """Spool a snapshot someone else triggered, once it is ready; whether its records are now stored.
+
+    Requests attached to the same snapshot share one download.
+    """
+    index = snapshot_index.get_snapshot_index()
+
+    def fetch():
+        if index.stored(snapshot_id):
+            return True
+        if not poll_snapshot_status(snapshot_id):
+            _forget_snapshot(params, snapshot_id)
+            return False
+        try:
+            for _ in _stream_snapshot(params, None, snapshot_id):
+                pass
+        except SnapshotFailed:
+            return False
+        return index.stored(snapshot_id)
+
+    return _attached.do(snapshot_id, fetch)
+
+
+async def _adownload_existing(params, snapshot_id) -> bool:
+    index = snapshot_index.get_snapshot_index()
+
+    async def fetch():
+        if index.stored(snapshot_id):
+            return True
+        if not await apoll_snapshot_status(snapshot_id):
+            _forget_snapshot(params, snapshot_id)
+            return False
+        try:
+            async for _ in _astream_snapshot(params, None, snapshot_id):
+                pass
+        except SnapshotFailed:
+            return False
+        return index.stored(snapshot_id)
+
+    return await _attached.ado(snapshot_id, fetch)
+
+
+class _Reuse:
+    """Plan for one dataset request: which inputs are served from earlier snapshots.
+
+    Each input is answered, in order of preference, from the records
+    already spooled for it within the dataset's reuse window, from a
+    snapshot that is running or finished for it, or by a new snapshot for
+    the inputs still missing. Stored records are read back page by page.
+    """
+
+    def __init__(self, params, data):
+        self.params = params
+        self.data = data
+        self.field = INPUT_FIELDS[params["dataset_id"]]
+        self.window = _reuse_window(params["dataset_id"])
+        self.index = snapshot_index.get_snapshot_index()
+        self.keys = _input_keys(params, data)
+        self.stored = {}
+        self.attach = {}
+        self.missing = []
+        for i, key in enumerate(self.keys):
+            stored = self.index.lookup_payload(key, self.window)
+            found = None if stored is not None else self.index.lookup(key, self.window)
+            if stored is not None:
+                self.stored.setdefault(stored, []).append(i)
+            elif found is not None:
+                self.attach.setdefault(found[0], []).append(i)
+            else:
+                self.missing.append(i)
+        reused = sum(len(idxs) for idxs in (*self.stored.values(), *self.attach.values()))
+        if reused:
+            print(f"♻️ Reusing earlier snapshots for {reused} of {len(data)} inputs")
+
+    def attached(self, snapshot_id, indexes, stored: bool):
+        if stored:
+            self.stored.setdefault(snapshot_id, []).extend(indexes)
+        else:
+            self.missing.extend(indexes)
+
+    def _stored_records(self):
+        for snapshot_id, indexes in self.stored.items():
+            for i in indexes:
+                value = trigger_batcher.normalize_input(self.data[i].get(self.field))
+                yield from self.index.iter_records(snapshot_id, value)
+
+    def records(self, fresh):
+        """Stored records of the reused inputs, then `fresh` ones from a new snapshot (if any)."""
+        yield from self._stored_records()
+        if fresh is None:
+            return
+        try:
+            yield from fresh
+        except SnapshotFailed:
+            # Keep what earlier snapshots answered.
+            if not self.stored:
+                raise
+
+    async def arecords(self, fresh):
+        stored = self._stored_records()
+        # Pages are read from SQLite in a worker thread, not on the event loop.
+        while page := await asyncio.to_thread(_take, stored, snapshot_index.PAGE_SIZE):
+            for record in page:
+                yield record
+        if fresh is None:
+            return
+        try:
+            async for record in _aiterate(fresh):
+                yield record
+        except SnapshotFailed:
+            if not self.stored:
+                raise
+
+
+def _collect(params, data, fetch):
+    """fetch(params, data) for the inputs earlier snapshots cannot answer; see _Reuse.
+
+    Returns the records as they stream in, or None when nothing could be collected.
+    """
+    if not _reusable(params):
+        return fetch(params, data)
+
+    reuse = _Reuse(params, data)
+    for snapshot_id, indexes in reuse.attach.items():
+        reuse.attached(snapshot_id, indexes, _download_existing(params, snapshot_id))
+    fresh = fetch(params, [data[i] for i in reuse.missing]) if reuse.missing else None
+    if fresh is None and not reuse.stored:
+        return None
+    return reuse.records(fresh)
+
+
+async def _acollect(params, data, afetch):
+    if not _reusable(params):
+        return await afetch(params, data)
 
+    reuse = _Reuse(params, data)
+    for snapshot_id, indexes in reuse.attach.items():
+        reuse.attached(snapshot_id, indexes, await _adownload_existing(params, snapshot_id))
+    fresh = await afetch(params, [data[i] for i in reuse.missing]) if reuse.missing else None
+    if fresh is None and not reuse.stored:
+        return None
+    return reuse.arecords(fresh)
+
+
+def _run_batched_trigger(params, data):
+    # The batch is split per request, so its records are collected in full.
+    return _drain(_trigger_and_download_snapshot(TRIGGER_URL, params, data, operation_name="batch"))
+
+
+def _submit_batched(params, data, field):
+    """Share a trigger with concurrent batch requests for the same dataset."""
+    return trigger_batcher.get_batcher(_run_batched_trigger).submit(params, data, field)
+
+
+def _fetch_dataset(params, data, operation_name):
+    """Collect `data` with a new snapshot, shared with concurrent requests in batch mode."""
+    if trigger_batcher.batching_enabled():
+        return trigger_batcher.wait(_submit_batched(params, data, INPUT_FIELDS[params["dataset_id"]]))
+    return _trigger_and_download_snapshot(TRIGGER_URL, params, data, operation_name=operation_name)
+
+
+async def _afetch_dataset(params, data, operation_name):
+    if trigger_batcher.batching_enabled():
+        return await trigger_batcher.await_result(_submit_batched(params, data, INPUT_FIELDS[params["dataset_id"]]))
+    return await _atrigger_and_download_snapshot(TRIGGER_URL, params, data, operation_name=operation_name)
+
+
+def _reddit_search_request(keyword, date, sort_by, num_of_posts):
     params = {
         "dataset_id":"gd_lvz8ah06191smkebj4",
         "include_errors": "true",
@@ -89,11 +540,10 @@ def reddit_search_api(keyword, date="All time", sort_by="Hot", num_of_posts=15):
             "num_of_posts": num_of_posts,
         }
     ]
+    return params, data
 
-    raw_data = _trigger_and_download_snapshot(
-        trigger_url, params, data, operation_name="reddit"
-    )
 
+def _parse_reddit_posts(raw_data):
     if not raw_data:
         return None
 
@@ -108,12 +558,29 @@ def reddit_search_api(keyword, date="All time", sort_by="Hot", num_of_posts=15):
     return {"parsed_posts": parsed_data, "total_found": len(parsed_data)}
 
 
-def reddit_post_retrieval(urls, days_back=10, load_all_replies=False, comment_limit=""):
-    if not urls:
-        return None
+def reddit_search_api(keyword, date="All time", sort_by="Hot", num_of_posts=15):
+    params, data = _reddit_search_request(keyword, date, sort_by, num_of_posts)
+
+    def fetch():
+        raw_data = _drain(_collect(params, data, lambda p, d: _fetch_dataset(p, d, "reddit")))
+        return _parse_reddit_posts(raw_data)
+
+    with metrics.span("reddit_search"):
+        return cached_search(cache_key("reddit", keyword, date, sort_by, num_of_posts), fetch)
+
 
-    trigger_url = "https://api.brightdata.com/datasets/v3/trigger"
+async def areddit_search_api(keyword, date="All time", sort_by="Hot", num_of_posts=15):
+    params, data = _reddit_search_request(keyword, date, sort_by, num_of_posts)
 
+    async def fetch():
+        raw_data = await _adrain(await _acollect(params, data, lambda p, d: _afetch_dataset(p, d, "reddit")))
+        return _parse_reddit_posts(raw_data)
+
+    with metrics.span("reddit_search"):
+        return await acached_search(cache_key("reddit", keyword, date, sort_by, num_of_posts), fetch)
+
+
+def _reddit_post_request(urls, days_back, load_all_replies, comment_limit):
     params = {
 
         "dataset_id":"gd_lvzdpsdlw09j6t702",
@@ -129,20 +596,90 @@ def reddit_post_retrieval(urls, days_back=10, load_all_replies=False, comment_li
         }
         for url in urls
     ]
+    return params, data
 
-    raw_data = _trigger_and_download_snapshot(
-        trigger_url, params, data, operation_name="reddit comments"
-    )
+
+def _parse_reddit_comment(comment):
+    return {
+        "comment_id": comment.get("comment_id"),
+        "content": comment.get("comment"),
+        "date": comment.get("date_posted"),
+    }
+
+
+def _parse_reddit_comments(raw_data):
     if not raw_data:
         return None
 
-    parsed_comments = []
-    for comment in raw_data:
-        parsed_comment = {
-            "comment_id": comment.get("comment_id"),
-            "content": comment.get("comment"),
-            "date": comment.get("date_posted"),
-        }
-        parsed_comments.append(parsed_comment)
+    parsed_comments = [_parse_reddit_comment(comment) for comment in raw_data]
+    return {"comments": parsed_comments, "total_retrieved": len(parsed_comments)}
+
+
+def _ranked_comments(ranker, retrieved):
+    if not retrieved:
+        return None
+    return {"comments": ranker.results(), "total_retrieved": ranker.seen}
+
+
+def _rank_batch(ranker, records):
+    ranker.extend(_parse_reddit_comment(record) for record in records)
+
+
+def _rank_reddit_comments(records, ranker):
+    """Fold comment records into `ranker` as they stream in; only its bounded pool stays in memory."""
+    if records is None:
+        return None
+    retrieved = 0
+    try:
+        for record in records:
+            ranker.add(_parse_reddit_comment(record))
+            retrieved += 1
+    except SnapshotFailed:
+        return None
+    return _ranked_comments(ranker, retrieved)
+
+
+async def _arank_reddit_comments(records, ranker):
+    """Async _rank_reddit_comments(): ranking runs in a worker thread, RANK_BATCH_SIZE records at a time."""
+    if records is None:
+        return None
+    retrieved = 0
+    try:
+        async for batch in _abatches(records, RANK_BATCH_SIZE):
+            await asyncio.to_thread(_rank_batch, ranker, batch)
+            retrieved += len(batch)
+    except SnapshotFailed:
+        return None
+    return await asyncio.to_thread(_ranked_comments, ranker, retrieved)
+
+
+def reddit_post_retrieval(urls, days_back=10, load_all_replies=False, comment_limit="", ranker=None):
+    """Comments of the Reddit posts at `urls`.
+
+    With a `ranker` (see backend.agent.ranking) the comments are ranked while
+    they download and only the ones it keeps are returned, so memory is
+    bounded by its pool rather than by the size of the threads.
+    """
+    if not urls:
+        return None
+
+    params, data = _reddit_post_request(urls, days_back, load_all_replies, comment_limit)
+
+    with metrics.span("reddit_post_retrieval", urls=len(urls)):
+        records = _collect(params, data, lambda p, d: _fetch_dataset(p, d, "reddit comments"))
+        if ranker is not None:
+            return _rank_reddit_comments(records, ranker)
+        return _parse_reddit_comments(_drain(records))
+
+
+async def areddit_post_retrieval(urls, days_back=10, load_all_replies=False, comment_limit="", ranker=None):
+    if not urls:
+        return None
+
+    params, data = _reddit_post_request(urls, days_back, load_all_replies, comment_limit)
 
-    return {"comments": parsed_comments, "total_retrieved": len(parsed_comments)}
\ No newline at end of file
+    with metrics.span("reddit_post_retrieval", urls=len(urls)):
+        records = await _acollect(params, data, lambda p, d: _afetch_dataset(p, d, "reddit comments"))
+        if ranker is not None:
+            return await _arank_reddit_comments(records, ranker)
+        return _parse_reddit_comments(await _adrain(records))
@@ -0,0 +1,55 @@
+import os
+import json
+import asyncio
+from backend.data_sources.trigger_batcher import batching
+from backend.data_sources import rate_limit
+from backend.utils.helpers import initial_state
+from backend.utils import metrics
+from backend.nodes import checkpoints
+
+QUERY_OPTIONS = ("synthesis_timeout", "time_budget", "max_cache_age")
+
+
+def load_queries(lines) -> list[dict]:
+    """Parse JSONL lines: either {"user_question": ..., options} objects or bare question strings."""
+    queries = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        query = json.loads(line)
+        if isinstance(query, str):
+            query = {"user_question": query}
+        queries.append(query)
+    return queries
+
+
+async def run_batch(graph, queries: list[dict], concurrency: int | None = None) -> list[dict]:
+    """Plan many trips at once, returning one result per query in input order.
+
+    Up to `concurrency` graphs run together. Their Reddit dataset triggers
+    are packed into shared Bright Data snapshots, and their LLM stages
+    overlap instead of running one question after another. Their Bright
+    Data and LLM calls queue behind interactive requests. Failed results
+    keep their run_id; re-running those queries with it resumes them.
+    """
+    if concurrency is None:
+        concurrency = int(os.getenv("BATCH_CONCURRENCY", "16"))
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def plan(query: dict) -> dict:
+        user_question = query.get("user_question", "")
+        run_id = query.get("run_id") or checkpoints.new_run_id()
+        async with semaphore:
+            try:
+                options = [query.get(option) for option in QUERY_OPTIONS]
+                with metrics.trace("batch_plan"):
+                    state = await checkpoints.ainvoke_plan(graph, initial_state(user_question, *options), run_id)
+                return {"user_question": user_question, "run_id": run_id, "final_answer": state.get("final_answer"),
+                        "skipped_steps": state.get("skipped_steps") or [], "error": None}
+            except Exception as e:
+                print(f"❌ Batch plan failed for {user_question!r}: {e}")
+                return {"user_question": user_question, "run_id": run_id, "final_answer": None, "skipped_steps": [], "error": str(e)}
+
+    with batching(), rate_limit.priority(rate_limit.BATCH):
+        return await asyncio.gather(*(plan(query) for query in queries))
@@ -0,0 +1,129 @@
+import os
+import sys
+import asyncio
+from backend.agent import destination_kb
+from backend.data_sources import rate_limit
+from backend.data_sources.trigger_batcher import batching
+from backend.utils.helpers import initial_state
+from backend.utils.deadline import run_deadlines
+from backend.utils import metrics
+
+
+class DestinationRefresher:
+    """Background task that keeps the destination knowledge base warm.
+
+    Every `poll_interval` seconds it re-researches the destinations whose
+    entry is missing or older than `refresh_interval`, `concurrency` at a
+    time, with the research half of the graph. The runs share Reddit
+    snapshots and queue behind interactive requests like batch plans.
+    Replicas sharing the cache directory skip destinations another one
+    has just refreshed.
+    """
+
+    def __init__(self, graph, destinations: list[str], refresh_interval: float = 21600.0,
+                 poll_interval: float = 300.0, concurrency: int = 2):
+        self.graph = graph
+        self.destinations = destinations
+        self.refresh_interval = refresh_interval
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        print(f"📚 Keeping {len(self.destinations)} destination(s) warm")
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def due(self) -> list[str]:
+        """Destinations never researched, or last researched `refresh_interval` ago."""
+        due = []
+        for destination in self.destinations:
+            age = destination_kb.age(destination)
+            if age is None or age >= self.refresh_interval:
+                due.append(destination)
+        return due
+
+    async def refresh(self, destinations: list[str] | None = None) -> dict[str, bool]:
+        """Research `destinations` (the due ones by default); returns which were stored."""
+        destinations = self.due() if destinations is None else destinations
+        if not destinations:
+            return {}
+        graph = self.graph if self.graph is not None else await asyncio.to_thread(_research_graph)
+        semaphore = asyncio.Semaphore(max(self.concurrency, 1))
+
+        async def research(destination: str) -> tuple[str, bool]:
+            async with semaphore:
+                return destination, await self._research(graph, destination)
+
+        with batching(), rate_limit.priority(rate_limit.BATCH):
+            return dict(await asyncio.gather(*(research(d) for d in destinations)))
+
+    async def _research(self, graph, destination: str) -> bool:
+        trip_request = destination_kb.research_request(destination)
+        state = {
+            **initial_state(f"Plan a {trip_request.days} day trip to {destination}"),
+            "trip_request": trip_request,
+        }
+        try:
+            with metrics.trace("destination_refresh"), run_deadlines(state):
+                final_state = await graph.ainvoke(state)
+        except Exception as e:
+            print(f"❌ Refreshing {destination} failed: {e}")
+            metrics.DESTINATION_REFRESHES.inc(result="error")
+            return False
+        if not destination_kb.store(destination, final_state):
+            # Sources cut off by the deadline: keep serving the previous research.
+            print(f"⚠️ Research for {destination} was incomplete, keeping the previous entry")
+            metrics.DESTINATION_REFRESHES.inc(result="incomplete")
+            return False
+        print(f"📚 Refreshed {destination}")
+        metrics.DESTINATION_REFRESHES.inc(result="stored")
+        return True
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"❌ Destination refresh pass failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+
+def _research_graph():
+    from backend.nodes.graph import get_research_graph
+
+    return get_research_graph()
+
+
+def refresher_from_env(graph=None) -> DestinationRefresher:
+    """Refresher configured from DESTINATION_KB_*; it has nothing to do without destinations."""
+    return DestinationRefresher(
+        graph,
+        destination_kb.destinations() if destination_kb.enabled() else [],
+        refresh_interval=destination_kb.refresh_interval(),
+        poll_interval=float(os.getenv("DESTINATION_KB_POLL_SECONDS", "300")),
+        concurrency=int(os.getenv("DESTINATION_KB_CONCURRENCY", "2")),
+    )
+
+
+async def _serve_forever():
+    refresher = refresher_from_env()
+    await refresher.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await refresher.stop()
+
+
+if __name__ == "__main__":
+    # `--once` refreshes the due destinations and exits, for cron-style scheduling.
+    if "--once" in sys.argv[1:]:
+        results = asyncio.run(refresher_from_env().refresh())
+        print(f"📚 Refreshed {sum(results.values())} of {len(results)} due destination(s)")
+    else:
+        asyncio.run(_serve_forever())
@@ -0,0 +1,156 @@
+import os
+import asyncio
+from backend.jobs.store import JobStore, get_job_store, QUEUED, SUCCEEDED, FAILED
+from backend.jobs.batch import QUERY_OPTIONS
+from backend.utils.helpers import initial_state, serialize_state
+from backend.utils import metrics
+from backend.utils.deadline import run_deadlines
+from backend.data_sources import rate_limit
+from backend.nodes import checkpoints
+
+
+class JobQueueFull(Exception):
+    """Raised when admitting another job would exceed the queue limit."""
+
+
+def submit_job(store: JobStore, user_question: str, max_queued: int | None = None, options: dict | None = None) -> str:
+    """Queue a trip plan, refusing it when the backlog is already at max_queued.
+
+    `options` (synthesis_timeout, time_budget, max_cache_age, run_id) are
+    stored with the job and applied when a worker runs it.
+    """
+    if max_queued is None:
+        max_queued = int(os.getenv("JOBS_MAX_QUEUED", "100"))
+    if max_queued and store.count(QUEUED) >= max_queued:
+        raise JobQueueFull(f"{max_queued} plans are already queued")
+    return store.create(user_question, options)
+
+
+class JobRunner:
+    """Bounded pool of asyncio workers that claim queued jobs and run the compiled graph.
+
+    Workers pull from the shared JobStore, so they can live inside the API
+    process or in separate `python -m backend.jobs.runner` processes. The
+    partial state is written back after every graph step and running jobs
+    heartbeat, so jobs orphaned by a restart are picked up again, up to
+    `max_attempts` runs per job.
+    """
+
+    def __init__(self, graph, store: JobStore, workers: int = 2, poll_interval: float = 1.0,
+                 stale_after: float = 120.0, heartbeat: float = 30.0, max_attempts: int = 3):
+        self.graph = graph
+        self.store = store
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.heartbeat = heartbeat
+        self.max_attempts = max_attempts
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        requeued = self.store.requeue_stale(self.stale_after, self.max_attempts)
+        if requeued:
+            print(f"♻️ Requeued {requeued} interrupted plan(s)")
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake an idle worker right away instead of waiting for the next poll; safe from any thread."""
+        if self._wakeup is None or self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            pass  # the runner's loop is closed
+
+    async def _work(self):
+        next_stale_check = 0.0
+        loop = asyncio.get_running_loop()
+        while True:
+            if loop.time() >= next_stale_check:
+                self.store.requeue_stale(self.stale_after, self.max_attempts)
+                next_stale_check = loop.time() + self.stale_after / 2
+
+            job = self.store.claim()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _beat(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            self.store.update(job_id)
+
+    async def _run(self, job: dict):
+        job_id = job["id"]
+        options = job.get("options") or {}
+        # A plan submitted with the run_id of a failed request resumes that run.
+        run_id = options.get("run_id") or job_id
+        print(f"🧳 Running plan {job_id}")
+        beat = asyncio.create_task(self._beat(job_id))
+        state = None
+        try:
+            # The job id doubles as the trace and run id: GET /traces/{job_id} shows
+            # the run, and a job requeued after a crash resumes from its checkpoint.
+            graph = self.graph if self.graph is not None else await asyncio.to_thread(_shared_graph)
+            fresh = initial_state(job["user_question"], *(options.get(name) for name in QUERY_OPTIONS))
+            # Background plans yield upstream capacity to interactive requests.
+            with metrics.trace("plan_job", trace_id=job_id), run_deadlines(fresh), rate_limit.priority(rate_limit.BATCH):
+                graph_input = await checkpoints.arun_input(graph, run_id, fresh)
+                async for state in graph.astream(graph_input, checkpoints.run_config(run_id), stream_mode="values"):
+                    self.store.update(job_id, state=serialize_state(state))
+            await checkpoints.afinish_run(graph, run_id)
+            self.store.update(job_id, status=SUCCEEDED)
+        except asyncio.CancelledError:
+            # Leave the job running; it is requeued once its heartbeat goes stale.
+            raise
+        except Exception as e:
+            print(f"❌ Plan {job_id} failed: {e}")
+            self.store.update(job_id, status=FAILED, error=str(e))
+        finally:
+            beat.cancel()
+
+
+def _shared_graph():
+    from backend.nodes.graph import get_graph
+
+    return get_graph()
+
+
+def runner_from_env(graph=None) -> JobRunner:
+    """Runner configured from JOBS_*; without a graph it uses the shared one, loaded on the first job."""
+    return JobRunner(
+        graph,
+        get_job_store(),
+        workers=int(os.getenv("JOBS_WORKERS", "2")),
+        poll_interval=float(os.getenv("JOBS_POLL_INTERVAL", "1")),
+        stale_after=float(os.getenv("JOBS_STALE_AFTER_SECONDS", "120")),
+        max_attempts=int(os.getenv("JOBS_MAX_ATTEMPTS", "3")),
+    )
+
+
+async def _serve_forever():
+    runner = runner_from_env()
+    await runner.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(_serve_forever())
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from backend.utils.cache import cache_dir
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobStore:
+    """SQLite-backed trip plan jobs; doubles as the work queue shared by all workers."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, user_question TEXT NOT NULL, status TEXT NOT NULL, "
+            "state TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL, options TEXT)"
+        )
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "options" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN options TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created_at)")
+
+    def create(self, user_question: str, options: dict | None = None) -> str:
+        """Queue a job; `options` are the request's plan options (time budget, run_id, ...)."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, user_question, status, created_at, updated_at, options) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, user_question, QUEUED, now, now, json.dumps(options or {})),
+            )
+        return job_id
+
+    @staticmethod
+    def _decode(row) -> dict:
+        job = dict(row)
+        job["options"] = json.loads(job["options"]) if job.get("options") else {}
+        return job
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = self._decode(row)
+        job["state"] = json.loads(job["state"]) if job["state"] else None
+        return job
+
+    def claim(self) -> dict | None:
+        """Atomically move the oldest queued job to running and return it."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, user_question, options, attempts FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                    (QUEUED,),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        (RUNNING, time.time(), row["id"]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._decode(row) if row is not None else None
+
+    def update(self, job_id: str, status: str | None = None, state: dict | None = None, error: str | None = None):
+        fields, values = ["updated_at = ?"], [time.time()]
+        if status is not None:
+            fields.append("status = ?")
+            values.append(status)
+        if state is not None:
+            fields.append("state = ?")
+            values.append(json.dumps(state, default=str))
+        if error is not None:
+            fields.append("error = ?")
+            values.append(error)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {', '.join(fields)} WHERE id = ?", (*values, job_id))
+
+    def requeue_stale(self, older_than: float, max_attempts: int | None = None) -> int:
+        """Put running jobs whose worker stopped heartbeating back on the queue.
+
+        A job that has already been claimed `max_attempts` times is marked
+        failed instead, so a plan that keeps crashing its worker is not
+        retried forever.
+        """
+        now = time.time()
+        with self._lock:
+            if max_attempts:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+                    "WHERE status = ? AND updated_at < ? AND attempts >= ?",
+                    (FAILED, f"Worker stopped {max_attempts} times while running this plan",
+                     now, RUNNING, now - older_than, max_attempts),
+                )
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ? AND updated_at < ?",
+                (QUEUED, now, RUNNING, now - older_than),
+            )
+        return cursor.rowcount
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = JobStore(os.getenv("JOBS_DB_PATH") or os.path.join(cache_dir(), "jobs.sqlite3"))
+    return _store
@@ -0,0 +1,213 @@
+import os
+import time
+import uuid
+import sqlite3
+import asyncio
+import threading
+from backend.utils.cache import cache_dir
+from backend.utils.deadline import run_deadlines
+from backend.utils.helpers import env_flag
+
+try:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+except ImportError:  # optional: pip install langgraph-checkpoint-sqlite
+    SqliteSaver = None
+
+# Pydantic models stored in the graph state, allowed back out of a checkpoint.
+STATE_TYPES = (
+    ("backend.models.trip_request", "Triprequest"),
+    ("backend.models.trip_request", "RedditURLAnalysis"),
+)
+
+
+def enabled() -> bool:
+    return env_flag("GRAPH_CHECKPOINTS_ENABLED")
+
+
+def checkpoint_ttl() -> float:
+    """How long an unfinished run can still be resumed."""
+    return float(os.getenv("GRAPH_CHECKPOINT_TTL_SECONDS", "86400"))
+
+
+if SqliteSaver is not None:
+
+    class LocalSqliteSaver(SqliteSaver):
+        """SqliteSaver that graph.ainvoke() can use too: its async methods run the sync ones in a thread.
+
+        Each saved checkpoint stamps its run in `checkpoint_runs`, so runs
+        that were never finished can be pruned once they are too old to resume.
+        """
+
+        def __init__(self, conn: sqlite3.Connection, ttl: float | None = None, **kwargs):
+            super().__init__(conn, **kwargs)
+            self.ttl = ttl
+            self._next_prune = 0.0
+
+        def setup(self) -> None:
+            if self.is_setup:
+                return
+            super().setup()
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoint_runs (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+            )
+
+        def put(self, config, checkpoint, metadata, new_versions):
+            saved = super().put(config, checkpoint, metadata, new_versions)
+            now = time.time()
+            with self.cursor() as cur:
+                cur.execute(
+                    "INSERT OR REPLACE INTO checkpoint_runs (thread_id, updated_at) VALUES (?, ?)",
+                    (str(config["configurable"]["thread_id"]), now),
+                )
+            if self.ttl and now >= self._next_prune:
+                self._next_prune = now + min(self.ttl, 3600)
+                self.prune_stale(self.ttl)
+            return saved
+
+        def delete_thread(self, thread_id: str) -> None:
+            super().delete_thread(thread_id)
+            with self.cursor() as cur:
+                cur.execute("DELETE FROM checkpoint_runs WHERE thread_id = ?", (str(thread_id),))
+
+        def prune_stale(self, max_age: float) -> int:
+            """Forget runs whose last checkpoint is older than `max_age` seconds."""
+            with self.cursor(transaction=False) as cur:
+                stale = [row[0] for row in cur.execute(
+                    "SELECT thread_id FROM checkpoint_runs WHERE updated_at < ?", (time.time() - max_age,)
+                )]
+            for thread_id in stale:
+                self.delete_thread(thread_id)
+            if stale:
+                print(f"🧹 Pruned {len(stale)} stale run checkpoint(s)")
+            return len(stale)
+
+        async def aget_tuple(self, config):
+            return await asyncio.to_thread(self.get_tuple, config)
+
+        async def alist(self, config, *, filter=None, before=None, limit=None):
+            found = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+            for item in found:
+                yield item
+
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+        async def aput_writes(self, config, writes, task_id, task_path=""):
+            return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+        async def adelete_thread(self, thread_id):
+            return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def _serde():
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+    try:
+        return JsonPlusSerializer(allowed_msgpack_modules=STATE_TYPES)
+    except TypeError:
+        # Older langgraph-checkpoint releases deserialize any type.
+        return None
+
+
+_saver = None
+_saver_lock = threading.Lock()
+
+
+def get_checkpointer():
+    """Process-wide SQLite checkpointer, or None when checkpointing is off or unavailable."""
+    global _saver
+    if _saver is None:
+        with _saver_lock:
+            if _saver is None:
+                if not enabled():
+                    _saver = False
+                elif SqliteSaver is None:
+                    print("⚠️ langgraph-checkpoint-sqlite is not installed; failed runs cannot be resumed")
+                    _saver = False
+                else:
+                    path = os.getenv("GRAPH_CHECKPOINT_PATH") or os.path.join(cache_dir(), "checkpoints.sqlite3")
+                    _saver = LocalSqliteSaver(
+                        sqlite3.connect(path, check_same_thread=False), ttl=checkpoint_ttl(), serde=_serde()
+                    )
+    return _saver or None
+
+
+# Runs
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex
+
+
+def run_config(run_id: str) -> dict:
+    return {"configurable": {"thread_id": run_id}}
+
+
+def _resumable(snapshot) -> bool:
+    return snapshot.created_at is not None and bool(snapshot.next)
+
+
+def run_input(graph, run_id: str, state: dict) -> dict | None:
+    """Graph input for `run_id`: None to resume its saved, unfinished run, else the fresh state."""
+    if graph.checkpointer is None:
+        return state
+    snapshot = graph.get_state(run_config(run_id))
+    if _resumable(snapshot):
+        print(f"⏯️ Resuming run {run_id} at {', '.join(snapshot.next)}")
+        return None
+    return state
+
+
+async def arun_input(graph, run_id: str, state: dict) -> dict | None:
+    if graph.checkpointer is None:
+        return state
+    snapshot = await graph.aget_state(run_config(run_id))
+    if _resumable(snapshot):
+        print(f"⏯️ Resuming run {run_id} at {', '.join(snapshot.next)}")
+        return None
+    return state
+
+
+def finish_run(graph, run_id: str):
+    """Drop a finished run's checkpoints; only failed runs are kept for resuming."""
+    if graph.checkpointer is not None:
+        graph.checkpointer.delete_thread(run_id)
+
+
+async def afinish_run(graph, run_id: str):
+    if graph.checkpointer is not None:
+        await graph.checkpointer.adelete_thread(run_id)
+
+
+def failed_run(error: BaseException, default: str | None = None) -> str | None:
+    """Run id to resume after `error`: the run that raised it, which may be another caller's."""
+    return getattr(error, "run_id", None) or default
+
+
+def invoke_plan(graph, state: dict, run_id: str | None = None) -> dict:
+    """graph.invoke() under `run_id`, resuming that run from its last completed node if it failed before.
+
+    Errors are tagged with the run id (see failed_run()), so callers that
+    share the failure of a coalesced run can report the run to resume.
+    """
+    run_id = run_id or new_run_id()
+    try:
+        with run_deadlines(state):
+            final_state = graph.invoke(run_input(graph, run_id, state), run_config(run_id))
+    except Exception as e:
+        e.run_id = run_id
+        raise
+    finish_run(graph, run_id)
+    return final_state
+
+
+async def ainvoke_plan(graph, state: dict, run_id: str | None = None) -> dict:
+    """Async invoke_plan()."""
+    run_id = run_id or new_run_id()
+    try:
+        with run_deadlines(state):
+            final_state = await graph.ainvoke(await arun_input(graph, run_id, state), run_config(run_id))
+    except Exception as e:
+        e.run_id = run_id
+        raise
+    await afinish_run(graph, run_id)
+    return final_state
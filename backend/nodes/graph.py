@@ -1,49 +1,273 @@
+import threading
+from functools import wraps
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
 from backend.nodes.node_functions import (
     State,
+    WebBranchOutput,
+    RedditBranchOutput,
     extract_trip_parameters,
+    lookup_answer_cache,
     google_search,
     bing_search,
+    merge_web_results,
     reddit_search,
     analyze_reddit_posts,
     retrieve_reddit_posts,
     analyze_google_results,
     analyze_bing_results,
+    analyze_web_results,
     analyze_reddit_results,
-    synthesize_analyses
+    synthesize_analyses,
+    aextract_trip_parameters,
+    alookup_answer_cache,
+    agoogle_search,
+    abing_search,
+    amerge_web_results,
+    areddit_search,
+    aanalyze_reddit_posts,
+    aretrieve_reddit_posts,
+    aanalyze_google_results,
+    aanalyze_bing_results,
+    aanalyze_web_results,
+    aanalyze_reddit_results,
+    asynthesize_analyses,
 )
+from backend.nodes.checkpoints import get_checkpointer
+from backend.agent import serp_merge
+from backend.utils import metrics
+from backend.utils.deadline import (
+    DeadlineExceeded,
+    DegradationPolicy,
+    acall_with_deadline,
+    deadline_scope,
+    seconds_left,
+    state_deadline,
+)
+
+NODES = {
+    "extract_trip_parameters": (extract_trip_parameters, aextract_trip_parameters),
+    "lookup_answer_cache": (lookup_answer_cache, alookup_answer_cache),
+    "google_search": (google_search, agoogle_search),
+    "bing_search": (bing_search, abing_search),
+    "merge_web_results": (merge_web_results, amerge_web_results),
+    "reddit_search": (reddit_search, areddit_search),
+    "analyze_reddit_posts": (analyze_reddit_posts, aanalyze_reddit_posts),
+    "retrieve_reddit_posts": (retrieve_reddit_posts, aretrieve_reddit_posts),
+    "analyze_google_results": (analyze_google_results, aanalyze_google_results),
+    "analyze_bing_results": (analyze_bing_results, aanalyze_bing_results),
+    "analyze_web_results": (analyze_web_results, aanalyze_web_results),
+    "analyze_reddit_results": (analyze_reddit_results, aanalyze_reddit_results),
+    "synthesize_analyses": (synthesize_analyses, asynthesize_analyses),
+}
+
+# Per-source branches, each compiled as its own subgraph. The parent graph
+# runs all of them inside a single step, so a branch moves on to its
+# analysis as soon as its own data is ready instead of waiting for the
+# slower branches' steps to finish. A tuple is a stage of steps that run
+# in parallel: Google and Bing are searched together, merged and
+# de-duplicated, then each analysis covers the results unique to its engine.
+BRANCHES = {
+    "web_branch": (
+        [("google_search", "bing_search"), "merge_web_results", ("analyze_google_results", "analyze_bing_results")],
+        WebBranchOutput,
+    ),
+    "reddit_branch": (
+        ["reddit_search", "analyze_reddit_posts", "retrieve_reddit_posts", "analyze_reddit_results"],
+        RedditBranchOutput,
+    ),
+}
+
+
+def _min_seconds(name: str, policy: DegradationPolicy) -> float:
+    """Time that must be left before a branch node is worth starting."""
+    if name == "reddit_search":
+        return policy.reddit_search
+    if name == "retrieve_reddit_posts":
+        return policy.reddit_comments
+    if name.startswith("analyze_"):
+        return policy.analysis
+    return 0.0
+
+
+def _node(func, afunc, branch=False, min_seconds=0.0):
+    """Register both variants: graph.invoke() runs func, graph.ainvoke() awaits afunc.
+
+    Every node runs inside a deadline scope, so the data-source and LLM calls
+    it makes are bounded by the request deadline. Branch nodes use the
+    synthesis deadline instead: they are skipped when less than
+    `min_seconds` remain and cut off when they overrun, so the plan is
+    synthesized from whatever finished. Either way the node's only update
+    is its name in `skipped_steps`, which the synthesis and the caller see.
+    """
+    name = func.__name__
+    deadline_key = "synthesis_deadline" if branch else "deadline"
+
+    def too_late(deadline):
+        remaining = seconds_left(deadline)
+        if branch and remaining is not None and remaining <= min_seconds:
+            metrics.NODE_ERRORS.inc(node=name, reason="skipped")
+            print(f"⏭️ Skipping {name}: {remaining:.0f}s left before the synthesis deadline")
+            return True
+        return False
+
+    def skipped():
+        return {"skipped_steps": [name]}
+
+    def timed():
+        return metrics.span(f"node:{name}", metric=metrics.NODE_SECONDS, labels={"node": name})
+
+    def cut_off(attrs):
+        metrics.NODE_ERRORS.inc(node=name, reason="deadline")
+        attrs["cut_off"] = True
+        print(f"⏰ {name} cut off by the synthesis deadline")
+        return skipped()
+
+    @wraps(func)
+    def run(state):
+        deadline = state_deadline(state, deadline_key)
+        if too_late(deadline):
+            return skipped()
+        with deadline_scope(deadline), timed() as attrs:
+            try:
+                return func(state)
+            except DeadlineExceeded:
+                if not branch:
+                    metrics.NODE_ERRORS.inc(node=name, reason="deadline")
+                    raise
+                return cut_off(attrs)
+            except Exception:
+                metrics.NODE_ERRORS.inc(node=name, reason="error")
+                raise
+
+    @wraps(afunc)
+    async def arun(state):
+        deadline = state_deadline(state, deadline_key)
+        if too_late(deadline):
+            return skipped()
+        with deadline_scope(deadline), timed() as attrs:
+            try:
+                if not branch:
+                    return await afunc(state)
+                return await acall_with_deadline(afunc(state))
+            except DeadlineExceeded:
+                if not branch:
+                    metrics.NODE_ERRORS.inc(node=name, reason="deadline")
+                    raise
+                return cut_off(attrs)
+            except Exception:
+                metrics.NODE_ERRORS.inc(node=name, reason="error")
+                raise
+
+    return RunnableLambda(run, afunc=arun, name=name)
+
+
+def _branch_steps(name: str, steps: list) -> list:
+    """`steps` as built for the current WEB_ANALYSIS_MODE: merged mode runs one web analysis."""
+    if name == "web_branch" and serp_merge.analysis_mode() == "merged":
+        return [*steps[:-1], "analyze_web_results"]
+    return steps
 
 
-def build_graph():
+def _build_branch(name: str, steps: list, output_schema, policy: DegradationPolicy):
+    """Chain `steps` into a subgraph; branch nodes honour the synthesis deadline.
+
+    A tuple in `steps` is a stage of parallel steps; the next stage starts
+    once all of them are done.
+    """
+    builder = StateGraph(State, output_schema=output_schema)
+    previous = [START]
+    for stage in _branch_steps(name, steps):
+        stage = list(stage) if isinstance(stage, tuple) else [stage]
+        for step in stage:
+            builder.add_node(step, _node(*NODES[step], branch=True, min_seconds=_min_seconds(step, policy)))
+            builder.add_edge(previous if len(previous) > 1 else previous[0], step)
+        previous = stage
+    for step in previous:
+        builder.add_edge(step, END)
+    return builder.compile(name=name)
+
+
+def route_after_cache(state: State):
+    """Cached answer: done. Cached or precomputed destination analyses: straight to synthesis.
+    Otherwise: run every branch."""
+    status = state.get("cache_status")
+    if status == "answer":
+        return END
+    if status in ("analyses", "destination"):
+        return "synthesize_analyses"
+    return list(BRANCHES)
+
+
+def build_graph(policy: DegradationPolicy | None = None, checkpointer=None):
+    """Compile the planner graph.
+
+    Runs are checkpointed to SQLite after every node (GRAPH_CHECKPOINTS_ENABLED)
+    so a failed run can be resumed; pass checkpointer=False to build without.
+    Invoke a checkpointed graph through checkpoints.invoke_plan() / ainvoke_plan().
+    """
+    policy = policy or DegradationPolicy.from_env()
+    if checkpointer is None:
+        checkpointer = get_checkpointer()
     graph_builder = StateGraph(State)
 
     # Add nodes
-    graph_builder.add_node("extract_trip_parameters", extract_trip_parameters)
-    graph_builder.add_node("google_search", google_search)
-    graph_builder.add_node("bing_search", bing_search)
-    graph_builder.add_node("reddit_search", reddit_search)
-    graph_builder.add_node("analyze_reddit_posts", analyze_reddit_posts)
-    graph_builder.add_node("retrieve_reddit_posts", retrieve_reddit_posts)
-    graph_builder.add_node("analyze_google_results", analyze_google_results)
-    graph_builder.add_node("analyze_bing_results", analyze_bing_results)
-    graph_builder.add_node("analyze_reddit_results", analyze_reddit_results)
-    graph_builder.add_node("synthesize_analyses", synthesize_analyses)
-
-    # Add edges
+    graph_builder.add_node("extract_trip_parameters", _node(*NODES["extract_trip_parameters"]))
+    graph_builder.add_node("lookup_answer_cache", _node(*NODES["lookup_answer_cache"]))
+    for name, (steps, output_schema) in BRANCHES.items():
+        graph_builder.add_node(name, _build_branch(name, steps, output_schema, policy))
+    graph_builder.add_node("synthesize_analyses", _node(*NODES["synthesize_analyses"]))
+
+    # Add edges: a cache hit short-circuits the research; otherwise the
+    # branches fan out after extraction and join only at synthesis
     graph_builder.add_edge(START, "extract_trip_parameters")
-    graph_builder.add_edge("extract_trip_parameters", "google_search")
-    graph_builder.add_edge("extract_trip_parameters", "bing_search")
-    graph_builder.add_edge("extract_trip_parameters", "reddit_search")
-    graph_builder.add_edge("google_search", "analyze_reddit_posts")
-    graph_builder.add_edge("bing_search", "analyze_reddit_posts")
-    graph_builder.add_edge("reddit_search", "analyze_reddit_posts")
-    graph_builder.add_edge("analyze_reddit_posts", "retrieve_reddit_posts")
-    graph_builder.add_edge("retrieve_reddit_posts", "analyze_reddit_results")
-    graph_builder.add_edge("retrieve_reddit_posts", "analyze_google_results")
-    graph_builder.add_edge("retrieve_reddit_posts", "analyze_bing_results")
-    graph_builder.add_edge("analyze_google_results", "synthesize_analyses")
-    graph_builder.add_edge("analyze_bing_results", "synthesize_analyses")
-    graph_builder.add_edge("analyze_reddit_results", "synthesize_analyses")
+    graph_builder.add_edge("extract_trip_parameters", "lookup_answer_cache")
+    graph_builder.add_conditional_edges(
+        "lookup_answer_cache",
+        route_after_cache,
+        [*BRANCHES, "synthesize_analyses", END],
+    )
+    graph_builder.add_edge(list(BRANCHES), "synthesize_analyses")
     graph_builder.add_edge("synthesize_analyses", END)
 
-    return graph_builder.compile()
\ No newline at end of file
+    return graph_builder.compile(checkpointer=checkpointer or None)
+
+
+def build_research_graph(policy: DegradationPolicy | None = None):
+    """Compile the research half of the planner: every branch, from search to analysis.
+
+    Its input is a state with `trip_request` already set; it neither reads
+    the caches nor synthesizes. The destination refresher runs it to keep
+    the knowledge base warm.
+    """
+    policy = policy or DegradationPolicy.from_env()
+    graph_builder = StateGraph(State)
+    for name, (steps, output_schema) in BRANCHES.items():
+        graph_builder.add_node(name, _build_branch(name, steps, output_schema, policy))
+        graph_builder.add_edge(START, name)
+        graph_builder.add_edge(name, END)
+    return graph_builder.compile()
+
+
+_graph = None
+_research_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_graph():
+    """Process-wide compiled graph, built on first use with the policy from the environment."""
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                _graph = build_graph()
+    return _graph
+
+
+def get_research_graph():
+    global _research_graph
+    if _research_graph is None:
+        with _graph_lock:
+            if _research_graph is None:
+                _research_graph = build_research_graph()
+    return _research_graph
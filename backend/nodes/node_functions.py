@@ -1,22 +1,55 @@
-from dotenv import load_dotenv
 from typing import Annotated,List
 from langgraph.graph import StateGraph,START,END
 from langgraph.graph.message import add_messages
-from langchain.chat_models import init_chat_model
+from backend.agent.models import get_chat_model
 from typing import TypedDict
 from backend.models.trip_request import Triprequest,RedditURLAnalysis
 from pydantic import BaseModel,Field
-from backend.data_sources.web_operations import serp_search,reddit_search_api,reddit_post_retrieval
-from backend.agent.llm_wrapper import handle_extract_trip_parameters,google_search_api,bing_search_api
+from backend.data_sources.web_operations import (
+    serp_search,
+    reddit_search_api,
+    reddit_post_retrieval,
+    areddit_search_api,
+    areddit_post_retrieval,
+)
+from backend.agent.llm_wrapper import (
+    handle_extract_trip_parameters,
+    google_search_api,
+    bing_search_api,
+    ahandle_extract_trip_parameters,
+    agoogle_search_api,
+    abing_search_api,
+)
 from backend.agent.prompts import (
                      get_reddit_analysis_messages,
                      get_google_analysis_messages,
                      get_bing_analysis_messages,
+                     get_web_analysis_messages,
                      get_reddit_url_analysis_messages,
                      get_synthesis_messages
 )
-load_dotenv()
-llm=init_chat_model("gpt-4.1-2025-04-14")
+from backend.agent.compaction import (
+    compact_serp_results,
+    compact_reddit_results,
+    compact_reddit_post_data,
+)
+from backend.agent.ranking import ranker_for
+from backend.agent import answer_cache, destination_kb, serp_merge
+from backend.agent.query_planner import (
+    plan_queries,
+    max_queries,
+    search_all,
+    asearch_all,
+    fuse_serp_results,
+    fuse_reddit_results,
+)
+from backend.utils.helpers import build_search_query
+from backend.utils.deadline import DeadlineExceeded
+from backend.data_sources.rate_limit import Overloaded
+
+def add_unique(left,right):
+    """Reducer for lists the parallel branches append to; a resumed run does not repeat entries."""
+    return list(dict.fromkeys([*(left or []),*(right or [])]))
 
 class State(TypedDict):
     messages:Annotated[list,add_messages]
@@ -24,6 +57,7 @@ class State(TypedDict):
     trip_request:Triprequest|None
     google_results:str|None
     bing_results:str|None
+    web_results:dict|None
     reddit_results:str|None
     selected_reddit_urls:list[str]|None
     reddit_post_data:list|None
@@ -31,173 +65,389 @@ class State(TypedDict):
     bing_analysis:str|None
     reddit_analysis:str|None
     final_answer:str|None
+    deadline:float|None
+    synthesis_deadline:float|None
+    max_cache_age:float|None
+    cache_status:str|None
+    # Branch steps skipped or cut off by the synthesis deadline.
+    skipped_steps:Annotated[list[str],add_unique]
+
+# Keys each per-source branch writes back into State.
+class WebBranchOutput(TypedDict):
+    google_results:str|None
+    bing_results:str|None
+    web_results:dict|None
+    google_analysis:str|None
+    bing_analysis:str|None
+    skipped_steps:list[str]
+
+class RedditBranchOutput(TypedDict):
+    reddit_results:str|None
+    selected_reddit_urls:list[str]|None
+    reddit_post_data:list|None
+    reddit_analysis:str|None
+    skipped_steps:list[str]
+
+def _comment_ranker(state):
+    """Keeps only the most relevant, non-duplicate comments within the prompt budget."""
+    return ranker_for(state.get("trip_request"), state.get("user_question", ""))
+
+
+# Stand-in for an analysis whose source did not finish before the synthesis deadline.
+UNAVAILABLE_ANALYSIS="Not available: this source did not finish in time."
+
+# Bing analysis when Google and Bing results were analyzed together (WEB_ANALYSIS_MODE=merged).
+MERGED_WEB_ANALYSIS="Included in the Google analysis: Google and Bing results were analyzed together."
+
+# Bing analysis when every Bing result was also returned by Google (WEB_ANALYSIS_MODE=unique).
+NO_UNIQUE_RESULTS="No additional findings: every Bing result was also found by Google and is covered in the Google analysis."
+
+
+def _engine_results(state, engine):
+    """Results an engine's analysis covers: only its own unique ones once Google and Bing are merged."""
+    if serp_merge.analysis_mode() == "separate" or not state.get("web_results"):
+        return state.get(f"{engine}_results")
+    return serp_merge.owned_by(state.get("web_results"), engine)
+
+
+def _bing_adds_nothing(state, bing_results) -> bool:
+    """Merged with Google, every Bing result turned out to be Google's too; separate mode analyzes them all."""
+    return (
+        serp_merge.analysis_mode() != "separate"
+        and not bing_results
+        and bool(state.get("bing_results"))
+        and bool(state.get("web_results"))
+    )
+
+
+def _degraded_answer(google_analysis,bing_analysis,reddit_analysis):
+    """Plan returned when the synthesis itself runs out of time: the raw per-source analyses."""
+    return (
+        "We ran out of time combining the research, so here are the findings per source.\n\n"
+        f"## Google\n{google_analysis}\n\n## Bing\n{bing_analysis}\n\n## Reddit\n{reddit_analysis}"
+    )
 
 
 def extract_trip_parameters(state: State):
-    user_question=state.get("user_question","")
-    trip_request=handle_extract_trip_parameters(user_question)
+    trip_request=handle_extract_trip_parameters(state.get("user_question",""))
 
     return {"trip_request": trip_request}
 
-def google_search(state:State):
+def lookup_answer_cache(state:State):
     trip_request=state.get("trip_request")
+    status,entry=answer_cache.lookup(trip_request,state.get("max_cache_age"))
+
+    if status=="answer":
+        print("Serving cached trip plan")
+        return {
+            "cache_status":status,
+            "final_answer":entry["final_answer"],
+            "messages":[{"role":"assistant","content":entry["final_answer"]}],
+        }
+    if status=="analyses":
+        print("Re-synthesizing from cached analyses")
+        return {"cache_status":status,**{key:entry.get(key) for key in answer_cache.ANALYSIS_KEYS}}
+
+    entry=destination_kb.lookup(trip_request,state.get("max_cache_age"))
+    if entry:
+        print(f"📚 {trip_request.destination} is warm, synthesizing from the destination knowledge base")
+        return {"cache_status":"destination",**{key:entry.get(key) for key in answer_cache.ANALYSIS_KEYS}}
+    return {"cache_status":None}
+
+def _store_answer(state,final_answer):
+    """Remember complete plans only; partial (deadline-cut) ones would poison the cache.
+
+    Plans re-synthesized from cached analyses are not stored again, which
+    would make the old analyses look fresh.
+    """
+    if state.get("cache_status"):
+        return
+    analyses={key:state.get(key) for key in answer_cache.ANALYSIS_KEYS}
+    if all(analyses.values()):
+        answer_cache.store(state.get("trip_request"),final_answer,analyses)
+
+# Each node below comes as a sync and an async variant that differ only in
+# their I/O call; reading the state, building the prompts, logging and
+# shaping the output are shared by the helpers next to them.
+
+def _search_queries(state,source):
+    """Planned queries for `source` ("Google", "Bing" or "Reddit"), logged."""
+    queries=plan_queries(state,max_queries("reddit")) if source=="Reddit" else plan_queries(state)
+
+    print(f"Searching {source} for :{' | '.join(queries)}")
+
+    return queries
+
+def _reddit_search_output(results):
+    reddit_results=fuse_reddit_results(results)
 
-    if trip_request:
-        search_query=f"Trip to {trip_request.destination},activities:{','.join(trip_request.activities)},interests:{','.join(trip_request.interests)}"
-    else:
-        search_query=state.get("user_question","")
+    print(reddit_results)
 
-    print(f"Searching Google for :{search_query}")
-    
-    google_results=google_search_api(search_query)
-    
-    return {"google_results":google_results}
+    return {"reddit_results":reddit_results}
+
+def google_search(state:State):
+    results=search_all(google_search_api,_search_queries(state,"Google"))
+
+    return {"google_results":fuse_serp_results(results)}
 
-    
 def bing_search(state:State):
-    trip_request=state.get("trip_request")
+    results=search_all(bing_search_api,_search_queries(state,"Bing"))
 
-    if trip_request:
-        search_query=f"Trip to {trip_request.destination},activities:{','.join(trip_request.activities)},interests:{','.join(trip_request.interests)}"
-    else:
-        search_query=state.get("user_question","")
+    return {"bing_results":fuse_serp_results(results)}
 
-    print(f"Searching Bing for :{search_query}")
-    
-    bing_results=bing_search_api(search_query)
+def merge_web_results(state:State):
+    web_results=serp_merge.merge_serp_results(
+        {"google":state.get("google_results"),"bing":state.get("bing_results")}
+    )
+    print(f"🔀 Merged web results: {serp_merge.describe(web_results)}")
 
-    return {"bing_results":bing_results}
+    return {"web_results":web_results}
 
 def reddit_search(state:State):
-    trip_request=state.get("trip_request")
+    return _reddit_search_output(search_all(reddit_search_api,_search_queries(state,"Reddit")))
 
-    if trip_request:
-        search_query=f"Trip to {trip_request.destination},activities:{','.join(trip_request.activities)},interests:{','.join(trip_request.interests)}"
-    else:
-        search_query=state.get("user_question","")
 
-    print(f"Searching Reddit for :{search_query}")
+def _reddit_url_messages(state):
+    """Prompt for picking the Reddit posts worth reading; None when the search found nothing."""
+    reddit_results=state.get("reddit_results","")
 
-    reddit_results=reddit_search_api(search_query)
+    if not reddit_results:
+        return None
 
-    print(reddit_results)
+    return get_reddit_url_analysis_messages(state.get("user_question"),compact_reddit_results(reddit_results))
 
-    return {"reddit_results":reddit_results}
+def _reddit_url_selector():
+    return get_chat_model().with_structured_output(RedditURLAnalysis)
 
-def analyze_reddit_posts(state:State):
-    user_question=state.get("user_question")
-    reddit_results=state.get("reddit_results","")
+def _selected_urls_output(analysis):
+    selected_urls = analysis.selected_urls
 
-    if not reddit_results:
-        return {"selected_reddit_urls":[]}
-    
-    structured_llm=llm.with_structured_output(RedditURLAnalysis)
-    messages=get_reddit_url_analysis_messages(user_question,reddit_results)
+    print("Selected URLs:")
+    for i, url in enumerate(selected_urls, 1):
+        print(f"   {i}. {url}")
 
-    try:
-        analysis = structured_llm.invoke(messages)
-        selected_urls = analysis.selected_urls
+    return {"selected_reddit_urls": selected_urls}
 
-        print("Selected URLs:")
-        for i, url in enumerate(selected_urls, 1):
-            print(f"   {i}. {url}")
+def _url_selection_failed(error):
+    if isinstance(error, Overloaded):
+        # Backpressure, not a bad answer: let the request fail with 429 and be retried.
+        raise error
+    print(error)
 
+    return {"selected_reddit_urls": []}
+
+def analyze_reddit_posts(state:State):
+    messages=_reddit_url_messages(state)
+    if messages is None:
+        return {"selected_reddit_urls":[]}
+
+    try:
+        analysis = _reddit_url_selector().invoke(messages)
     except Exception as e:
-        print(e)
-        selected_urls = []
+        return _url_selection_failed(e)
 
-    return {"selected_reddit_urls": selected_urls}
+    return _selected_urls_output(analysis)
 
-def retrieve_reddit_posts(state:State):
+
+def _urls_to_retrieve(state):
     print("Getting reddit post comments")
 
     selected_urls = state.get("selected_reddit_urls", [])
 
-    if not selected_urls:
-        return {"reddit_post_data": []}
-
-    print(f"Processing {len(selected_urls)} Reddit URLs")
+    if selected_urls:
+        print(f"Processing {len(selected_urls)} Reddit URLs")
 
-    reddit_post_data = reddit_post_retrieval(selected_urls)
+    return selected_urls
 
+def _retrieved_posts_output(reddit_post_data):
     if reddit_post_data:
-        print(f"Successfully got {len(reddit_post_data)} posts")
+        print(f"Kept {len(reddit_post_data['comments'])} of {reddit_post_data['total_retrieved']} Reddit comments")
     else:
         print("Failed to get post data")
         reddit_post_data = []
 
-    print(reddit_post_data)
     return {"reddit_post_data": reddit_post_data}
 
+def retrieve_reddit_posts(state:State):
+    selected_urls = _urls_to_retrieve(state)
+    if not selected_urls:
+        return {"reddit_post_data": []}
 
-def analyze_google_results(state:State):
-    print("Analyzing google search results")
+    return _retrieved_posts_output(reddit_post_retrieval(selected_urls, ranker=_comment_ranker(state)))
 
-    trip_request=state.get("trip_request")
-    if trip_request:
-        search_context=f"Trip to {trip_request.destination},activities:{','.join(trip_request.activities)},interests:{','.join(trip_request.interests)}"
-    else:
-        search_context=state.get("user_question","")
-    google_results = state.get("google_results", "")
 
-    messages = get_google_analysis_messages(search_context, google_results,trip_request)
-    reply = llm.invoke(messages)
+def _google_analysis_messages(state):
+    print("Analyzing google search results")
 
-    return {"google_analysis": reply.content}
+    google_results = compact_serp_results(_engine_results(state, "google"))
 
+    return get_google_analysis_messages(build_search_query(state), google_results, state.get("trip_request"))
 
-def analyze_bing_results(state:State):
+def _bing_analysis_messages(state):
+    """Prompt for the Bing analysis; None when Bing found nothing Google did not."""
     print("Analyzing bing search results")
 
-    trip_request=state.get("trip_request")
-    if trip_request:
-        search_context=f"Trip to {trip_request.destination},activities:{','.join(trip_request.activities)},interests:{','.join(trip_request.interests)}"
-    else:
-        search_context=state.get("user_question","")
-    bing_results = state.get("bing_results", "")
+    bing_results = compact_serp_results(_engine_results(state, "bing"))
+    if _bing_adds_nothing(state, bing_results):
+        return None
 
-    messages = get_bing_analysis_messages(search_context, bing_results,trip_request)
-    reply = llm.invoke(messages)
+    return get_bing_analysis_messages(build_search_query(state), bing_results, state.get("trip_request"))
 
-    return {"bing_analysis": reply.content}
-    
+def _web_analysis_messages(state):
+    print("Analyzing merged Google and Bing results")
 
-def analyze_reddit_results(state:State):
+    web_results = compact_serp_results(state.get("web_results"))
+
+    return get_web_analysis_messages(build_search_query(state), web_results, state.get("trip_request"))
+
+def _reddit_analysis_messages(state):
     print("Analyzing reddit search results")
 
-    trip_request=state.get("trip_request")
-    if trip_request:
-        search_context=f"Trip to {trip_request.destination},activities:{','.join(trip_request.activities)},interests:{','.join(trip_request.interests)}"
-    else:
-        search_context=state.get("user_question","")
-    reddit_results = state.get("reddit_results", "")
-    reddit_post_data = state.get("reddit_post_data", "")
+    reddit_results = compact_reddit_results(state.get("reddit_results"))
+    reddit_post_data = compact_reddit_post_data(state.get("reddit_post_data"))
+
+    return get_reddit_analysis_messages(
+        build_search_query(state), reddit_results, reddit_post_data, state.get("trip_request")
+    )
+
+def analyze_google_results(state:State):
+    reply = get_chat_model().invoke(_google_analysis_messages(state))
+
+    return {"google_analysis": reply.content}
+
+def analyze_bing_results(state:State):
+    messages = _bing_analysis_messages(state)
+    if messages is None:
+        return {"bing_analysis": NO_UNIQUE_RESULTS}
+
+    reply = get_chat_model().invoke(messages)
+
+    return {"bing_analysis": reply.content}
+
+def analyze_web_results(state:State):
+    reply = get_chat_model().invoke(_web_analysis_messages(state))
 
-    messages = get_reddit_analysis_messages(search_context, reddit_results, reddit_post_data,trip_request)
-    reply = llm.invoke(messages)
+    return {"google_analysis": reply.content, "bing_analysis": MERGED_WEB_ANALYSIS}
+
+def analyze_reddit_results(state:State):
+    reply = get_chat_model().invoke(_reddit_analysis_messages(state))
 
     return {"reddit_analysis": reply.content}
-    
 
-def synthesize_analyses(state:State):
+
+def _synthesis_analyses(state):
+    """The per-source analyses to combine, with a stand-in for each source that did not finish."""
     print("Combine all results together")
 
-    trip_request=state.get("trip_request")
+    return {key: state.get(key) or UNAVAILABLE_ANALYSIS for key in answer_cache.ANALYSIS_KEYS}
 
-    if trip_request:
-        search_context=f"Trip to {trip_request.destination},activities:{','.join(trip_request.activities)},interests:{','.join(trip_request.interests)}"
-    else:
-        search_context=state.get("user_question","")
+def _synthesis_messages(state, analyses):
+    return get_synthesis_messages(
+        build_search_query(state),
+        analyses["google_analysis"], analyses["bing_analysis"], analyses["reddit_analysis"],
+        skipped_steps=state.get("skipped_steps"),
+    )
 
-    google_analysis = state.get("google_analysis", "")
-    bing_analysis = state.get("bing_analysis", "")
-    reddit_analysis = state.get("reddit_analysis", "")
+def _synthesis_output(final_answer):
+    return {"final_answer": final_answer, "messages": [{"role": "assistant", "content": final_answer}]}
 
-    messages = get_synthesis_messages(
-        search_context, google_analysis, bing_analysis, reddit_analysis
-    )
+def _synthesis_timed_out(analyses):
+    print("⏰ Synthesis ran out of time, returning per-source analyses")
 
-    reply = llm.invoke(messages)
-    final_answer = reply.content
+    return _synthesis_output(_degraded_answer(
+        analyses["google_analysis"], analyses["bing_analysis"], analyses["reddit_analysis"]
+    ))
 
-    return {"final_answer": final_answer, "messages": [{"role": "assistant", "content": final_answer}]}
+def synthesize_analyses(state:State):
+    analyses = _synthesis_analyses(state)
+
+    try:
+        final_answer = get_chat_model().invoke(_synthesis_messages(state, analyses)).content
+    except DeadlineExceeded:
+        return _synthesis_timed_out(analyses)
+
+    _store_answer(state, final_answer)
+    return _synthesis_output(final_answer)
+
+
+# Async variants of every node, used by graph.ainvoke()/astream() so that
+# in-flight plans wait on I/O inside the event loop instead of holding a
+# threadpool thread.
+
+async def aextract_trip_parameters(state: State):
+    trip_request=await ahandle_extract_trip_parameters(state.get("user_question",""))
+
+    return {"trip_request": trip_request}
+
+async def alookup_answer_cache(state:State):
+    return lookup_answer_cache(state)
+
+async def agoogle_search(state:State):
+    results=await asearch_all(agoogle_search_api,_search_queries(state,"Google"))
+
+    return {"google_results":fuse_serp_results(results)}
+
+async def abing_search(state:State):
+    results=await asearch_all(abing_search_api,_search_queries(state,"Bing"))
+
+    return {"bing_results":fuse_serp_results(results)}
+
+async def amerge_web_results(state:State):
+    return merge_web_results(state)
+
+async def areddit_search(state:State):
+    return _reddit_search_output(await asearch_all(areddit_search_api,_search_queries(state,"Reddit")))
+
+async def aanalyze_reddit_posts(state:State):
+    messages=_reddit_url_messages(state)
+    if messages is None:
+        return {"selected_reddit_urls":[]}
+
+    try:
+        analysis = await _reddit_url_selector().ainvoke(messages)
+    except Exception as e:
+        return _url_selection_failed(e)
+
+    return _selected_urls_output(analysis)
+
+async def aretrieve_reddit_posts(state:State):
+    selected_urls = _urls_to_retrieve(state)
+    if not selected_urls:
+        return {"reddit_post_data": []}
+
+    return _retrieved_posts_output(await areddit_post_retrieval(selected_urls, ranker=_comment_ranker(state)))
+
+async def aanalyze_google_results(state:State):
+    reply = await get_chat_model().ainvoke(_google_analysis_messages(state))
+
+    return {"google_analysis": reply.content}
+
+async def aanalyze_bing_results(state:State):
+    messages = _bing_analysis_messages(state)
+    if messages is None:
+        return {"bing_analysis": NO_UNIQUE_RESULTS}
+
+    reply = await get_chat_model().ainvoke(messages)
+
+    return {"bing_analysis": reply.content}
+
+async def aanalyze_web_results(state:State):
+    reply = await get_chat_model().ainvoke(_web_analysis_messages(state))
+
+    return {"google_analysis": reply.content, "bing_analysis": MERGED_WEB_ANALYSIS}
+
+async def aanalyze_reddit_results(state:State):
+    reply = await get_chat_model().ainvoke(_reddit_analysis_messages(state))
+
+    return {"reddit_analysis": reply.content}
+
+async def asynthesize_analyses(state:State):
+    analyses = _synthesis_analyses(state)
+
+    try:
+        final_answer = (await get_chat_model().ainvoke(_synthesis_messages(state, analyses))).content
+    except DeadlineExceeded:
+        return _synthesis_timed_out(analyses)
+
+    _store_answer(state, final_answer)
+    return _synthesis_output(final_answer)
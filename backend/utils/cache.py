@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+def cache_dir() -> str:
+    """Directory holding the local SQLite stores (created on first use)."""
+    path = os.getenv("TRIP_PLANNER_CACHE_DIR", ".cache")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class MemoryCache:
+    """In-process LRU cache with an optional TTL; same interface as SQLiteCache."""
+
+    def __init__(self, ttl: float | None = None, max_entries: int | None = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+
+    def get(self, key: str, max_age: float | None = None):
+        limit = max_age if max_age is not None else self.ttl
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and now - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None or (limit is not None and now - entry[0] > limit):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def age(self, key: str) -> float | None:
+        with self._lock:
+            entry = self._entries.get(key)
+        return None if entry is None else time.time() - entry[0]
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while self.max_entries and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": size}
+
+
+class SQLiteCache:
+    """JSON key/value cache on disk with a TTL and least-recently-used eviction."""
+
+    def __init__(self, path: str, table: str = "cache", ttl: float | None = None, max_entries: int | None = None):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table}(accessed_at)")
+
+    def get(self, key: str, max_age: float | None = None):
+        """Return the cached value, or None on a miss or when older than the TTL / max_age."""
+        limit = max_age if max_age is not None else self.ttl
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                row = None
+            if row is None or (limit is not None and now - row[1] > limit):
+                self.misses += 1
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def age(self, key: str) -> float | None:
+        """Seconds since the entry was stored, without counting a hit or miss."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        return None if row is None else time.time() - row[0]
+
+    def set(self, key: str, value):
+        now = time.time()
+        payload = json.dumps(value, default=str)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            if self.max_entries:
+                excess = self._count() - self.max_entries
+                if excess > 0:
+                    self._conn.execute(
+                        f"DELETE FROM {self.table} WHERE key IN "
+                        f"(SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)",
+                        (excess,),
+                    )
+                    self.evictions += excess
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def _count(self) -> int:
+        return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._count()
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": size}
@@ -0,0 +1,125 @@
+import os
+import time
+import asyncio
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# Deadline of the graph node currently running; read by the HTTP client,
+# the snapshot poller and the LLM wrapper so every call honours it.
+_current_deadline = contextvars.ContextVar("current_deadline", default=None)
+# Deadlines of the current request, which win over those saved in a resumed run's state.
+_run_deadlines = contextvars.ContextVar("run_deadlines", default=None)
+
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="deadline")
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's time budget ran out before the call could finish."""
+
+
+@dataclass(frozen=True)
+class DegradationPolicy:
+    """Minimum seconds that must remain before an optional step is started."""
+
+    reddit_search: float = 60.0
+    reddit_comments: float = 45.0
+    analysis: float = 10.0
+    synthesis_reserve: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "DegradationPolicy":
+        return cls(
+            reddit_search=float(os.getenv("REDDIT_SEARCH_MIN_SECONDS", cls.reddit_search)),
+            reddit_comments=float(os.getenv("REDDIT_COMMENTS_MIN_SECONDS", cls.reddit_comments)),
+            analysis=float(os.getenv("ANALYSIS_MIN_SECONDS", cls.analysis)),
+            synthesis_reserve=float(os.getenv("SYNTHESIS_RESERVE_SECONDS", cls.synthesis_reserve)),
+        )
+
+
+def deadline_after(seconds: float | None) -> float | None:
+    """Absolute (epoch) deadline `seconds` from now, or None for no deadline."""
+    return time.time() + seconds if seconds else None
+
+
+def seconds_left(deadline: float | None) -> float | None:
+    """Seconds remaining until `deadline` (never negative), or None when unbounded."""
+    if deadline is None:
+        return None
+    return max(deadline - time.time(), 0.0)
+
+
+def expired(deadline: float | None) -> bool:
+    return deadline is not None and time.time() >= deadline
+
+
+def current_deadline() -> float | None:
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline: float | None):
+    """Make `deadline` the one honoured by calls made inside the block."""
+    token = _current_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _current_deadline.reset(token)
+
+
+@contextmanager
+def run_deadlines(state: dict):
+    """Bound the graph run inside the block by the deadlines of `state`.
+
+    A run resumed from a checkpoint carries the deadlines of its first
+    attempt, which have usually passed; the retry brings its own.
+    """
+    token = _run_deadlines.set({key: state.get(key) for key in ("deadline", "synthesis_deadline")})
+    try:
+        yield
+    finally:
+        _run_deadlines.reset(token)
+
+
+def state_deadline(state: dict, key: str) -> float | None:
+    """The `deadline` / `synthesis_deadline` a node should honour."""
+    overrides = _run_deadlines.get()
+    if overrides is not None:
+        return overrides.get(key)
+    return state.get(key)
+
+
+def clamp_timeout(timeout: float) -> float:
+    """Shrink `timeout` to the time left in the current scope, failing fast when none is left."""
+    remaining = seconds_left(current_deadline())
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    return min(timeout, remaining)
+
+
+def call_with_deadline(fn, *args, **kwargs):
+    """Run a blocking call, giving up with DeadlineExceeded when the current deadline passes."""
+    remaining = seconds_left(current_deadline())
+    if remaining is None:
+        return fn(*args, **kwargs)
+    if remaining <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    future = _executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+    try:
+        return future.result(timeout=remaining)
+    except FutureTimeoutError:
+        raise DeadlineExceeded("request deadline exceeded") from None
+
+
+async def acall_with_deadline(awaitable):
+    """Await `awaitable`, cancelling it with DeadlineExceeded when the current deadline passes."""
+    remaining = seconds_left(current_deadline())
+    if remaining is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout=remaining)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded("request deadline exceeded") from None
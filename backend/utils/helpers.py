@@ -0,0 +1,89 @@
+import os
+from urllib.parse import urlsplit, parse_qsl
+from backend.utils.deadline import DegradationPolicy, deadline_after
+
+
+def env_flag(name: str, default: bool = True) -> bool:
+    """On/off setting: "0", "false", "no" or "off" turn it off, unset means `default`."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off")
+
+
+# Query parameters that only track the click and never change the page.
+_TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "ref", "ref_src", "srsltid", "mc_cid", "mc_eid"}
+
+
+def canonical_url(url: str) -> str:
+    """Scheme-, www-, tracking-parameter- and trailing-slash-insensitive form of a URL for de-duplication."""
+    parts = urlsplit((url or "").strip())
+    host = parts.netloc.lower().removeprefix("www.").removeprefix("m.")
+    query = "&".join(sorted(
+        f"{key}={value}" for key, value in parse_qsl(parts.query)
+        if not key.lower().startswith("utm_") and key.lower() not in _TRACKING_PARAMS
+    ))
+    return f"{host}{parts.path.rstrip('/')}{'?' + query if query else ''}".lower()
+
+
+def build_search_query(state) -> str:
+    """Build the search query / analysis context for a graph state."""
+    trip_request = state.get("trip_request")
+    if trip_request:
+        return f"Trip to {trip_request.destination},activities:{','.join(trip_request.activities)},interests:{','.join(trip_request.interests)}"
+    return state.get("user_question", "")
+
+
+def initial_state(user_question: str, synthesis_timeout: float | None = None, time_budget: float | None = None,
+                  max_cache_age: float | None = None) -> dict:
+    """Fresh graph input for a single user question.
+
+    `time_budget` bounds the whole request (ASK_TIME_BUDGET_SECONDS by
+    default); every data-source and LLM call inside the graph honours it.
+    With `synthesis_timeout` set (SYNTHESIS_TIMEOUT_SECONDS by default),
+    sources still running after that many seconds are dropped and the plan
+    is synthesized from what finished; the steps dropped are listed in
+    `skipped_steps`. With a time budget, the sources are always cut early
+    enough to leave the synthesis its reserved time.
+    `max_cache_age` limits how old a cached plan may be (0 skips the cache).
+    """
+    if time_budget is None:
+        time_budget = float(os.getenv("ASK_TIME_BUDGET_SECONDS", "240")) or None
+    if synthesis_timeout is None:
+        synthesis_timeout = float(os.getenv("SYNTHESIS_TIMEOUT_SECONDS", "0")) or None
+
+    deadline = deadline_after(time_budget)
+    synthesis_deadline = deadline_after(synthesis_timeout)
+    if deadline is not None:
+        reserve_cutoff = deadline - DegradationPolicy.from_env().synthesis_reserve
+        synthesis_deadline = min(synthesis_deadline or reserve_cutoff, reserve_cutoff)
+
+    return {
+        "messages": [{"role": "user", "content": user_question}],
+        "user_question": user_question,
+        "trip_request": None,
+        "google_results": None,
+        "bing_results": None,
+        "reddit_results": None,
+        "selected_reddit_urls": None,
+        "reddit_post_data": None,
+        "google_analysis": None,
+        "bing_analysis": None,
+        "reddit_analysis": None,
+        "final_answer": None,
+        "skipped_steps": [],
+        "deadline": deadline,
+        "synthesis_deadline": synthesis_deadline,
+        "max_cache_age": max_cache_age,
+        "cache_status": None,
+    }
+
+
+def serialize_state(state: dict) -> dict:
+    """JSON-friendly view of a (partial) graph state, without the message history."""
+    serialized = {}
+    for key, value in state.items():
+        if key == "messages":
+            continue
+        serialized[key] = value.model_dump() if hasattr(value, "model_dump") else value
+    return serialized
@@ -0,0 +1,212 @@
+import os
+import time
+import uuid
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items())) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(tuple(sorted(labels.items())), 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(dict(key))} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> [bucket counts..., sum, count]
+        self._values: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._values.items()):
+                labels = dict(key)
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_labels({**labels, 'le': f'{bound:g}'})} {count:g}")
+                lines.append(f"{self.name}_bucket{_labels({**labels, 'le': '+Inf'})} {series[-1]:g}")
+                lines.append(f"{self.name}_sum{_labels(labels)} {series[-2]:g}")
+                lines.append(f"{self.name}_count{_labels(labels)} {series[-1]:g}")
+        return lines
+
+
+NODE_SECONDS = Histogram("trip_node_duration_seconds", "Wall time of each graph node.")
+NODE_ERRORS = Counter("trip_node_errors_total", "Graph node runs that raised, were cut off by the deadline or were skipped.")
+BRIGHTDATA_SECONDS = Histogram("brightdata_request_duration_seconds", "Bright Data HTTP calls by operation.")
+BRIGHTDATA_BYTES = Counter("brightdata_downloaded_bytes_total", "Response bytes received from Bright Data.")
+BRIGHTDATA_ERRORS = Counter("brightdata_request_errors_total", "Bright Data calls that failed or returned an error status.")
+SNAPSHOT_WAIT_SECONDS = Histogram("brightdata_snapshot_wait_seconds", "Time callers spent waiting for a snapshot to be ready.")
+SLEEP_SECONDS = Counter("trip_sleep_seconds_total", "Time spent sleeping in retry backoff and polling waits.")
+LLM_SECONDS = Histogram("llm_request_duration_seconds", "Chat model calls that reached the provider.")
+LLM_TOKENS = Counter("llm_tokens_total", "Prompt and completion tokens sent to / generated by the chat model.")
+LLM_COST = Counter("llm_cost_usd_total", "Estimated chat model spend in USD.")
+CACHE_REQUESTS = Counter("trip_cache_requests_total", "Cache lookups by cache and result (hit / miss).")
+RATE_LIMIT_WAIT_SECONDS = Histogram("upstream_queue_wait_seconds", "Time calls waited in an upstream's rate limiter, by priority.")
+RATE_LIMIT_REJECTIONS = Counter("upstream_rejections_total", "Requests refused with 429 because an upstream's queue was full.")
+DESTINATION_REFRESHES = Counter("trip_destination_refreshes_total", "Background destination research runs by result.")
+
+METRICS = [
+    NODE_SECONDS, NODE_ERRORS, BRIGHTDATA_SECONDS, BRIGHTDATA_BYTES, BRIGHTDATA_ERRORS, SNAPSHOT_WAIT_SECONDS,
+    SLEEP_SECONDS, LLM_SECONDS, LLM_TOKENS, LLM_COST, CACHE_REQUESTS, RATE_LIMIT_WAIT_SECONDS, RATE_LIMIT_REJECTIONS,
+    DESTINATION_REFRESHES,
+]
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def llm_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    """USD for a call, from per-million-token prices (defaults: gpt-4.1 list prices)."""
+    prompt_price = float(os.getenv("LLM_PROMPT_PRICE_PER_MTOK", "2.0"))
+    completion_price = float(os.getenv("LLM_COMPLETION_PRICE_PER_MTOK", "8.0"))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+# Per-request spans
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Trace:
+    def __init__(self, name: str, trace_id: str | None = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.name = name
+        self.started_at = time.time()
+        self.duration = None
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._ids = 0
+        self.spans: list[dict] = []
+
+    def add(self, span: dict):
+        with self._lock:
+            self._ids += 1
+            span["span_id"] = self._ids
+            self.spans.append(span)
+
+    def offset(self) -> float:
+        return time.perf_counter() - self._start
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start"])
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "spans": spans,
+        }
+
+
+_recent: OrderedDict[str, Trace] = OrderedDict()
+_recent_lock = threading.Lock()
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+
+@contextmanager
+def trace(name: str, trace_id: str | None = None):
+    """Collect the spans of everything run inside the block under one trace id."""
+    current = Trace(name, trace_id)
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        _current_trace.reset(token)
+        current.duration = current.offset()
+        with _recent_lock:
+            _recent[current.trace_id] = current
+            while len(_recent) > int(os.getenv("TRACE_HISTORY", "200")):
+                _recent.popitem(last=False)
+
+
+def get_trace(trace_id: str) -> dict | None:
+    with _recent_lock:
+        found = _recent.get(trace_id)
+    return found.to_dict() if found else None
+
+
+def recent_traces(limit: int = 20) -> list[dict]:
+    with _recent_lock:
+        traces = list(_recent.values())[-limit:]
+    return [t.to_dict() for t in reversed(traces)]
+
+
+@contextmanager
+def span(name: str, metric: Histogram | None = None, labels: dict | None = None, **attrs):
+    """Time the block as a span of the current trace; callers may add to the yielded attrs.
+
+    When `metric` is given the duration is also observed on it with `labels`.
+    """
+    current = _current_trace.get()
+    parent = _current_span.get()
+    record = {"name": name, "parent": parent, "attrs": attrs}
+    token = _current_span.set(name)
+    start = time.perf_counter()
+    record["start"] = current.offset() if current else 0.0
+    try:
+        yield attrs
+    except BaseException as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        record["duration"] = time.perf_counter() - start
+        if metric is not None:
+            metric.observe(record["duration"], **(labels or {}))
+        if current is not None:
+            current.add(record)
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from backend.utils.deadline import DeadlineExceeded
+
+
+class _LeaderGone(Exception):
+    """The caller running the shared work gave up on it; a waiting caller takes over."""
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the work; everyone arriving while it is
+    still in flight waits for and shares its result (or exception). Sync and
+    async callers can share the same in-flight call. When the leader itself
+    is cancelled or runs out of its own time, the others are not failed with
+    it: one of them runs the work again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[str, Future] = {}
+
+    def _join(self, key: str) -> tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    def _finish(self, key: str, future: Future):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def _abandon(self, key: str, future: Future):
+        # Unregister first, so the woken followers elect a new leader.
+        self._finish(key, future)
+        future.set_exception(_LeaderGone())
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key: str, fn):
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                return future.result()
+            except _LeaderGone:
+                continue
+        try:
+            result = fn()
+        except DeadlineExceeded:
+            self._abandon(key, future)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._finish(key, future)
+
+    async def ado(self, key: str, afn):
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                # shield() keeps a cancelled follower from cancelling the shared call.
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except _LeaderGone:
+                continue
+        try:
+            result = await afn()
+        except (asyncio.CancelledError, DeadlineExceeded):
+            self._abandon(key, future)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._finish(key, future)
@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import copy
+import itertools
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(__file__), "recordings")
+
+# Dataset ids used by backend/data_sources/web_operations.py.
+REDDIT_POSTS_DATASET = "gd_lvz8ah06191smkebj4"
+REDDIT_COMMENTS_DATASET = "gd_lvzdpsdlw09j6t702"
+
+
+@dataclass
+class FakeBrightDataConfig:
+    """Latency (seconds) added to each kind of response, and how long a snapshot stays "running"."""
+
+    serp_latency: float = 0.3
+    trigger_latency: float = 0.1
+    progress_latency: float = 0.05
+    snapshot_latency: float = 0.2
+    snapshot_ready_after: float = 2.0
+    recordings_dir: str = RECORDINGS_DIR
+
+
+def _load(recordings_dir: str, name: str):
+    with open(os.path.join(recordings_dir, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+class FakeBrightData:
+    """Local HTTP stand-in for the Bright Data API that replays recorded responses.
+
+    SERP requests return the recorded Google or Bing page. Triggers create a
+    snapshot that reports "running" until `snapshot_ready_after` has passed
+    and then downloads the recorded Reddit posts or comments, tagged with
+    the inputs of the trigger. Point the backend at it with
+    BRIGHTDATA_API_BASE=fake.url.
+    """
+
+    def __init__(self, config: FakeBrightDataConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeBrightDataConfig()
+        self.recordings = {
+            "google": _load(self.config.recordings_dir, "serp_google.json"),
+            "bing": _load(self.config.recordings_dir, "serp_bing.json"),
+            REDDIT_POSTS_DATASET: _load(self.config.recordings_dir, "reddit_posts.json"),
+            REDDIT_COMMENTS_DATASET: _load(self.config.recordings_dir, "reddit_comments.json"),
+        }
+        self.counts = {"serp": 0, "trigger": 0, "progress": 0, "snapshot": 0}
+        self._snapshots: dict[str, tuple[float, list]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeBrightData":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-brightdata", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, kind: str):
+        with self._lock:
+            self.counts[kind] += 1
+
+    def serp(self, target_url: str) -> dict:
+        self._count("serp")
+        time.sleep(self.config.serp_latency)
+        engine = "bing" if "bing.com" in target_url else "google"
+        return self.recordings[engine]
+
+    def trigger(self, dataset_id: str, inputs: list[dict]) -> dict:
+        self._count("trigger")
+        time.sleep(self.config.trigger_latency)
+        template = self.recordings.get(dataset_id, [])
+        records = []
+        # Spread the recorded records over the inputs and echo each input back,
+        # like Bright Data does, so batched snapshots can be split per request.
+        for i, record in enumerate(template):
+            inputs_for_record = inputs[i % len(inputs)] if inputs else {}
+            record = copy.deepcopy(record)
+            record["input"] = inputs_for_record
+            if dataset_id == REDDIT_COMMENTS_DATASET and inputs_for_record.get("url"):
+                record["url"] = f"{inputs_for_record['url'].rstrip('/')}/comment/{record.get('comment_id')}/"
+            records.append(record)
+        snapshot_id = f"s_fake_{next(self._ids)}"
+        with self._lock:
+            self._snapshots[snapshot_id] = (time.monotonic() + self.config.snapshot_ready_after, records)
+        return {"snapshot_id": snapshot_id}
+
+    def progress(self, snapshot_id: str) -> dict:
+        self._count("progress")
+        time.sleep(self.config.progress_latency)
+        with self._lock:
+            snapshot = self._snapshots.get(snapshot_id)
+        if snapshot is None:
+            return {"status": "failed"}
+        return {"status": "ready" if time.monotonic() >= snapshot[0] else "running"}
+
+    def snapshot(self, snapshot_id: str):
+        self._count("snapshot")
+        time.sleep(self.config.snapshot_latency)
+        with self._lock:
+            snapshot = self._snapshots.get(snapshot_id)
+        return snapshot[1] if snapshot else None
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, body, status: int = 200, lines: bool = False):
+                if lines:
+                    payload = "".join(json.dumps(record) + "\n" for record in body).encode("utf-8")
+                else:
+                    payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/x-ndjson" if lines else "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"null")
+
+            def do_POST(self):
+                parts = urlsplit(self.path)
+                if parts.path == "/request":
+                    return self._reply(fake.serp((self._body() or {}).get("url", "")))
+                if parts.path == "/datasets/v3/trigger":
+                    dataset_id = parse_qs(parts.query).get("dataset_id", [""])[0]
+                    return self._reply(fake.trigger(dataset_id, self._body() or []))
+                self._reply({"error": "not found"}, 404)
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                if parts.path.startswith("/datasets/v3/progress/"):
+                    return self._reply(fake.progress(parts.path.rsplit("/", 1)[1]))
+                if parts.path.startswith("/datasets/v3/snapshot/"):
+                    records = fake.snapshot(parts.path.rsplit("/", 1)[1])
+                    if records is None:
+                        return self._reply({"error": "unknown snapshot"}, 404)
+                    fmt = parse_qs(parts.query).get("format", ["json"])[0]
+                    return self._reply(records, lines=fmt in ("ndjson", "jsonl"))
+                self._reply({"error": "not found"}, 404)
+
+        return Handler
@@ -0,0 +1,123 @@
+import re
+import time
+import asyncio
+from typing import Any, Iterator, AsyncIterator
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from backend.models.trip_request import Triprequest, RedditURLAnalysis
+
+_WORDS = (
+    "Day one: start early at the old town and the central market, then lunch at a local food hall. "
+    "Day two: museums in the morning, a walking tour after lunch and sunset from the castle hill. "
+    "Budget tip: public transport passes and set lunch menus keep costs down. "
+).split()
+
+
+def _text(message) -> str:
+    if isinstance(message, BaseMessage):
+        return str(message.content)
+    if isinstance(message, dict):
+        return str(message.get("content", ""))
+    return str(message)
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model stand-in with a fixed time to first token and a token throughput.
+
+    Replies are `completion_tokens` words long and stream word by word, so
+    graph timings behave like a real provider without any network calls.
+    Structured output returns a Triprequest parsed locally from the question
+    or the Reddit URLs found in the prompt.
+    """
+
+    latency: float = 0.5
+    tokens_per_second: float = 80.0
+    completion_tokens: int = 150
+    model_name: str = "fake-chat-model"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def _reply(self, messages) -> AIMessage:
+        words = [_WORDS[i % len(_WORDS)] for i in range(self.completion_tokens)]
+        prompt_tokens = sum(len(_text(m)) for m in messages) // 4
+        return AIMessage(
+            content=" ".join(words),
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": self.completion_tokens,
+                "total_tokens": prompt_tokens + self.completion_tokens,
+            },
+        )
+
+    def _generation_time(self) -> float:
+        return self.latency + self.completion_tokens / self.tokens_per_second
+
+    def _generate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._generation_time())
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self._generation_time())
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    def _chunks(self, messages):
+        words = self._reply(messages).content.split(" ")
+        for i, word in enumerate(words):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for chunk in self._chunks(messages):
+            time.sleep(1 / self.tokens_per_second)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(messages):
+            await asyncio.sleep(1 / self.tokens_per_second)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    def _structured(self, schema, messages):
+        prompt = " ".join(_text(m) for m in messages)
+        if schema is RedditURLAnalysis:
+            urls = list(dict.fromkeys(re.findall(r"https://www\.reddit\.com/r/\S+?/comments/\S+?/", prompt)))
+            return RedditURLAnalysis(selected_urls=urls[:5])
+        if schema is Triprequest:
+            from backend.agent.trip_parser import parse_trip_request
+
+            trip_request, _ = parse_trip_request(_text(messages[-1]))
+            return trip_request or Triprequest(destination="Lisbon", days=4, interests=["food"])
+        raise ValueError(f"FakeChatModel cannot produce {schema}")
+
+    def with_structured_output(self, schema, **kwargs):
+        # Structured replies are short: pay the first-token latency plus a few tokens.
+        delay = self.latency + 20 / self.tokens_per_second
+
+        def invoke(messages):
+            time.sleep(delay)
+            return self._structured(schema, messages)
+
+        async def ainvoke(messages):
+            await asyncio.sleep(delay)
+            return self._structured(schema, messages)
+
+        return RunnableLambda(invoke, afunc=ainvoke, name=f"fake_structured_{getattr(schema, '__name__', 'schema')}")
+
+
+def install(**settings):
+    """Make init_chat_model() return a FakeChatModel; call before importing the backend."""
+    import langchain.chat_models
+
+    def fake_init_chat_model(model: str | None = None, **kwargs):
+        return FakeChatModel(model_name=model or "fake-chat-model", **settings)
+
+    langchain.chat_models.init_chat_model = fake_init_chat_model
+    return fake_init_chat_model
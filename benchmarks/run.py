@@ -0,0 +1,185 @@
+"""Offline load driver for the trip planner.
+
+Starts the fake Bright Data server, swaps the chat model for FakeChatModel
+and drives either graph.invoke() or POST /ask, reporting latency
+percentiles, throughput and memory. Nothing leaves the machine.
+
+    python -m benchmarks.run --target both --requests 40 --concurrency 8
+    python -m benchmarks.run --target ask --max-p95 12   # exit 1 when p95 regresses
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks import fake_llm
+from benchmarks.fake_brightdata import FakeBrightData, FakeBrightDataConfig
+
+QUESTIONS = [
+    "Plan a 3-day trip to Lisbon, interested in food and history",
+    "5 days in Tokyo for $3000, love food and culture",
+    "A week in Barcelona with a budget of 2000, into art and nightlife",
+    "4 days in Rome, interested in history and architecture",
+    "Weekend getaway to Paris, love museums and cafes",
+    "10 days in Thailand, beaches and snorkeling",
+    "6 days in Kyoto, temples and food",
+    "3 days in Prague on a budget, into history and beer",
+]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def summarize(name: str, latencies: list[float], errors: int, wall: float) -> dict:
+    return {
+        "target": name,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "throughput_rps": (len(latencies) / wall) if wall else 0.0,
+        "wall_seconds": wall,
+        # ru_maxrss is KiB on Linux.
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak_traced_mb": tracemalloc.get_traced_memory()[1] / 2**20 if tracemalloc.is_tracing() else None,
+    }
+
+
+def _question(i: int) -> str:
+    return QUESTIONS[i % len(QUESTIONS)]
+
+
+def bench_graph(graph, requests: int, concurrency: int) -> dict:
+    from backend.utils.helpers import initial_state
+    from backend.nodes.checkpoints import invoke_plan
+
+    latencies, errors = [], 0
+
+    def one(i):
+        started = time.perf_counter()
+        invoke_plan(graph, initial_state(_question(i)))
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(one, i) for i in range(requests)]:
+            try:
+                latencies.append(future.result())
+            except Exception as e:
+                print(f"graph.invoke failed: {e}", file=sys.stderr)
+                errors += 1
+    return summarize("graph.invoke", latencies, errors, time.perf_counter() - started)
+
+
+async def bench_ask(app, requests: int, concurrency: int) -> dict:
+    import httpx
+
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(client, i):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post("/ask", json={"user_question": _question(i)})
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await asyncio.gather(*(one(client, i) for i in range(requests)))
+    return summarize("/ask", latencies, errors, time.perf_counter() - started)
+
+
+def configure_environment(fake: FakeBrightData, with_caches: bool, cache_dir: str):
+    os.environ["BRIGHTDATA_API_BASE"] = fake.url
+    os.environ.setdefault("BRIGHTDATA_API_KEY", "bench")
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ["TRIP_PLANNER_CACHE_DIR"] = cache_dir
+    os.environ["JOBS_WORKERS"] = "0"
+    if not with_caches:
+        # Measure the pipeline itself, not repeated questions served from cache.
+        os.environ["SEARCH_CACHE_ENABLED"] = "0"
+        os.environ["LLM_CACHE_BACKEND"] = "none"
+        os.environ["ANSWER_CACHE_ENABLED"] = "0"
+        os.environ["ASK_COALESCING_ENABLED"] = "0"
+        os.environ["SNAPSHOT_REUSE_ENABLED"] = "0"
+        os.environ["DESTINATION_KB_ENABLED"] = "0"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline trip planner benchmark")
+    parser.add_argument("--target", choices=("graph", "ask", "both"), default="both")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Fake model time to first token (s)")
+    parser.add_argument("--llm-tps", type=float, default=80.0, help="Fake model tokens per second")
+    parser.add_argument("--llm-tokens", type=int, default=150, help="Fake model completion length")
+    parser.add_argument("--serp-latency", type=float, default=0.3)
+    parser.add_argument("--trigger-latency", type=float, default=0.1)
+    parser.add_argument("--progress-latency", type=float, default=0.05)
+    parser.add_argument("--snapshot-latency", type=float, default=0.2)
+    parser.add_argument("--snapshot-ready-after", type=float, default=2.0)
+    parser.add_argument("--with-caches", action="store_true", help="Keep the search/LLM/answer caches, snapshot reuse and the destination knowledge base on")
+    parser.add_argument("--trace-memory", action="store_true", help="Also report the tracemalloc peak (slower)")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--max-p95", type=float, help="Exit 1 when any target's p95 exceeds this (s)")
+    args = parser.parse_args(argv)
+
+    fake = FakeBrightData(FakeBrightDataConfig(
+        serp_latency=args.serp_latency,
+        trigger_latency=args.trigger_latency,
+        progress_latency=args.progress_latency,
+        snapshot_latency=args.snapshot_latency,
+        snapshot_ready_after=args.snapshot_ready_after,
+    )).start()
+    fake_llm.install(latency=args.llm_latency, tokens_per_second=args.llm_tps, completion_tokens=args.llm_tokens)
+    configure_environment(fake, args.with_caches, tempfile.mkdtemp(prefix="trip-bench-"))
+    if args.trace_memory:
+        tracemalloc.start()
+
+    # Imported only now so the backend picks up the fake model and API base.
+    from backend.app import app
+    from backend.nodes.graph import get_graph
+
+    results = []
+    try:
+        if args.target in ("graph", "both"):
+            results.append(bench_graph(get_graph(), args.requests, args.concurrency))
+        if args.target in ("ask", "both"):
+            results.append(asyncio.run(bench_ask(app, args.requests, args.concurrency)))
+    finally:
+        fake.stop()
+
+    print(f"\n{'target':<14}{'reqs':>6}{'err':>5}{'p50':>8}{'p95':>8}{'p99':>8}{'req/s':>8}{'rss MB':>9}")
+    for r in results:
+        print(f"{r['target']:<14}{r['requests']:>6}{r['errors']:>5}{r['p50']:>8.2f}{r['p95']:>8.2f}"
+              f"{r['p99']:>8.2f}{r['throughput_rps']:>8.2f}{r['peak_rss_mb']:>9.1f}")
+    print(f"Bright Data calls: {fake.counts}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "brightdata_calls": fake.counts, "args": vars(args)}, f, indent=2)
+
+    if args.max_p95 is not None and any(r["p95"] > args.max_p95 or r["errors"] for r in results):
+        print(f"❌ p95 above {args.max_p95}s or errors seen")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
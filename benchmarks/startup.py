@@ -0,0 +1,96 @@
+"""Cold-start import profiler for the API.
+
+Imports a module in fresh interpreters with `python -X importtime`, reports
+the median wall time and the slowest imports, and fails when startup goes
+over the budget, so a heavy import creeping back in shows up in CI.
+
+    python -m benchmarks.startup                       # backend.app, budget STARTUP_BUDGET_SECONDS
+    python -m benchmarks.startup --budget 0.8 --top 15
+    python -m benchmarks.startup --module backend.nodes.graph
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, float]]:
+    """(module, nesting depth, cumulative seconds) for every line of -X importtime output."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, module = line[len("import time:"):].split("|", 2)
+        # One space after the bar for a top-level import, two more per nesting level.
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        imports.append((module.strip(), depth, int(cumulative_us) / 1e6))
+    return imports
+
+
+def measure(module: str) -> tuple[float, list[tuple[str, int, float]]]:
+    """Wall time to import `module` in a new interpreter, plus its import breakdown."""
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {module}; "
+        "print(time.perf_counter() - started)"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [PROJECT_ROOT, os.getenv("PYTHONPATH")]))}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=PROJECT_ROOT, env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return float(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure API cold-start import time")
+    parser.add_argument("--module", default="backend.app")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time (median is reported)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest packages to list")
+    parser.add_argument("--budget", type=float, default=float(os.getenv("STARTUP_BUDGET_SECONDS", "1.0")),
+                        help="Exit 1 when the median import time exceeds this (s)")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args(argv)
+
+    timings, imports = [], []
+    for _ in range(max(args.runs, 1)):
+        seconds, imports = measure(args.module)
+        timings.append(seconds)
+    median = statistics.median(timings)
+
+    # Charge each package the cumulative time of the imports where another
+    # package pulled it in. importtime lists children before their parent,
+    # so walk the lines backwards to see parents first.
+    roots, parents = {}, {}
+    for module, depth, cumulative in reversed(imports):
+        root = module.split(".")[0]
+        if parents.get(depth - 1) != root:
+            roots[root] = roots.get(root, 0.0) + cumulative
+        parents[depth] = root
+    slowest = sorted(roots.items(), key=lambda item: item[1], reverse=True)[:args.top]
+
+    print(f"import {args.module}: median {median:.3f}s over {len(timings)} run(s) "
+          f"(min {min(timings):.3f}s, max {max(timings):.3f}s), budget {args.budget:.3f}s")
+    print(f"\n{'package':<32}{'cumulative s':>14}")
+    for root, cumulative in slowest:
+        print(f"{root:<32}{cumulative:>14.3f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"module": args.module, "timings": timings, "median": median,
+                       "budget": args.budget, "slowest": slowest}, f, indent=2)
+
+    if median > args.budget:
+        print(f"❌ Startup {median:.3f}s is over the {args.budget:.3f}s budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
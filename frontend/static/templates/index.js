@@ -54,6 +54,49 @@ function animateMarkdown(element, markdownText) {
   }, speed);
 }
 
+// Human-readable progress for each graph node
+const NODE_LABELS = {
+  extract_trip_parameters: "Understanding your trip",
+  lookup_answer_cache: "Checking recent plans",
+  google_search: "Searching Google",
+  bing_search: "Searching Bing",
+  merge_web_results: "Merging Google and Bing results",
+  reddit_search: "Searching Reddit",
+  analyze_reddit_posts: "Picking Reddit threads",
+  retrieve_reddit_posts: "Reading Reddit comments",
+  analyze_google_results: "Analyzing Google results",
+  analyze_bing_results: "Analyzing Bing results",
+  analyze_web_results: "Analyzing web results",
+  analyze_reddit_results: "Analyzing Reddit discussions",
+  synthesize_analyses: "Writing your plan"
+};
+
+// Parse one SSE frame into {event, data}
+function parseEvent(frame) {
+  let event = "message";
+  let data = "";
+  for (const line of frame.split("\n")) {
+    if (line.startsWith("event:")) event = line.slice(6).trim();
+    else if (line.startsWith("data:")) data += line.slice(5).trim();
+  }
+  return { event, data: data ? JSON.parse(data) : null };
+}
+
+// Message for a request refused before streaming started (e.g. 429 while upstreams are saturated)
+async function refusalMessage(response) {
+  let detail = `Request failed (${response.status})`;
+  if ((response.headers.get("Content-Type") || "").includes("application/json")) {
+    const body = await response.json();
+    if (typeof body.detail === "string") detail = body.detail;
+    else if (body.detail && body.detail.error) detail = body.detail.error;
+  }
+  const retryAfter = response.headers.get("Retry-After");
+  if (response.status === 429 && retryAfter) {
+    detail += ` Please try again in ${retryAfter}s.`;
+  }
+  return `❌ ${detail}`;
+}
+
 // Send message
 async function sendMessage() {
   const text = userInput.value.trim();
@@ -62,17 +105,58 @@ async function sendMessage() {
   userInput.value = "";
 
   const typingElement = addTyping();
+  let answer = "";
 
   try {
-    const response = await fetch("http://127.0.0.1:8000/ask", {
+    const response = await fetch("http://127.0.0.1:8000/ask/stream", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({ user_question: text })
     });
 
-    const data = await response.json();
-    const answer = data.final_answer || "No response";
-    animateMarkdown(typingElement, answer);
+    const contentType = response.headers.get("Content-Type") || "";
+    if (!response.ok || !contentType.includes("text/event-stream")) {
+      typingElement.innerText = await refusalMessage(response);
+      return;
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+        const frame = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        if (frame.startsWith(":")) continue;
+
+        const { event, data } = parseEvent(frame);
+        if (event === "node" && !answer) {
+          typingElement.innerText = `⏳ ${NODE_LABELS[data.node] || data.node}...`;
+        } else if (event === "token") {
+          answer += data.content;
+          typingElement.innerText = answer;
+          chatContainer.scrollTop = chatContainer.scrollHeight;
+        } else if (event === "final") {
+          const finalAnswer = data.final_answer || answer || "No response";
+          if (answer) {
+            typingElement.innerHTML = marked.parse(finalAnswer);
+          } else {
+            animateMarkdown(typingElement, finalAnswer);
+          }
+        } else if (event === "error") {
+          typingElement.innerText = `❌ ${data.detail}`;
+          if (data.retry_after) {
+            typingElement.innerText += ` Please try again in ${Math.ceil(data.retry_after)}s.`;
+          }
+        }
+      }
+    }
 
   } catch (err) {
     typingElement.innerText = "❌ Error connecting to backend";
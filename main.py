@@ -1,8 +1,11 @@
-from dotenv import load_dotenv
-from backend.nodes.graph import build_graph
-
-load_dotenv()
-graph = build_graph()
+import os
+import json
+import asyncio
+import argparse
+from backend.nodes.graph import get_graph
+from backend.nodes.checkpoints import invoke_plan
+from backend.utils.helpers import initial_state
+from backend.jobs.batch import load_queries, run_batch
 
 def run_chatbot():
     print("AI-Agent Travel Planner")
@@ -14,29 +17,38 @@ def run_chatbot():
             print("Bye......")
             break
         
-        state={
-            "messages":[{"role":"user","content":user_input}],
-            "user_question":user_input,
-            "trip_request":None,
-            "google_results": None,
-            "bing_results": None,
-            "reddit_results": None,
-            "selected_reddit_urls": None,
-            "reddit_post_data": None,
-            "google_analysis": None,
-            "bing_analysis": None,
-            "reddit_analysis": None,
-            "final_answer": None
-        }
+        state=initial_state(user_input)
 
         print("\n Starting Parallel research process...")
         print("\n Launching Google, Bing, and Reddit seaches ....\n")
-        final_state=graph.invoke(state)
+        final_state=invoke_plan(get_graph(), state)
 
         if final_state.get("final_answer"):
             print(f"\n Final Answer:\n{final_state.get('final_answer')}\n")
 
         print("-"* 80)
 
+def run_batch_file(path, output=None, concurrency=None):
+    with open(path, encoding="utf-8") as f:
+        queries=load_queries(f)
+
+    print(f"Planning {len(queries)} trips in batch mode...")
+    results=asyncio.run(run_batch(get_graph(), queries, concurrency))
+
+    output=output or os.path.splitext(path)[0]+".results.jsonl"
+    with open(output, "w", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result)+"\n")
+    print(f"Wrote {len(results)} plans to {output}")
+
 if __name__=="__main__":
-    run_chatbot()
+    parser=argparse.ArgumentParser(description="AI-Agent Travel Planner")
+    parser.add_argument("--batch", help="JSONL file of questions to plan non-interactively")
+    parser.add_argument("--output", help="Batch results file (default: <batch file>.results.jsonl)")
+    parser.add_argument("--concurrency", type=int, help="Plans run at once in batch mode (default BATCH_CONCURRENCY or 16)")
+    args=parser.parse_args()
+
+    if args.batch:
+        run_batch_file(args.batch, args.output, args.concurrency)
+    else:
+        run_chatbot()
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Response
+
+from backend import app as api
+from backend.nodes import checkpoints
+
+
+class _FailingGraph:
+    checkpointer = None
+
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.runs = []
+
+    def invoke(self, state, config):
+        self.runs.append(config["configurable"]["thread_id"])
+        raise RuntimeError("upstream exploded")
+
+    async def ainvoke(self, state, config):
+        self.runs.append(config["configurable"]["thread_id"])
+        await self.gate.wait()
+        raise RuntimeError("upstream exploded")
+
+
+def test_failed_run_is_tagged_with_its_run_id():
+    with pytest.raises(RuntimeError) as raised:
+        checkpoints.invoke_plan(_FailingGraph(), {}, "run-1")
+
+    assert checkpoints.failed_run(raised.value, "other") == "run-1"
+    assert checkpoints.failed_run(RuntimeError(), "other") == "other"
+
+
+def test_coalesced_caller_reports_the_shared_run(monkeypatch):
+    graph = _FailingGraph()
+
+    async def get_graph():
+        return graph
+
+    monkeypatch.setattr(api, "get_graph", get_graph)
+    monkeypatch.setenv("ASK_COALESCING_ENABLED", "1")
+
+    async def ask_twice():
+        graph.gate = asyncio.Event()
+        query = api.Userquery(user_question="Plan a 3 day trip to Rome")
+        leader = asyncio.create_task(api.ask_question(query, Response()))
+        await asyncio.sleep(0.05)
+        follower = asyncio.create_task(api.ask_question(query, Response()))
+        await asyncio.sleep(0.05)
+        graph.gate.set()
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    errors = asyncio.run(ask_twice())
+
+    assert graph.runs and len(graph.runs) == 1
+    for error in errors:
+        assert isinstance(error, HTTPException)
+        assert error.detail["run_id"] == graph.runs[0]
+        assert error.headers["X-Run-Id"] == graph.runs[0]
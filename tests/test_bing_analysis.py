@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from backend.agent import serp_merge
+from backend.nodes import node_functions
+
+GOOGLE = {"knowledge": {}, "organic": [{"title": "Rome food guide", "link": "https://a.com/rome", "description": "Eat"}]}
+
+
+class _ChatModel:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, messages, *args, **kwargs):
+        self.calls += 1
+        return AIMessage(content="bing analysis")
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        return self.invoke(messages)
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = _ChatModel()
+    monkeypatch.setattr(node_functions, "get_chat_model", lambda: model)
+    return model
+
+
+def _state(bing_results):
+    return {
+        "user_question": "Plan a 3 day trip to Rome",
+        "google_results": GOOGLE,
+        "bing_results": bing_results,
+        "web_results": serp_merge.merge_serp_results({"google": GOOGLE, "bing": bing_results}),
+    }
+
+
+@pytest.mark.parametrize("analyze", [
+    node_functions.analyze_bing_results,
+    lambda state: asyncio.run(node_functions.aanalyze_bing_results(state)),
+])
+def test_bing_results_all_found_by_google_are_not_analyzed_again(monkeypatch, model, analyze):
+    monkeypatch.setenv("WEB_ANALYSIS_MODE", "unique")
+
+    result = analyze(_state(GOOGLE))
+
+    assert result == {"bing_analysis": node_functions.NO_UNIQUE_RESULTS}
+    assert model.calls == 0
+
+
+@pytest.mark.parametrize("analyze", [
+    node_functions.analyze_bing_results,
+    lambda state: asyncio.run(node_functions.aanalyze_bing_results(state)),
+])
+def test_separate_mode_never_reports_bing_as_covered_by_google(monkeypatch, model, analyze):
+    monkeypatch.setenv("WEB_ANALYSIS_MODE", "separate")
+
+    result = analyze(_state({"knowledge": {}, "organic": []}))
+
+    assert result == {"bing_analysis": "bing analysis"}
+    assert model.calls == 1
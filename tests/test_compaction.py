@@ -0,0 +1,30 @@
+import threading
+
+from backend.agent import compaction
+
+
+def test_count_tokens_estimates_while_the_tokenizer_loads(monkeypatch):
+    release = threading.Event()
+    loads = []
+
+    def slow_load():
+        loads.append(1)
+        release.wait(5)
+
+    monkeypatch.setattr(compaction, "_encoder", None)
+    monkeypatch.setattr(compaction, "_load_started", False)
+    monkeypatch.setattr(compaction, "load_tokenizer", slow_load)
+
+    text = "x" * 400
+    assert compaction.count_tokens(text) == 101
+    assert compaction.count_tokens(text) == 101
+    release.set()
+    assert loads == [1]
+
+
+def test_tokenizer_can_be_switched_off(monkeypatch):
+    monkeypatch.setattr(compaction, "_encoder", None)
+    monkeypatch.setenv("TOKENIZER_ENCODING", "none")
+
+    assert compaction.load_tokenizer() is False
+    assert compaction.count_tokens("abcd" * 10) == 11
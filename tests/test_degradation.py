@@ -0,0 +1,50 @@
+from langchain_core.messages import AIMessage
+
+from backend.nodes import node_functions
+from backend.nodes.graph import build_graph
+from backend.utils.deadline import DegradationPolicy
+from backend.utils.helpers import initial_state
+
+SERP = {"knowledge": {}, "organic": [{"title": "Rome food guide", "link": "https://a.com/rome", "description": "Eat"}]}
+
+
+class _ChatModel:
+    """Answers every prompt and remembers the last one."""
+
+    prompt = None
+
+    def invoke(self, messages, *args, **kwargs):
+        self.prompt = messages[-1]["content"]
+        return AIMessage(content="plan")
+
+
+def _plan(monkeypatch, synthesis_timeout):
+    model = _ChatModel()
+    monkeypatch.setattr(node_functions, "get_chat_model", lambda: model)
+    monkeypatch.setattr(node_functions, "handle_extract_trip_parameters", lambda question: None)
+    monkeypatch.setattr(node_functions, "google_search_api", lambda query: SERP)
+    monkeypatch.setattr(node_functions, "bing_search_api", lambda query: SERP)
+    monkeypatch.setenv("ANSWER_CACHE_ENABLED", "0")
+    monkeypatch.setenv("DESTINATION_KB_ENABLED", "0")
+
+    graph = build_graph(DegradationPolicy(), checkpointer=False)
+    state = graph.invoke(initial_state("Plan a 3 day trip to Rome for food", synthesis_timeout, time_budget=0))
+    return state, model.prompt
+
+
+def test_budget_below_the_policy_minimums_reports_the_skipped_steps(monkeypatch):
+    state, prompt = _plan(monkeypatch, synthesis_timeout=4)
+
+    assert state["final_answer"] == "plan"
+    assert set(state["skipped_steps"]) == {
+        "analyze_google_results", "analyze_bing_results",
+        "reddit_search", "analyze_reddit_posts", "retrieve_reddit_posts", "analyze_reddit_results",
+    }
+    assert "Research was cut short" in prompt
+    assert "reddit_search" in prompt
+
+
+def test_resumed_run_does_not_repeat_skipped_steps():
+    assert node_functions.add_unique(["reddit_search"], ["reddit_search", "analyze_google_results"]) == [
+        "reddit_search", "analyze_google_results",
+    ]
@@ -0,0 +1,38 @@
+from backend.agent import destination_kb
+from backend.utils.cache import SQLiteCache
+
+
+def _research_state(comments=500):
+    return {
+        "google_analysis": "google", "bing_analysis": "bing", "reddit_analysis": "reddit",
+        "web_results": {"organic": [
+            {"title": f"Result {i}", "link": f"https://example.com/{i}", "description": "x " * 200}
+            for i in range(200)
+        ]},
+        "reddit_post_data": {"comments": [
+            {"comment_id": f"c{i}", "content": f"comment {i} " + "y " * 100, "date": "2024-05-01"}
+            for i in range(comments)
+        ]},
+    }
+
+
+def test_stored_research_is_compacted(tmp_path, monkeypatch):
+    store = SQLiteCache(str(tmp_path / "kb.sqlite3"), table="destinations", ttl=3600)
+    monkeypatch.setattr(destination_kb, "get_destination_store", lambda: store)
+    state = _research_state()
+
+    assert destination_kb.store("Tokyo", state)
+    entry = store.get("tokyo")
+
+    assert entry["reddit_analysis"] == "reddit"
+    assert isinstance(entry["web_results"], str) and entry["web_results"].startswith("- Result 0")
+    assert isinstance(entry["reddit_post_data"], str)
+    assert len(entry["web_results"]) + len(entry["reddit_post_data"]) < len(str(state)) / 10
+
+
+def test_incomplete_research_keeps_the_previous_entry(tmp_path, monkeypatch):
+    store = SQLiteCache(str(tmp_path / "kb.sqlite3"), table="destinations", ttl=3600)
+    monkeypatch.setattr(destination_kb, "get_destination_store", lambda: store)
+
+    assert not destination_kb.store("Tokyo", {**_research_state(), "bing_analysis": None})
+    assert store.get("tokyo") is None
@@ -0,0 +1,21 @@
+import pytest
+
+from backend.utils.helpers import env_flag
+
+
+@pytest.mark.parametrize("value, default, expected", [
+    (None, True, True),
+    (None, False, False),
+    ("1", False, True),
+    ("yes", False, True),
+    ("0", True, False),
+    ("False", True, False),
+    (" no ", True, False),
+    ("off", True, False),
+])
+def test_env_flag(monkeypatch, value, default, expected):
+    if value is None:
+        monkeypatch.delenv("SOME_FEATURE_ENABLED", raising=False)
+    else:
+        monkeypatch.setenv("SOME_FEATURE_ENABLED", value)
+    assert env_flag("SOME_FEATURE_ENABLED", default) is expected
@@ -0,0 +1,124 @@
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from backend.data_sources import http_client
+from backend.data_sources.rate_limit import Overloaded
+from backend.utils.deadline import deadline_after, deadline_scope
+
+
+@pytest.mark.parametrize("method, status, expected", [
+    ("GET", 503, True),
+    ("GET", 429, True),
+    ("GET", 404, False),
+    ("POST", 429, True),
+    ("POST", 500, False),
+    ("POST", 503, False),
+])
+def test_is_retryable(method, status, expected):
+    assert http_client.is_retryable(method, status) is expected
+
+
+@pytest.fixture
+def server():
+    hits = {"GET": 0, "POST": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self):
+            hits[self.command] += 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        do_GET = do_POST = _reply
+
+        def log_message(self, *args):
+            pass
+
+    httpd = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}/", hits
+    httpd.shutdown()
+
+
+def test_session_does_not_retry_post_on_server_errors(server, monkeypatch):
+    url, hits = server
+    monkeypatch.setenv("BRIGHTDATA_BACKOFF_FACTOR", "0")
+    monkeypatch.setenv("BRIGHTDATA_BACKOFF_JITTER", "0")
+    session = http_client._build_session()
+
+    assert session.post(url, timeout=5).status_code == 503
+    assert session.get(url, timeout=5).status_code == 503
+    assert hits == {"POST": 1, "GET": 4}
+
+
+@pytest.fixture
+def throttled():
+    reply = {"retry_after": "300", "hits": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self):
+            reply["hits"] += 1
+            self.send_response(429)
+            self.send_header("Retry-After", reply["retry_after"])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        do_GET = do_POST = _reply
+
+        def log_message(self, *args):
+            pass
+
+    httpd = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}/", reply
+    httpd.shutdown()
+
+
+def test_long_retry_after_is_not_slept_through(throttled):
+    url, reply = throttled
+    session = http_client._build_session()
+
+    started = time.monotonic()
+    with pytest.raises(Overloaded) as raised:
+        session.get(url, timeout=5)
+    assert time.monotonic() - started < 2
+    assert raised.value.retry_after == 300
+    assert reply["hits"] == 1
+
+
+def test_retry_after_is_capped_by_the_deadline(throttled):
+    url, reply = throttled
+    reply["retry_after"] = "2"
+    session = http_client._build_session()
+
+    with deadline_scope(deadline_after(1)), pytest.raises(Overloaded):
+        session.post(url, timeout=5)
+    assert reply["hits"] == 1
+
+
+def test_short_retry_after_is_honoured(throttled, monkeypatch):
+    url, reply = throttled
+    reply["retry_after"] = "1"
+    monkeypatch.setenv("BRIGHTDATA_MAX_RETRIES", "1")
+
+    assert http_client._build_session().get(url, timeout=5).status_code == 429
+    assert reply["hits"] == 2
+
+
+def test_async_path_hands_back_a_long_retry_after(throttled):
+    url, reply = throttled
+
+    async def call():
+        try:
+            return await http_client.arequest("GET", url)
+        finally:
+            await http_client.aclose_client()
+
+    started = time.monotonic()
+    assert asyncio.run(call()).status_code == 429
+    assert time.monotonic() - started < 2
+    assert reply["hits"] == 1
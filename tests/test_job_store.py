@@ -0,0 +1,43 @@
+import time
+
+from backend.jobs.store import JobStore, QUEUED, RUNNING, FAILED
+
+
+def _store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_options_are_kept_with_the_job(tmp_path):
+    store = _store(tmp_path)
+    job_id = store.create("3 days in Rome", {"time_budget": 90, "run_id": "abc"})
+
+    claimed = store.claim()
+    assert claimed["id"] == job_id
+    assert claimed["options"] == {"time_budget": 90, "run_id": "abc"}
+    assert store.get(job_id)["options"] == {"time_budget": 90, "run_id": "abc"}
+
+
+def test_stale_jobs_fail_after_max_attempts(tmp_path):
+    store = _store(tmp_path)
+    job_id = store.create("3 days in Rome")
+
+    for attempt in range(1, 3):
+        assert store.claim()["attempts"] == attempt - 1
+        time.sleep(0.01)
+        assert store.requeue_stale(0.001, max_attempts=2) == (1 if attempt < 2 else 0)
+
+    job = store.get(job_id)
+    assert job["status"] == FAILED
+    assert "2 times" in job["error"]
+    assert store.claim() is None
+
+
+def test_requeue_without_a_cap(tmp_path):
+    store = _store(tmp_path)
+    job_id = store.create("3 days in Rome")
+    store.claim()
+    time.sleep(0.01)
+
+    assert store.requeue_stale(0.001) == 1
+    assert store.get(job_id)["status"] == QUEUED
+    assert store.count(RUNNING) == 0
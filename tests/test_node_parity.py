@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from backend.agent import llm_wrapper
+from backend.agent.compaction import load_tokenizer
+from backend.models.trip_request import RedditURLAnalysis, Triprequest
+from backend.nodes import node_functions
+from backend.nodes.graph import NODES
+
+POST = "https://reddit.com/r/travel/comments/abc/rome_food"
+SERP = {"knowledge": {}, "organic": [{"title": "Rome food guide", "link": "https://a.com/rome", "description": "Eat"}]}
+
+
+class _ChatModel:
+    def __init__(self, fail=None):
+        self.fail = fail
+
+    def invoke(self, messages, *args, **kwargs):
+        if self.fail:
+            raise self.fail
+        return AIMessage(content=f"analysis of {len(messages)} messages")
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        return self.invoke(messages)
+
+    def with_structured_output(self, schema):
+        model = self
+
+        class _Structured:
+            def invoke(self, messages):
+                if model.fail:
+                    raise model.fail
+                return RedditURLAnalysis(selected_urls=[POST])
+
+            async def ainvoke(self, messages):
+                return self.invoke(messages)
+
+        return _Structured()
+
+
+@pytest.fixture
+def fakes(monkeypatch):
+    model = _ChatModel()
+    monkeypatch.setattr(node_functions, "get_chat_model", lambda: model)
+    monkeypatch.setattr(llm_wrapper, "get_chat_model", lambda: model)
+    monkeypatch.setattr(node_functions, "_store_answer", lambda state, answer: None)
+    posts = {"parsed_posts": [{"title": "Rome food", "url": POST}], "total_found": 1}
+    comments = {"comments": [{"comment_id": "c1", "content": "Try the carbonara", "date": "2024-05-01"}],
+                "total_retrieved": 1}
+
+    async def aresult(value):
+        return value
+
+    for name, value in (("google_search_api", SERP), ("bing_search_api", SERP), ("reddit_search_api", posts)):
+        monkeypatch.setattr(node_functions, name, lambda query, value=value: value)
+        monkeypatch.setattr(node_functions, "a" + name, lambda query, value=value: aresult(value))
+    monkeypatch.setattr(node_functions, "reddit_post_retrieval", lambda urls, ranker=None: comments)
+    monkeypatch.setattr(node_functions, "areddit_post_retrieval", lambda urls, ranker=None: aresult(comments))
+    monkeypatch.setenv("ANSWER_CACHE_ENABLED", "0")
+    monkeypatch.setenv("DESTINATION_KB_ENABLED", "0")
+    # Load (or fail to load) the tokenizer before the logs are compared.
+    load_tokenizer()
+    return model
+
+
+def _state():
+    return {
+        "user_question": "Plan a 3 day trip to Rome for food",
+        "trip_request": Triprequest(destination="Rome", days=3, interests=["food"]),
+        "google_results": SERP,
+        "bing_results": SERP,
+        "web_results": None,
+        "reddit_results": {"parsed_posts": [{"title": "Rome food", "url": POST}]},
+        "selected_reddit_urls": [POST],
+        "reddit_post_data": {"comments": [{"content": "Try the carbonara"}], "total_retrieved": 1},
+        "google_analysis": "google",
+        "bing_analysis": None,
+        "reddit_analysis": "reddit",
+    }
+
+
+def _run_both(name, state, capsys):
+    sync, run_async = NODES[name]
+    capsys.readouterr()
+    sync_result = sync(dict(state))
+    sync_log = capsys.readouterr().out
+    async_result = asyncio.run(run_async(dict(state)))
+    async_log = capsys.readouterr().out
+    return (sync_result, sync_log), (async_result, async_log)
+
+
+@pytest.mark.parametrize("name", sorted(NODES))
+def test_async_node_matches_its_sync_twin(name, fakes, capsys):
+    sync, run_async = _run_both(name, _state(), capsys)
+    assert run_async == sync
+
+
+@pytest.mark.parametrize("name, state", [
+    ("extract_trip_parameters", {"user_question": ""}),
+    ("analyze_reddit_posts", {"user_question": "Rome", "reddit_results": None}),
+    ("retrieve_reddit_posts", {"selected_reddit_urls": []}),
+])
+def test_async_node_matches_its_sync_twin_on_empty_input(name, state, fakes, capsys):
+    sync, run_async = _run_both(name, state, capsys)
+    assert run_async == sync
+
+
+def test_failed_url_selection_falls_back_alike(fakes, capsys):
+    fakes.fail = ValueError("unparseable")
+    sync, run_async = _run_both("analyze_reddit_posts", _state(), capsys)
+    assert sync[0] == {"selected_reddit_urls": []}
+    assert run_async == sync
+
+
+def test_empty_question_has_no_trip_request():
+    assert llm_wrapper.handle_extract_trip_parameters("") is None
+    assert asyncio.run(llm_wrapper.ahandle_extract_trip_parameters("")) is None
@@ -0,0 +1,33 @@
+import random
+
+from backend.agent.ranking import CommentRanker, simhash, tokenize
+
+
+def _comment(text):
+    return {"content": text}
+
+
+def test_near_duplicates_are_dropped():
+    ranker = CommentRanker({"ramen"}, top_n=5, token_budget=10_000)
+    ranker.extend([
+        _comment("the ramen at ichiran in shibuya was worth the long queue at night"),
+        _comment("the ramen at ichiran in shibuya was worth the long queue at night!"),
+        _comment("skip the tourist ramen and go to a tiny standing bar in shinjuku"),
+    ])
+
+    assert [c["content"][-5:] for c in ranker.results()] == ["night", "njuku"]
+
+
+def test_band_buckets_find_every_pooled_near_duplicate():
+    random.seed(7)
+    words = [f"w{i}" for i in range(60)]
+    ranker = CommentRanker(set(words[:10]), top_n=10)
+    for _ in range(2000):
+        ranker.add(_comment(" ".join(random.choices(words, k=random.randint(3, 12)))))
+        pooled = [entry[5] for entry in ranker._pool]
+        assert sorted(f for bucket in ranker._buckets.values() for f in bucket) == sorted(pooled * len(ranker._bands))
+
+    for _ in range(200):
+        fingerprint = simhash(tokenize(" ".join(random.choices(words, k=random.randint(3, 12)))))
+        full_scan = any(ranker._near_duplicate(fingerprint, other) for other in pooled)
+        assert ranker._pooled_near_duplicate(fingerprint) == full_scan
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.data_sources import rate_limit
+from backend.data_sources.rate_limit import BATCH, INTERACTIVE, RateLimiter
+from backend.utils.deadline import DeadlineExceeded, deadline_after, deadline_scope
+
+
+def _wait_until(condition, timeout=2.0):
+    stop = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < stop, "timed out"
+        time.sleep(0.005)
+
+
+def _queue_call(limiter, name, admitted):
+    def call():
+        with rate_limit.priority(name), limiter.limit():
+            admitted.append(name)
+
+    thread = threading.Thread(target=call, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_interactive_calls_overtake_queued_batch_calls():
+    limiter = RateLimiter("test", rate=0, max_concurrency=1)
+    admitted = []
+    limiter.acquire()
+    threads = [_queue_call(limiter, BATCH, admitted)]
+    _wait_until(lambda: limiter.stats()["queued"][BATCH] == 1)
+    threads.append(_queue_call(limiter, BATCH, admitted))
+    _wait_until(lambda: limiter.stats()["queued"][BATCH] == 2)
+    threads.append(_queue_call(limiter, INTERACTIVE, admitted))
+    _wait_until(lambda: limiter.stats()["queued"][INTERACTIVE] == 1)
+
+    limiter._release()
+    for thread in threads:
+        thread.join(timeout=2)
+
+    assert admitted == [INTERACTIVE, BATCH, BATCH]
+    assert limiter.in_flight == 0
+
+
+def test_call_that_cannot_start_before_the_deadline_fails_fast():
+    limiter = RateLimiter("test", rate=1, burst=1)
+    limiter.acquire()
+
+    started = time.monotonic()
+    with deadline_scope(deadline_after(0.2)), pytest.raises(DeadlineExceeded):
+        limiter.acquire()
+
+    assert time.monotonic() - started < 0.15
+    assert limiter.stats()["queued"] == {INTERACTIVE: 0, BATCH: 0}
+
+
+def test_call_waits_for_tokens_within_the_deadline():
+    limiter = RateLimiter("test", rate=20, burst=1)
+    limiter.acquire()
+
+    started = time.monotonic()
+    with deadline_scope(deadline_after(1)):
+        limiter.acquire()
+
+    assert 0.03 <= time.monotonic() - started < 0.5
+
+
+def test_async_waiter_gives_up_its_place_at_the_deadline():
+    limiter = RateLimiter("test", rate=0, max_concurrency=1)
+    limiter.acquire()
+
+    async def wait():
+        with deadline_scope(deadline_after(0.1)):
+            await limiter.aacquire()
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(wait())
+    assert limiter.stats()["queued"][INTERACTIVE] == 0
+
+    limiter._release()
+    limiter.acquire()
+    assert limiter.in_flight == 1
+
+
+def test_backpressure_only_counts_calls_ahead_of_interactive_work():
+    limiter = RateLimiter("test", rate=0, max_concurrency=1, max_queue=1)
+    admitted = []
+    limiter.acquire()
+    thread = _queue_call(limiter, BATCH, admitted)
+    _wait_until(lambda: limiter.stats()["queued"][BATCH] == 1)
+    assert limiter.backpressure() is None
+
+    with rate_limit.priority(INTERACTIVE):
+        other = _queue_call(limiter, INTERACTIVE, admitted)
+    _wait_until(lambda: limiter.stats()["queued"][INTERACTIVE] == 1)
+    assert limiter.backpressure() is not None
+
+    limiter._release()
+    thread.join(timeout=2)
+    other.join(timeout=2)
+    assert admitted == [INTERACTIVE, BATCH]
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from backend.data_sources.snapshots_operations import RecordParser
+
+RECORDS = [
+    {"comment_id": "c1", "comment": "Best ramen: Ichiran, Shinjuku {open 24h}", "url": "https://reddit.com/r/a/1"},
+    {"comment_id": "c2", "comment": "Café de Flore – très cher ☕", "url": "https://reddit.com/r/a/2", "extra": [1, 2]},
+    {"comment_id": "c3", "comment": "quotes \"inside\", commas, [brackets]\nand newlines", "url": "https://reddit.com/r/a/3"},
+]
+
+
+def _ndjson():
+    return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in RECORDS).encode()
+
+
+def _json_array():
+    return json.dumps(RECORDS, ensure_ascii=False, indent=1).encode()
+
+
+def _parse(body: bytes, chunk_size: int, fields=None) -> list:
+    parser = RecordParser(fields)
+    records = []
+    for start in range(0, len(body), chunk_size):
+        records.extend(parser.feed(body[start:start + chunk_size]))
+    records.extend(parser.close())
+    assert parser.bytes == len(body)
+    assert parser.records == len(records)
+    return records
+
+
+@pytest.mark.parametrize("body", [_ndjson(), _json_array()], ids=["ndjson", "json"])
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1 << 16])
+def test_records_survive_any_chunk_boundary(body, chunk_size):
+    # Chunks of 1-3 bytes also split the multi-byte UTF-8 characters.
+    assert _parse(body, chunk_size) == RECORDS
+
+
+def test_records_are_projected_as_they_are_parsed():
+    records = _parse(_ndjson(), 5, fields=("comment_id", "extra"))
+
+    assert records == [{"comment_id": "c1"}, {"comment_id": "c2", "extra": [1, 2]}, {"comment_id": "c3"}]
+
+
+def test_only_the_unfinished_record_is_buffered():
+    body = _ndjson()
+    first_line = body.index(b"\n") + 1
+    parser = RecordParser()
+
+    assert parser.feed(body[:first_line + 10]) == [RECORDS[0]]
+    assert len(parser._buffer) <= 10
+
+
+@pytest.mark.parametrize("body", [_ndjson()[:-20], _json_array()[:-30]], ids=["ndjson", "json"])
+def test_truncated_body_is_an_error(body):
+    with pytest.raises(ValueError):
+        _parse(body, 64)
+
+
+def test_empty_array_has_no_records():
+    assert _parse(b"[]", 1) == []
+    assert _parse(b" [ \n ] ", 1) == []
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.utils.deadline import DeadlineExceeded
+from backend.utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("k", work) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["done"] * 5
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+
+def test_leader_errors_are_shared():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        raise ValueError("upstream failed")
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("k", work) for _ in range(3)), return_exceptions=True)
+
+    assert [type(r) for r in asyncio.run(main())] == [ValueError] * 3
+
+
+def test_cancelled_leader_hands_the_work_to_a_follower():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.4)
+        return "done"
+
+    async def main():
+        leader = asyncio.create_task(asyncio.wait_for(flight.ado("k", work), 0.2))
+        await asyncio.sleep(0.05)
+        follower = asyncio.create_task(flight.ado("k", work))
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    leader, follower = asyncio.run(main())
+    assert isinstance(leader, asyncio.TimeoutError)
+    assert follower == "done"
+    assert len(calls) == 2
+    assert flight.in_flight() == 0
+
+
+def test_cancelling_a_follower_leaves_the_leader_running():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.2)
+        return "done"
+
+    async def main():
+        leader = asyncio.create_task(flight.ado("k", work))
+        await asyncio.sleep(0)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(flight.ado("k", work), 0.05)
+        return await leader
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_sync_leader_out_of_time_hands_the_work_to_a_follower():
+    flight = SingleFlight()
+    started = threading.Event()
+    results = {}
+
+    def slow_then_deadline():
+        started.set()
+        time.sleep(0.1)
+        raise DeadlineExceeded("leader's own deadline")
+
+    def leader():
+        try:
+            flight.do("k", slow_then_deadline)
+        except DeadlineExceeded as e:
+            results["leader"] = e
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    started.wait()
+    results["follower"] = flight.do("k", lambda: "done")
+    thread.join()
+
+    assert isinstance(results["leader"], DeadlineExceeded)
+    assert results["follower"] == "done"
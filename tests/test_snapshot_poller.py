@@ -0,0 +1,116 @@
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from backend.data_sources import snapshot_poller
+from backend.data_sources.snapshot_poller import SnapshotPoller
+
+
+class _Progress:
+    def __init__(self, status):
+        self.status = status
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"status": self.status}
+
+
+@pytest.fixture
+def progress(monkeypatch):
+    state = {"status": "running", "checks": 0}
+
+    def request(method, url, **kwargs):
+        state["checks"] += 1
+        return _Progress(state["status"])
+
+    monkeypatch.setattr(snapshot_poller.http_client, "request", request)
+    return state
+
+
+def test_each_waiter_keeps_its_own_deadline(progress):
+    poller = SnapshotPoller(min_interval=0.02, max_interval=0.05)
+    short = poller.wait("s1", timeout=0.2)
+    long = poller.wait("s1", timeout=5)
+
+    started = time.monotonic()
+    assert short.result(timeout=2) is False
+    assert time.monotonic() - started < 1
+    assert not long.done()
+
+    progress["status"] = "ready"
+    assert long.result(timeout=2) is True
+    assert poller.stats()["pending"] == 0
+
+
+def test_late_waiter_with_shorter_deadline_times_out_first(progress):
+    poller = SnapshotPoller(min_interval=0.5, max_interval=1)
+    long = poller.wait("s2", timeout=5)
+    short = poller.wait("s2", timeout=0.1)
+
+    assert short.result(timeout=1) is False
+    assert not long.done()
+    long.cancel()
+
+
+def test_snapshot_is_polled_once_for_all_waiters(progress):
+    poller = SnapshotPoller(min_interval=0.02, max_interval=0.05)
+    progress["status"] = "ready"
+    waiters = [poller.wait("s3", timeout=5) for _ in range(5)]
+
+    assert [w.result(timeout=2) for w in waiters] == [True] * 5
+    assert progress["checks"] == 1
+
+
+def test_poll_snapshot_status_returns_at_its_own_timeout(progress, monkeypatch):
+    from backend.data_sources import snapshots_operations
+
+    poller = SnapshotPoller(min_interval=0.02, max_interval=0.05)
+    monkeypatch.setattr(snapshots_operations, "get_poller", lambda: poller)
+    other = poller.wait("s4", timeout=30)
+
+    started = time.monotonic()
+    assert snapshots_operations.poll_snapshot_status("s4", max_attempts=1, delay=0.2) is False
+    assert time.monotonic() - started < 1
+    assert not other.done()
+    other.cancel()
+
+
+class _CancelledInTheGap(Future):
+    """A waiter its caller cancels between the poller's done() check and set_result()."""
+
+    def done(self):
+        return False
+
+
+def _racy_waiter(poller, snapshot_id, timeout):
+    waiter = _CancelledInTheGap()
+    waiter.cancel()
+    with poller._cond:
+        poller._pending[snapshot_id].waiters.append((waiter, time.monotonic() + timeout))
+
+
+def test_cancelled_waiter_does_not_strand_the_others(progress):
+    poller = SnapshotPoller(min_interval=0.02, max_interval=0.05)
+    first = poller.wait("s5", timeout=5)
+    _racy_waiter(poller, "s5", timeout=5)
+    last = poller.wait("s5", timeout=5)
+
+    progress["status"] = "ready"
+    assert first.result(timeout=2) is True
+    assert last.result(timeout=2) is True
+    assert poller.stats()["pending"] == 0
+
+
+def test_poller_survives_a_cancelled_waiter_timing_out(progress):
+    poller = SnapshotPoller(min_interval=0.02, max_interval=0.05)
+    other = poller.wait("s6", timeout=0.1)
+    _racy_waiter(poller, "s6", timeout=0.05)
+
+    assert other.result(timeout=2) is False
+    assert poller._thread.is_alive()
+
+    progress["status"] = "ready"
+    assert poller.wait("s7", timeout=5).result(timeout=2) is True
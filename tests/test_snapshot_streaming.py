@@ -0,0 +1,226 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+
+from backend.agent.ranking import CommentRanker
+from backend.data_sources import http_client, snapshot_index, web_operations
+from backend.data_sources.snapshot_index import SnapshotIndex
+
+POST = "https://reddit.com/r/travel/comments/abc/tokyo_food"
+
+
+class _Response:
+    def __init__(self, payload=None, records=(), fail_after=None):
+        self.payload = payload
+        self.records = records
+        self.fail_after = fail_after
+        self.status_code = 200
+        self.headers = {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+    def iter_content(self, chunk_size=1):
+        for i, record in enumerate(self.records):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise ConnectionError("connection reset")
+            yield (json.dumps(record) + "\n").encode()
+
+    async def aiter_bytes(self, chunk_size=None):
+        for chunk in self.iter_content():
+            yield chunk
+
+    def close(self):
+        pass
+
+
+def _comments(count, url=POST):
+    for i in range(count):
+        yield {
+            "comment_id": f"c{i}",
+            "comment": f"ramen place number {i} near shibuya was great food",
+            "date_posted": "2024-05-01",
+            "url": f"{url}/c{i}",
+            "input": {"url": url},
+        }
+
+
+@pytest.fixture
+def brightdata(monkeypatch, tmp_path):
+    state = {"triggers": 0, "downloads": 0, "count": 10, "fail_after": None, "echo": POST, "stray": []}
+
+    def route(method, url, **kwargs):
+        if "/trigger" in url:
+            state["triggers"] += 1
+            return _Response({"snapshot_id": f"s{state['triggers']}"})
+        if "/progress/" in url:
+            return _Response({"status": "ready"})
+        state["downloads"] += 1
+        records = [*_comments(state["count"], state["echo"]), *state["stray"]]
+        return _Response(records=records, fail_after=state["fail_after"])
+
+    @asynccontextmanager
+    async def astream(method, url, **kwargs):
+        yield route(method, url, **kwargs)
+
+    async def arequest(method, url, **kwargs):
+        return route(method, url, **kwargs)
+
+    monkeypatch.setattr(http_client, "request", lambda method, url, **kwargs: route(method, url, **kwargs))
+    monkeypatch.setattr(http_client, "arequest", arequest)
+    monkeypatch.setattr(http_client, "astream", astream)
+    index = state["index"] = SnapshotIndex(str(tmp_path / "index.sqlite3"), ttl=3600)
+    monkeypatch.setattr(snapshot_index, "get_snapshot_index", lambda: index)
+    return state
+
+
+class _WatchedRanker(CommentRanker):
+    """Remembers the largest its candidate pool got."""
+
+    peak = 0
+
+    def add(self, comment):
+        super().add(comment)
+        self.peak = max(self.peak, len(self._pool))
+
+
+def test_comments_are_ranked_while_they_download(brightdata):
+    brightdata["count"] = 5000
+    ranker = _WatchedRanker({"ramen", "food"}, top_n=5, token_budget=10_000)
+
+    result = web_operations.reddit_post_retrieval([POST], ranker=ranker)
+
+    assert result["total_retrieved"] == 5000
+    assert len(result["comments"]) == 5
+    assert ranker.peak == ranker.pool_size
+
+
+def test_reused_input_is_read_back_from_the_spool(brightdata):
+    first = web_operations.reddit_post_retrieval([POST])
+    second = web_operations.reddit_post_retrieval([POST + "/"])
+
+    assert brightdata["triggers"] == 1
+    assert brightdata["downloads"] == 1
+    assert second == first
+    assert first["total_retrieved"] == 10
+
+
+def test_echoed_input_is_matched_after_canonicalization(brightdata):
+    brightdata["echo"] = "http://reddit.com/r/Travel/comments/abc/tokyo_food/?utm_source=share"
+
+    first = web_operations.reddit_post_retrieval([POST])
+    second = web_operations.reddit_post_retrieval([POST])
+
+    assert brightdata["triggers"] == 1
+    assert second == first
+    assert first["total_retrieved"] == 10
+
+
+STRAY = {"comment_id": "stray", "comment": "no input echoed", "date_posted": "2024-05-02"}
+
+
+def test_unattributed_records_are_returned_but_not_reused(brightdata):
+    brightdata["stray"] = [STRAY]
+    posts = [POST, POST.replace("abc", "def")]
+
+    first = web_operations.reddit_post_retrieval(posts)
+    second = web_operations.reddit_post_retrieval(posts)
+
+    assert first["total_retrieved"] == 11
+    assert "stray" in [c["comment_id"] for c in first["comments"]]
+    assert second == first
+    assert brightdata["triggers"] == 2
+    assert brightdata["index"].stats()["downloads"] == 0
+
+
+def test_single_input_snapshot_keeps_records_without_an_echo(brightdata):
+    brightdata["stray"] = [STRAY]
+
+    first = web_operations.reddit_post_retrieval([POST])
+    second = web_operations.reddit_post_retrieval([POST])
+
+    assert first["total_retrieved"] == 11
+    assert second == first
+    assert brightdata["triggers"] == 1
+
+
+def test_broken_download_is_neither_returned_nor_reused(brightdata):
+    brightdata["fail_after"] = 3
+    assert web_operations.reddit_post_retrieval([POST], ranker=CommentRanker({"ramen"})) is None
+    assert brightdata["index"].stats()["downloads"] == 0
+
+    brightdata["fail_after"] = None
+    assert web_operations.reddit_post_retrieval([POST])["total_retrieved"] == 10
+    assert brightdata["triggers"] == 2
+
+
+def test_async_retrieval_ranks_the_stream(brightdata):
+    brightdata["count"] = 300
+    ranker = CommentRanker({"ramen"}, top_n=3, token_budget=10_000)
+
+    result = asyncio.run(web_operations.areddit_post_retrieval([POST], ranker=ranker))
+
+    assert result["total_retrieved"] == 300
+    assert len(result["comments"]) <= 3
+
+
+async def _longest_stall(work):
+    """Run `work` while a heartbeat ticks on the loop; the longest gap between ticks."""
+    loop = asyncio.get_running_loop()
+    gaps, last = [0.0], loop.time()
+    task = asyncio.ensure_future(work)
+    while not task.done():
+        await asyncio.sleep(0)
+        now = loop.time()
+        gaps.append(now - last)
+        last = now
+    return await task, max(gaps)
+
+
+def test_async_ranking_leaves_the_event_loop_free(brightdata, monkeypatch):
+    monkeypatch.setattr(web_operations, "RANK_BATCH_SIZE", 50)
+    brightdata["count"] = 3000
+
+    def retrieve():
+        ranker = CommentRanker({"ramen"}, top_n=3, token_budget=10_000)
+        return asyncio.run(_longest_stall(web_operations.areddit_post_retrieval([POST], ranker=ranker)))
+
+    fresh, fresh_stall = retrieve()
+    reused, reused_stall = retrieve()
+
+    assert brightdata["triggers"] == 1
+    assert fresh["total_retrieved"] == reused["total_retrieved"] == 3000
+    assert fresh_stall < 0.2 and reused_stall < 0.2
+
+
+def test_spool_pages_match_inputs_and_paths_under_them(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_index, "PAGE_SIZE", 7)
+    index = SnapshotIndex(str(tmp_path / "index.sqlite3"), ttl=3600)
+    spool = index.spool("s1")
+    for i in range(30):
+        spool.add("reddit.com/r/a" if i % 2 else "reddit.com/r/a/comments/1", {"i": i})
+    spool.add("reddit.com/r/ab", {"i": "other"})
+    assert not index.stored("s1")
+    spool.commit()
+
+    assert index.stored("s1")
+    assert [r["i"] for r in index.iter_records("s1", "reddit.com/r/a")] == list(range(30))
+    assert [r["i"] for r in index.iter_records("s1", "reddit.com/r/ab")] == ["other"]
+
+
+def test_spool_evicts_least_recently_used_downloads(tmp_path):
+    index = SnapshotIndex(str(tmp_path / "index.sqlite3"), ttl=3600, max_records=10)
+    for snapshot_id in ("s1", "s2", "s3"):
+        spool = index.spool(snapshot_id)
+        for i in range(4):
+            spool.add("x", {"i": i})
+        spool.commit()
+
+    assert not index.stored("s1")
+    assert index.stored("s2") and index.stored("s3")
+    assert index.stats()["records"] == 8
@@ -0,0 +1,83 @@
+from backend.data_sources.trigger_batcher import TriggerBatcher, normalize_input, split_records
+
+POST_A = "https://www.reddit.com/r/japantravel/comments/abc/tokyo_food"
+POST_B = "https://www.reddit.com/r/travel/comments/def/kyoto_temples"
+
+
+def _comment(comment_id, url, echoed="input"):
+    return {"comment_id": comment_id, "url": f"{url}/{comment_id}", echoed: {"url": url}}
+
+
+def test_records_go_to_the_request_that_asked_for_their_input():
+    records = [_comment("a1", POST_A), _comment("b1", POST_B), _comment("a2", POST_A, echoed="discovery_input")]
+
+    split, unattributed = split_records(records, [[{"url": POST_A}], [{"url": POST_B}]], "url")
+
+    assert [r["comment_id"] for r in split[0]] == ["a1", "a2"]
+    assert [r["comment_id"] for r in split[1]] == ["b1"]
+    assert unattributed == []
+
+
+def test_records_under_a_requested_path_belong_to_it():
+    record = {"comment_id": "a1", "url": POST_A + "/a1"}
+
+    split, _ = split_records([record], [[{"url": POST_A + "/"}], [{"url": POST_B}]], "url")
+
+    assert split == [[record], []]
+
+
+def test_a_request_for_several_inputs_gets_all_of_them():
+    records = [_comment("a1", POST_A), _comment("b1", POST_B)]
+
+    split, _ = split_records(records, [[{"url": POST_A}, {"url": POST_B}], [{"url": POST_A}]], "url")
+
+    assert [r["comment_id"] for r in split[0]] == ["a1", "b1"]
+    assert [r["comment_id"] for r in split[1]] == ["a1"]
+
+
+def test_canonicalized_urls_are_still_attributed():
+    echoed = [
+        _comment("a1", "http://reddit.com/r/JapanTravel/comments/abc/tokyo_food/"),
+        _comment("a2", "https://m.reddit.com/r/japantravel/comments/abc/tokyo_food?utm_source=share"),
+        _comment("b1", "https://old.reddit.com/r/travel/comments/def/kyoto_temples"),
+    ]
+
+    split, unattributed = split_records(echoed, [[{"url": POST_A}], [{"url": POST_B}]], "url")
+
+    assert [r["comment_id"] for r in split[0]] == ["a1", "a2"]
+    assert split[1] == []
+    assert [r["comment_id"] for r in unattributed] == ["b1"]
+
+
+def test_keyword_inputs_are_matched_case_insensitively():
+    record = {"title": "Tokyo in May", "input": {"keyword": " Tokyo Food "}}
+
+    split, _ = split_records([record], [[{"keyword": "tokyo food"}], [{"keyword": "kyoto"}]], "keyword")
+
+    assert split == [[record], []]
+
+
+def test_records_without_an_input_are_returned_separately():
+    records = [{"comment_id": "x"}, "not a record", _comment("a1", POST_A)]
+
+    split, unattributed = split_records(records, [[{"url": POST_A}]], "url")
+
+    assert split == [[records[2]]]
+    assert unattributed == records[:2]
+    assert split_records(None, [[{"url": POST_A}]], "url") == ([[]], [])
+
+
+def test_normalize_input_keeps_meaningful_query_parameters():
+    assert normalize_input("HTTPS://WWW.Example.com/a/?b=2&a=1&utm_medium=x") == "example.com/a?a=1&b=2"
+    assert normalize_input(" Tokyo Food/ ") == "tokyo food"
+
+
+def test_batch_hands_unattributed_records_to_every_request():
+    records = [_comment("a1", POST_A), {"comment_id": "stray"}]
+    batcher = TriggerBatcher(lambda params, data: records, window=60, max_items=2)
+
+    first = batcher.submit({"dataset_id": "d"}, [{"url": POST_A}], "url")
+    second = batcher.submit({"dataset_id": "d"}, [{"url": POST_B}], "url")
+
+    assert [r["comment_id"] for r in first.result(timeout=2)] == ["a1", "stray"]
+    assert [r["comment_id"] for r in second.result(timeout=2)] == ["stray"]
@@ -0,0 +1,82 @@
+import pytest
+
+from backend.agent.trip_parser import parse_budget, parse_days, parse_destination, parse_trip_request
+
+
+@pytest.mark.parametrize("text, days", [
+    ("5 days in Tokyo", 5),
+    ("a 10-day trip to Rome", 10),
+    ("10days in Bali", 10),
+    ("two weeks in Japan", 14),
+    ("a week in Lisbon", 7),
+    ("a couple of days in Paris", 2),
+    ("a few days in Prague", 3),
+    ("weekend in Berlin", 2),
+    ("Kerala day trips for 6 days", 6),
+    ("Canada road trip", None),
+    ("Kerala day trips", None),
+])
+def test_parse_days(text, days):
+    assert parse_days(text) == days
+
+
+def test_number_words_inside_other_words_are_not_durations():
+    trip_request, confidence = parse_trip_request("Kerala day trips for 6 days")
+    assert trip_request.destination == "Kerala"
+    assert trip_request.days == 6
+    assert confidence == 1.0
+
+
+def test_several_durations_lower_the_confidence():
+    trip_request, confidence = parse_trip_request("2 weeks in Japan with 3 days in Kyoto")
+    assert trip_request.days == 14
+    assert confidence <= 0.5
+
+
+def test_repeated_duration_keeps_the_confidence():
+    _, confidence = parse_trip_request("5 days in Tokyo, what to do on each of the 5 days?")
+    assert confidence == 1.0
+
+
+@pytest.mark.parametrize("text, budget", [
+    ("budget of $2,000", 2000.0),
+    ("around 1.5k usd", 1500.0),
+    ("€800 total", 800.0),
+    ("no budget limit", None),
+])
+def test_parse_budget(text, budget):
+    assert parse_budget(text) == budget
+
+
+def test_parse_destination():
+    assert parse_destination("A week in New York") == ("New York", 1.0)
+    assert parse_destination("Paris and Rome in 10 days")[1] < 0.8
+    assert parse_destination("3 days exploring Ljubljana") == ("Ljubljana", 0.6)
+    assert parse_destination("somewhere warm") == (None, 0.0)
+
+
+def test_no_duration_means_no_request():
+    assert parse_trip_request("Things to do in Tokyo") == (None, 0.0)
+
+
+@pytest.mark.parametrize("text", [
+    "Plan 4 days in Delhi, not interested in nightlife",
+    "4 days in Delhi without nightlife",
+    "4 days in Delhi, I don't want bars or clubs",
+    "4 days in Delhi, avoid partying",
+])
+def test_ruled_out_interests_are_dropped_and_left_to_the_llm(text):
+    trip_request, confidence = parse_trip_request(text)
+    assert trip_request.destination == "Delhi"
+    assert "nightlife" not in trip_request.interests
+    assert confidence < 0.8
+
+
+def test_negation_ends_with_its_clause():
+    trip_request, confidence = parse_trip_request("5 days in Tokyo, no clubs but lots of street food")
+    assert trip_request.interests == ["food"]
+    assert confidence < 0.8
+
+    trip_request, confidence = parse_trip_request("5 days in Tokyo for food, no budget limit")
+    assert trip_request.interests == ["food"]
+    assert confidence == 1.0